@@ -0,0 +1,85 @@
+"""Compare the SDK and the lean DNS record listing in time and memory.
+
+Both listings run against a fake DNS records API served in-process, so only
+the client side decoding and indexing is measured:
+
+    uv run python -m benchmarks.dns_listing [RECORDS]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from math import ceil
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from cloudflare import Cloudflare
+
+from er_cloudflare_zone.discovery import dns_record_index, list_dns_records_lean
+
+from .zones import ZONE_ID, SyntheticZone
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+PER_PAGE = 1000
+
+
+def fake_client(records: list[dict[str, Any]]) -> Cloudflare:
+    """Cloudflare client whose DNS records list is served from memory."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        per_page = int(request.url.params.get("per_page", 100))
+        page = int(request.url.params.get("page", 1))
+        result = records[(page - 1) * per_page : page * per_page]
+        return httpx.Response(
+            200,
+            json={
+                "success": True,
+                "errors": [],
+                "messages": [],
+                "result": result,
+                "result_info": {
+                    "page": page,
+                    "per_page": per_page,
+                    "count": len(result),
+                    "total_count": len(records),
+                    "total_pages": ceil(len(records) / per_page),
+                },
+            },
+        )
+
+    return Cloudflare(
+        api_token="benchmark",  # ruff: ignore[hardcoded-password-func-arg]
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+
+
+def measure(label: str, list_records: Callable[[], Iterable[Any]]) -> None:
+    """Time the listing, then list again to trace its memory."""
+    gc.collect()
+    start = time.perf_counter()
+    index = dns_record_index(list_records())
+    elapsed = time.perf_counter() - start
+    del index
+    gc.collect()
+    tracemalloc.start()
+    index = dns_record_index(list_records())
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(  # ruff: ignore[print]
+        f"{label:<4} {len(index):>8} records {elapsed:8.3f}s "
+        f"retained {retained / 2**20:7.1f} MiB peak {peak / 2**20:7.1f} MiB"
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    client = fake_client(SyntheticZone(count).api_dns_records())
+    measure("sdk", lambda: client.dns.records.list(zone_id=ZONE_ID, per_page=PER_PAGE))
+    measure("lean", lambda: list_dns_records_lean(client, ZONE_ID, per_page=PER_PAGE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Local stand-in for the Cloudflare API endpoints the tools call.
+
+Serves a synthetic zone over HTTP on localhost: the zones, the zone's DNS
+records, their BIND export and the rulesets. Point the SDK at it with
+CLOUDFLARE_BASE_URL. Responses can be delayed, pages capped and requests
+answered with 429 to exercise the retries; every request is counted.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from typing import TYPE_CHECKING, Any, Self
+from urllib.parse import parse_qs, urlsplit
+
+from .zones import API_ZONE, ZONE_ID
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from .zones import SyntheticZone
+
+API_PREFIX = "/client/v4"
+_ZONE_PATH_RE = re.compile(
+    rf"^{API_PREFIX}/zones/(?P<zone_id>\w+)/(?P<endpoint>dns_records(?:/export)?|rulesets)$"
+)
+
+
+@dataclass(frozen=True)
+class FakeAPISettings:
+    """How the fake API responds.
+
+    latency delays every response; max_per_page caps the page size like the
+    real API does; every rate_limit_every-th request is answered with a 429
+    carrying retry_after, 0 to never rate limit.
+    """
+
+    latency: float = 0.0
+    max_per_page: int = 5000
+    rate_limit_every: int = 0
+    retry_after: float = 0.0
+
+
+def _envelope(result: Any, result_info: dict[str, Any] | None = None) -> bytes:  # ruff: ignore[any-type]
+    body: dict[str, Any] = {
+        "success": True,
+        "errors": [],
+        "messages": [],
+        "result": result,
+    }
+    if result_info is not None:
+        body["result_info"] = result_info
+    return json.dumps(body).encode()
+
+
+def _error(status: HTTPStatus, message: str) -> bytes:
+    return json.dumps({
+        "success": False,
+        "errors": [{"code": status.value, "message": message}],
+        "messages": [],
+        "result": None,
+    }).encode()
+
+
+class FakeCloudflare:
+    """The fake API serving one zone, run in a thread while used as a context.
+
+    calls counts the requests by endpoint, rate limited ones included;
+    rate_limited counts the 429 responses.
+    """
+
+    def __init__(
+        self, zone: SyntheticZone, settings: FakeAPISettings | None = None
+    ) -> None:
+        self.settings = settings or FakeAPISettings()
+        self.dns_records = zone.api_dns_records()
+        self.rulesets = zone.api_rulesets()
+        self.calls: Counter[str] = Counter()
+        self.rate_limited = 0
+        self._requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API, for CLOUDFLARE_BASE_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}{API_PREFIX}"
+
+    @property
+    def api_calls(self) -> int:
+        return self.calls.total()
+
+    def reset(self) -> None:
+        """Start counting from zero, e.g. before the next measured run."""
+        with self._lock:
+            self.calls.clear()
+            self.rate_limited = 0
+            self._requests = 0
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _count(self, endpoint: str) -> bool:
+        """Count the request, whether to answer it with a 429."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            self._requests += 1
+            every = self.settings.rate_limit_every
+            limited = every > 0 and self._requests % every == 0
+            self.rate_limited += limited
+            return limited
+
+    def _page(
+        self, items: list[dict[str, Any]], params: dict[str, str]
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        per_page = min(int(params.get("per_page", 100)), self.settings.max_per_page)
+        page = int(params.get("page", 1))
+        result = items[(page - 1) * per_page : page * per_page]
+        return result, {
+            "page": page,
+            "per_page": per_page,
+            "count": len(result),
+            "total_count": len(items),
+            "total_pages": ceil(len(items) / per_page),
+        }
+
+    def _zones(self, params: dict[str, str]) -> bytes:
+        zones = [
+            zone
+            for zone in (API_ZONE,)
+            if params.get("name", zone["name"]) == zone["name"]
+            and params.get("account.id", zone["account"]["id"]) == zone["account"]["id"]
+        ]
+        return _envelope(*self._page(zones, params))
+
+    def _dns_records(self, params: dict[str, str]) -> bytes:
+        records = self.dns_records
+        if "name.exact" in params or "type" in params:
+            records = [
+                record
+                for record in records
+                if params.get("name.exact", record["name"]) == record["name"]
+                and params.get("type", record["type"]) == record["type"]
+            ]
+        return _envelope(*self._page(records, params))
+
+    def _export(self) -> bytes:
+        return "".join(
+            f"{record['name']}.\t{record['ttl']}\tIN\t{record['type']}\t{record['content']}\n"
+            for record in self.dns_records
+        ).encode()
+
+    def respond(
+        self, path: str, params: dict[str, str]
+    ) -> tuple[HTTPStatus, dict[str, str], bytes]:
+        """Status, headers and body of the response to a GET request."""
+        if path == f"{API_PREFIX}/zones":
+            endpoint = "zones"
+        elif (match := _ZONE_PATH_RE.match(path)) and match["zone_id"] == ZONE_ID:
+            endpoint = match["endpoint"]
+        else:
+            return HTTPStatus.NOT_FOUND, {}, _error(HTTPStatus.NOT_FOUND, path)
+        if self._count(endpoint):
+            return (
+                HTTPStatus.TOO_MANY_REQUESTS,
+                {"Retry-After": str(self.settings.retry_after)},
+                _error(HTTPStatus.TOO_MANY_REQUESTS, "rate limited"),
+            )
+        match endpoint:
+            case "zones":
+                body = self._zones(params)
+            case "dns_records":
+                body = self._dns_records(params)
+            case "dns_records/export":
+                return HTTPStatus.OK, {"Content-Type": "text/plain"}, self._export()
+            case _:
+                body = _envelope(self.rulesets, {"cursor": ""})
+        return HTTPStatus.OK, {"Content-Type": "application/json"}, body
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                time.sleep(api.settings.latency)
+                status, headers, body = api.respond(url.path, params)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # ruff: ignore[builtin-argument-shadowing, any-type]
+                pass
+
+        return Handler
@@ -0,0 +1,201 @@
+"""Stand-in for the terraform binary, recording every call and its timing.
+
+Installed as `terraform` on the PATH by install(), it keeps a fake state per
+working dir (the -chdir one, else the current) and answers the commands the
+tools run: init, import, apply with -target or a saved plan, state
+list/pull/push, providers schema, plan, show and fmt. Each call appends one JSON line with its command,
+arguments count, number of resources and seconds taken to FAKE_TERRAFORM_LOG;
+FAKE_TERRAFORM_LATENCY adds a delay to every call, like terraform's startup.
+
+It only uses the standard library and is run as a script, so it starts fast.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+PROVIDER_SOURCE = "registry.terraform.io/cloudflare/cloudflare"
+RESOURCE_TYPES = (
+    "cloudflare_zone",
+    "cloudflare_zone_subscription",
+    "cloudflare_dns_record",
+    "cloudflare_ruleset",
+)
+_STATE_DIR = ".fake-terraform"
+# logged with their subcommand, e.g. "state push"
+_SUBCOMMANDS = (["state"], ["providers"])
+
+
+def install(bin_dir: Path) -> Path:
+    """Install the stub as `terraform` into bin_dir, to prepend to the PATH."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    terraform = bin_dir / "terraform"
+    terraform.write_text(
+        f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" "$@"\n',
+        encoding="utf-8",
+    )
+    terraform.chmod(0o755)
+    return terraform
+
+
+def read_log(log_file: Path) -> list[dict[str, Any]]:
+    """The recorded calls, in order."""
+    if not log_file.exists():
+        return []
+    return [
+        json.loads(line)
+        for line in log_file.read_text(encoding="utf-8").splitlines()
+        if line
+    ]
+
+
+def _address(resource: dict[str, Any], instance: dict[str, Any]) -> str:
+    address = f"{resource['type']}.{resource['name']}"
+    if "index_key" in instance:
+        return f"{address}[{json.dumps(instance['index_key'])}]"
+    return address
+
+
+class FakeState:
+    """Addresses imported one by one plus the last pushed state document."""
+
+    def __init__(self, workdir: Path) -> None:
+        self.dir = workdir / _STATE_DIR
+        self.addresses_file = self.dir / "addresses"
+        self.state_file = self.dir / "terraform.tfstate"
+
+    def add(self, addresses: list[str]) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self.addresses_file.open("a", encoding="utf-8") as f:
+            f.writelines(f"{address}\n" for address in addresses)
+
+    def pull(self) -> str:
+        if not self.state_file.exists():
+            return ""
+        return self.state_file.read_text(encoding="utf-8")
+
+    def push(self, state_file: Path) -> int:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        state = state_file.read_text(encoding="utf-8")
+        self.state_file.write_text(state, encoding="utf-8")
+        return sum(len(r["instances"]) for r in json.loads(state)["resources"])
+
+    def list(self) -> list[str]:
+        addresses = (
+            self.addresses_file.read_text(encoding="utf-8").splitlines()
+            if self.addresses_file.exists()
+            else []
+        )
+        if pulled := self.pull():
+            addresses += [
+                _address(resource, instance)
+                for resource in json.loads(pulled)["resources"]
+                for instance in resource["instances"]
+            ]
+        return addresses
+
+
+def _schemas() -> dict[str, Any]:
+    attributes = {
+        name: {"type": "string", "optional": True}
+        for name in ("id", "zone_id", "name", "type", "content")
+    }
+    return {
+        "format_version": "1.0",
+        "provider_schemas": {
+            PROVIDER_SOURCE: {
+                "resource_schemas": {
+                    resource_type: {"version": 0, "block": {"attributes": attributes}}
+                    for resource_type in RESOURCE_TYPES
+                }
+            }
+        },
+    }
+
+
+def _state_command(args: list[str], state: FakeState) -> tuple[str, int]:
+    match args:
+        case ["list"]:
+            addresses = state.list()
+            return "".join(f"{address}\n" for address in addresses), len(addresses)
+        case ["pull"]:
+            return state.pull(), 0
+        case ["push", state_file]:
+            return "", state.push(Path(state_file))
+    return "", 0
+
+
+def _read_only_command(args: list[str]) -> str:
+    match args:
+        case ["providers", "schema", "-json"]:
+            return json.dumps(_schemas())
+        case ["show", "-json", _]:
+            return json.dumps({"resource_drift": []})
+        case ["fmt", "-"]:
+            return sys.stdin.read()
+        case ["--version"]:
+            return "Terraform v1.14.0 (fake)\n"
+    return ""
+
+
+def _targets(options: list[str]) -> list[str]:
+    return [
+        option.removeprefix("-target=")
+        for option in options
+        if option.startswith("-target=")
+    ]
+
+
+def run(args: list[str], workdir: Path) -> tuple[str, int]:
+    """Output of the command and the number of resources it touched."""
+    state = FakeState(workdir)
+    match args:
+        case ["import", address, _]:
+            state.add([address])
+            return "", 1
+        case ["apply", *options]:
+            targets = _targets(options)
+            # a saved plan applies the targets it was planned with
+            for option in options:
+                if not option.startswith("-"):
+                    targets += json.loads(Path(option).read_text(encoding="utf-8"))[
+                        "targets"
+                    ]
+            state.add(targets)
+            return "", len(targets)
+        case ["state", *state_args]:
+            return _state_command(state_args, state)
+        case ["plan", *options]:
+            for option in options:
+                if option.startswith("-out="):
+                    Path(option.removeprefix("-out=")).write_text(
+                        json.dumps({"targets": _targets(options)}), encoding="utf-8"
+                    )
+    return _read_only_command(args), 0
+
+
+def main() -> None:
+    start = time.perf_counter()
+    args = sys.argv[1:]
+    workdir = Path.cwd()
+    while args and args[0].startswith("-chdir="):
+        workdir = Path(args.pop(0).removeprefix("-chdir="))
+    time.sleep(float(os.environ.get("FAKE_TERRAFORM_LATENCY", "0")))
+    output, resources = run(args, workdir)
+    sys.stdout.write(output)
+    if log_file := os.environ.get("FAKE_TERRAFORM_LOG"):
+        entry = {
+            "command": " ".join(args[:2] if args[:1] in _SUBCOMMANDS else args[:1]),
+            "args": len(args),
+            "resources": resources,
+            "seconds": time.perf_counter() - start,
+        }
+        with Path(log_file).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Benchmark generate-tf-config and import-tfstate end to end at scale.
+
+Each entry point runs as its own process against a fake Cloudflare API (see
+fake_cloudflare) and a fake terraform on the PATH (see fake_terraform), for
+synthetic zones of 100, 10k and 100k DNS records unless other sizes are
+given. Per run it reports the wall time, the API calls made (429s included),
+the terraform subprocesses started and the peak RSS of the process:
+
+    uv run python -m benchmarks.harness [RECORDS ...] [--import-mode state]
+        [--latency 0.01] [--page-size 5000] [--rate-limit-every 0]
+        [--terraform-latency 0] [--output results.json]
+        [--baseline results.json]
+
+Save the results of a run with --output and compare a later one against it
+with --baseline.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from . import fake_terraform
+from .fake_cloudflare import FakeAPISettings, FakeCloudflare
+from .zones import SIZES, SyntheticZone
+
+ROOT = Path(__file__).resolve().parents[1]
+# each run in order, sharing the working dir: the second generate-tf-config
+# finds the config unchanged
+RUNS = {
+    "generate-tf-config": "er_cloudflare_zone",
+    "generate-unchanged": "er_cloudflare_zone",
+    "import-tfstate": "er_cloudflare_zone.import_tfstate",
+}
+
+
+@dataclass(frozen=True)
+class RunResult:
+    """Measurements of one run of an entry point."""
+
+    run: str
+    records: int
+    exit_code: int
+    seconds: float
+    api_calls: int
+    rate_limited: int
+    subprocesses: int
+    terraform_seconds: float
+    peak_rss_mib: float
+
+    @property
+    def key(self) -> tuple[str, int]:
+        return self.run, self.records
+
+
+def environ(
+    workdir: Path, api: FakeCloudflare, args: argparse.Namespace
+) -> dict[str, str]:
+    """Environment of the entry points: real settings, fake backends."""
+    return os.environ | {
+        "PATH": f"{workdir / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}",
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])
+        ),
+        "INPUT_FILE": str(workdir / "input.json"),
+        "DRY_RUN": "False",
+        "TERRAFORM_CMD": "terraform",
+        "IMPORT_MODE": args.import_mode,
+        "CLOUDFLARE_BASE_URL": api.url,
+        "CLOUDFLARE_API_TOKEN": "benchmark",
+        "CLOUDFLARE_HTTP2": "False",
+        # the fake API rate limits by --rate-limit-every, not the client
+        "CLOUDFLARE_RATE": "1000000",
+        "CLOUDFLARE_BURST": "1000000",
+        "FAKE_TERRAFORM_LOG": str(workdir / "terraform.jsonl"),
+        "FAKE_TERRAFORM_LATENCY": str(args.terraform_latency),
+    }
+
+
+def run_entry_point(
+    run: str,
+    zone: SyntheticZone,
+    workdir: Path,
+    api: FakeCloudflare,
+    env: dict[str, str],
+) -> RunResult:
+    """Run the entry point in a process of its own and measure it."""
+    api.reset()
+    terraform_log = Path(env["FAKE_TERRAFORM_LOG"])
+    terraform_log.unlink(missing_ok=True)
+    with (workdir / f"{run}.log").open("wb") as output:
+        start = time.perf_counter()
+        process = subprocess.Popen(  # ruff: ignore[subprocess-without-shell-equals-true]
+            [sys.executable, "-m", RUNS[run]],
+            cwd=workdir,
+            env=env,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+        # wait4 reports the resource usage of this very process
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    calls = fake_terraform.read_log(terraform_log)
+    return RunResult(
+        run=run,
+        records=zone.count,
+        exit_code=process.returncode,
+        seconds=seconds,
+        api_calls=api.api_calls,
+        rate_limited=api.rate_limited,
+        subprocesses=len(calls),
+        terraform_seconds=sum(call["seconds"] for call in calls),
+        # in KiB on Linux
+        peak_rss_mib=usage.ru_maxrss / 1024,
+    )
+
+
+def benchmark_zone(zone: SyntheticZone, args: argparse.Namespace) -> list[RunResult]:
+    """Run every entry point in order for the zone, in a fresh working dir."""
+    settings = FakeAPISettings(
+        latency=args.latency,
+        max_per_page=args.page_size,
+        rate_limit_every=args.rate_limit_every,
+    )
+    with (
+        tempfile.TemporaryDirectory(prefix="er-cloudflare-zone-bench-") as tmp,
+        FakeCloudflare(zone, settings) as api,
+    ):
+        workdir = Path(tmp)
+        shutil.copytree(
+            ROOT / "module",
+            workdir / "module",
+            ignore=shutil.ignore_patterns(".terraform", "backend.tf", "*.tfvars.json"),
+        )
+        fake_terraform.install(workdir / "bin")
+        (workdir / "input.json").write_bytes(zone.input_json())
+        env = environ(workdir, api, args)
+        results = []
+        for run in RUNS:
+            result = run_entry_point(run, zone, workdir, api, env)
+            if result.exit_code:
+                log = (workdir / f"{run}.log").read_text(encoding="utf-8")
+                print(f"{run} failed:\n{log[-2000:]}", file=sys.stderr)  # ruff: ignore[print]
+            results.append(result)
+    return results
+
+
+def _delta(value: float, baseline: RunResult | None, metric: str) -> str:
+    """Change of the metric against the baseline run, if any."""
+    base = getattr(baseline, metric, None)
+    if not base:
+        return ""
+    return f" ({(value - base) / base:+.0%})"
+
+
+def report(
+    results: list[RunResult], baseline: dict[tuple[str, int], RunResult]
+) -> None:
+    for result in results:
+        base = baseline.get(result.key)
+        print(  # ruff: ignore[print]
+            f"{result.run:<19} {result.records:>7} records "
+            f"exit {result.exit_code} "
+            f"{result.seconds:8.2f}s{_delta(result.seconds, base, 'seconds')} "
+            f"api {result.api_calls:>5} ({result.rate_limited} 429) "
+            f"terraform {result.subprocesses:>6} calls {result.terraform_seconds:7.2f}s "
+            f"rss {result.peak_rss_mib:7.1f} MiB"
+            f"{_delta(result.peak_rss_mib, base, 'peak_rss_mib')}"
+        )
+
+
+def load_results(path: Path) -> dict[tuple[str, int], RunResult]:
+    results = (RunResult(**r) for r in json.loads(path.read_text(encoding="utf-8")))
+    return {result.key: result for result in results}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument("records", nargs="*", type=int, default=list(SIZES))
+    parser.add_argument(
+        "--import-mode", default="state", choices=["sequential", "batch", "state"]
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--terraform-latency", type=float, default=0.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    baseline = load_results(args.baseline) if args.baseline else {}
+    results = []
+    for count in args.records:
+        zone_results = benchmark_zone(SyntheticZone(count), args)
+        report(zone_results, baseline)
+        results += zone_results
+    if args.output:
+        args.output.write_text(
+            json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8"
+        )
+
+
+if __name__ == "__main__":
+    main()
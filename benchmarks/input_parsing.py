@@ -0,0 +1,74 @@
+"""Compare parsing the input via dicts and straight from its JSON.
+
+Also compares serializing the parsed zone via dicts, as canonical tfvars
+text and streamed into the tfvars file, for zones of 100, 10k and 100k DNS
+records unless other sizes are given:
+
+    uv run python -m benchmarks.input_parsing [RECORDS ...]
+"""
+
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from er_cloudflare_zone.app_interface_input import AppInterfaceInput
+from er_cloudflare_zone.inputs import parse_ai_input
+from er_cloudflare_zone.tf_files import canonical_tf_vars, write_tf_vars
+
+from .zones import SIZES, SyntheticZone
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pydantic import BaseModel
+
+
+def measure(label: str, count: int, run: Callable[[], Any]) -> None:
+    """Time the run, then run again to trace its memory."""
+    gc.collect()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(  # ruff: ignore[print]
+        f"{label:<7} {count:>8} records {elapsed:8.3f}s peak {peak / 2**20:7.1f} MiB"
+    )
+
+
+def parse_via_dicts(raw: bytes) -> AppInterfaceInput:
+    """The former parse path: load the JSON into dicts, then validate those."""
+    return AppInterfaceInput.model_validate(json.loads(raw))
+
+
+def dump_via_dicts(model: BaseModel) -> str:
+    """Serialize by dumping the model into dicts, then those into JSON."""
+    return json.dumps(model.model_dump(mode="json"), indent=2)
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    for count in sizes:
+        raw = SyntheticZone(count).input_json()
+        measure("dicts", count, partial(parse_via_dicts, raw))
+        measure("json", count, partial(parse_ai_input, raw))
+        zone = parse_ai_input(raw).data
+        measure("dumps", count, partial(dump_via_dicts, zone))
+        measure("tfvars", count, partial(canonical_tf_vars, zone))
+        with tempfile.TemporaryDirectory() as tmp:
+            tf_vars_file = Path(tmp) / "terraform.tfvars.json"
+            measure("stream", count, partial(write_tf_vars, zone, tf_vars_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure the startup import time of the entry points, like -X importtime.
+
+Each entry point module is imported in a fresh interpreter, which reports
+the time of every import; the slowest ones are listed:
+
+    uv run python -m benchmarks.startup
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ENTRY_POINTS = {
+    "generate-tf-config": "er_cloudflare_zone.__main__",
+    "import-tfstate": "er_cloudflare_zone.import_tfstate",
+    "batch-run": "er_cloudflare_zone.batch",
+    "drift-check": "er_cloudflare_zone.drift",
+    "reconcile-dns": "er_cloudflare_zone.reconcile",
+}
+# only imported on the first API call, never at startup
+DEFERRED_PACKAGES = frozenset({"cloudflare", "httpx", "h2"})
+# generous enough for slow CI runners, the SDK alone takes about as long
+BUDGET_SECONDS = 1.0
+_PREFIX = "import time:"
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    """One line of -X importtime, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+
+    @property
+    def package(self) -> str:
+        return self.module.partition(".")[0]
+
+
+def import_times(module: str) -> list[ImportTime]:
+    """The import times of the module and all it imports, in import order."""
+    result = subprocess.run(  # ruff: ignore[subprocess-without-shell-equals-true]
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    times: list[ImportTime] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith(_PREFIX):
+            continue
+        self_us, cumulative_us, name = line.removeprefix(_PREFIX).split("|")
+        if self_us.strip().isdigit():
+            times.append(ImportTime(name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def startup_seconds(times: list[ImportTime], module: str) -> float:
+    """Cumulative import time of the module, all it imports included."""
+    return next(t.cumulative_us for t in times if t.module == module) / 1e6
+
+
+def deferred_imports(times: list[ImportTime]) -> set[str]:
+    """The packages imported at startup that should only be imported on use."""
+    return {t.package for t in times} & DEFERRED_PACKAGES
+
+
+def main() -> None:
+    for entry_point, module in ENTRY_POINTS.items():
+        times = import_times(module)
+        seconds = startup_seconds(times, module)
+        print(  # ruff: ignore[print]
+            f"{entry_point}: {seconds * 1000:.0f} ms "
+            f"(budget {BUDGET_SECONDS * 1000:.0f} ms), {len(times)} modules, "
+            f"deferred imported: {sorted(deferred_imports(times)) or 'none'}"
+        )
+        by_package: dict[str, int] = {}
+        for t in times:
+            by_package[t.package] = by_package.get(t.package, 0) + t.self_us
+        for package, self_us in sorted(by_package.items(), key=lambda i: -i[1])[:5]:
+            print(f"  {package:<30} {self_us / 1000:7.1f} ms")  # ruff: ignore[print]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Synthetic zones, as app-interface input and as the Cloudflare API lists them."""
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+SIZES = (100, 10_000, 100_000)
+ACCOUNT_ID = "account-123"
+ZONE_ID = "023e105f4ecef8ad9ca31a8372d0c353"
+ZONE_NAME = "example.com"
+RULESET_PHASES = (
+    "http_request_firewall_custom",
+    "http_request_dynamic_redirect",
+    "http_request_cache_settings",
+)
+_TIMESTAMP = "2026-01-01T00:00:00Z"
+API_ZONE: dict[str, Any] = {
+    "id": ZONE_ID,
+    "name": ZONE_NAME,
+    "account": {"id": ACCOUNT_ID, "name": "benchmark"},
+    "status": "active",
+    "type": "full",
+    "created_on": _TIMESTAMP,
+    "modified_on": _TIMESTAMP,
+}
+
+
+def _address(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+@dataclass(frozen=True)
+class SyntheticZone:
+    """A zone of count A records and one ruleset per phase, live and configured.
+
+    Every configured record and ruleset exists in the API, so an import of the
+    zone resolves all of them.
+    """
+
+    count: int
+    rulesets: int = len(RULESET_PHASES)
+
+    def zone_data(self) -> dict[str, Any]:
+        return {
+            "name": ZONE_NAME,
+            "account_id": ACCOUNT_ID,
+            "plan": "enterprise",
+            "dns_records": [
+                {
+                    "identifier": f"host-{i}",
+                    "name": f"host-{i}.{ZONE_NAME}",
+                    "type": "A",
+                    "ttl": 1,
+                    "content": _address(i),
+                    "proxied": False,
+                }
+                for i in range(self.count)
+            ],
+            "rulesets": [
+                {
+                    "identifier": f"ruleset-{i}",
+                    "kind": "zone",
+                    "name": f"ruleset-{i}",
+                    "phase": RULESET_PHASES[i % len(RULESET_PHASES)],
+                    "rules": [
+                        {
+                            "action": "block",
+                            "expression": f'(http.host eq "blocked-{i}.{ZONE_NAME}")',
+                        }
+                    ],
+                }
+                for i in range(self.rulesets)
+            ],
+        }
+
+    def input(self) -> dict[str, Any]:
+        """The app-interface input of the zone."""
+        return {
+            "data": self.zone_data(),
+            "provision": {
+                "provision_provider": "cloudflare",
+                "provisioner": "benchmark",
+                "provider": "zone",
+                "identifier": "benchmark",
+                "target_cluster": "cluster",
+                "target_namespace": "namespace",
+                "target_secret_name": "secret",
+                "module_provision_data": {
+                    "tf_state_bucket": "bucket",
+                    "tf_state_region": "us-east-1",
+                    "tf_state_dynamodb_table": "table",
+                    "tf_state_key": "benchmark/terraform.tfstate",
+                },
+            },
+        }
+
+    def input_json(self) -> bytes:
+        return json.dumps(self.input()).encode()
+
+    def api_dns_records(self) -> list[dict[str, Any]]:
+        """DNS records shaped like the API returns them, meta fields included."""
+        return [
+            {
+                "id": f"{i:032x}",
+                "name": f"host-{i}.{ZONE_NAME}",
+                "type": "A",
+                "content": _address(i),
+                "proxiable": True,
+                "proxied": False,
+                "ttl": 1,
+                "comment": None,
+                "tags": [],
+                "settings": {},
+                "meta": {},
+                "created_on": _TIMESTAMP,
+                "modified_on": _TIMESTAMP,
+            }
+            for i in range(self.count)
+        ]
+
+    def api_rulesets(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": f"{i:032x}",
+                "kind": "zone",
+                "name": f"ruleset-{i}",
+                "phase": RULESET_PHASES[i % len(RULESET_PHASES)],
+                "description": "",
+                "version": "1",
+                "last_updated": _TIMESTAMP,
+            }
+            for i in range(self.rulesets)
+        ]
@@ -1,22 +1,31 @@
-from external_resources_io.input import parse_model, read_input_from_file
-from external_resources_io.terraform import (
-    create_backend_tf_file,
-    create_tf_vars_json,
-)
+from pathlib import Path
 
-from .app_interface_input import AppInterfaceInput
+from .generate import GenerateConfig, generate_tf_config
+from .inputs import get_ai_input
+from .metrics import run_metrics, write_run_report
+from .plan_targets import AppliedInputs, PlanTargetsConfig
+from .profiling import profiled
 
 
-def get_ai_input() -> AppInterfaceInput:
-    """Get the AppInterfaceInput from the input file."""
-    return parse_model(AppInterfaceInput, read_input_from_file())
+def main() -> None:
+    """Proper entry point for the module.
 
+    Exits with UNCHANGED_EXIT_CODE, if set, when the config was generated for
+    the same input before, so a pipeline can skip plan and apply.
+    """
+    with profiled("generate-tf-config"), run_metrics("generate-tf-config") as metrics:
+        ai_input = get_ai_input()
+        tf_config_digest = generate_tf_config(ai_input)
+    write_run_report(metrics, ai_input.provision.identifier)
+    exit_code = GenerateConfig().unchanged_exit_code
+    if not tf_config_digest.changed and exit_code:
+        raise SystemExit(exit_code)
 
-def main() -> None:
-    """Proper entry point for the module."""
-    ai_input = get_ai_input()
-    create_backend_tf_file(ai_input.provision)
-    create_tf_vars_json(ai_input.data, exclude_none=False)
+
+def mark_applied() -> None:
+    """Entry point recording the input as applied, run after a successful apply."""
+    config = PlanTargetsConfig()
+    AppliedInputs(Path(config.applied_inputs_dir)).mark_applied(get_ai_input().data)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -66,6 +66,24 @@ class CloudflareZone(BaseModel):
     rulesets: list[CloudflareRuleset] = []
 
 
+class CloudflareDNSRecordShard(BaseModel):
+    """
+    Data model for a DNS record shard, some records of a zone in a state of their own
+
+    https://registry.terraform.io/providers/cloudflare/cloudflare/latest/docs/resources/dns_record
+    """
+
+    account_id: str
+    name: str
+    dns_records: list[CloudflareDNSRecord] = []
+
+
+class DNSRecordShardInput(BaseModel):
+    """Input model for the DNS record shard module, to generate its variables"""
+
+    data: CloudflareDNSRecordShard
+
+
 class AppInterfaceInput(BaseModel):
     """Input model for AWS MSK"""
 
@@ -0,0 +1,305 @@
+"""Run generate-tf-config or import-tfstate for many zones in a process pool."""
+
+import argparse
+import contextlib
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from external_resources_io.log import setup_logging
+from external_resources_io.terraform import terraform_run
+from pydantic import ValidationError
+
+from .client import SharedTokenBucket
+from .generate import MODULE_GENERATED_FILES, generate_tf_config
+from .import_tfstate import ImportConfig, count_results, run_import
+from .inputs import get_ai_input
+from .metrics import run_metrics, timed, write_run_report
+from .shards import chdir_terraform_cmd
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Sequence
+
+    from .client import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# per-zone files, relative to the zone's working dir, overriding any
+# process-wide setting so that zones never share a file
+ZONE_FILES = {
+    "BACKEND_TF_FILE": "module/backend.tf",
+    "TF_VARS_FILE": "module/terraform.tfvars.json",
+    "OUTPUTS_FILE": "tmp/outputs.json",
+    "PLAN_FILE_JSON": "tmp/plan.json",
+    "IMPORT_JOURNAL_FILE": "tmp/import-journal.jsonl",
+    "APPLIED_INPUTS_DIR": "tmp/applied-inputs",
+    "PLAN_TARGETS_FILE": "tmp/plan-targets.json",
+    "TF_CONFIG_DIGEST_FILE": "tmp/tf-config-digest.json",
+    "RUN_REPORT_FILE": "tmp/run-report.json",
+    "METRICS_FILE": "tmp/metrics.prom",
+    "SHARDS_DIR": "shards",
+    "SHARD_MODULE_DIR": "module/shard",
+}
+
+
+class Command(StrEnum):
+    GENERATE_TF_CONFIG = "generate-tf-config"
+    IMPORT_TFSTATE = "import-tfstate"
+
+
+@dataclass(frozen=True)
+class ZoneSummary:
+    """Outcome of one zone of a batch run."""
+
+    input_file: str
+    workdir: str | None = None
+    succeeded: int = 0
+    already_present: int = 0
+    failed: int = 0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.failed == 0
+
+
+def collect_inputs(path: Path) -> list[Path]:
+    """Input files of a directory (*.json) or listed in a manifest.
+
+    A manifest lists one input file per line, relative to the manifest;
+    blank lines and lines starting with # are skipped.
+    """
+    if path.is_dir():
+        return sorted(path.glob("*.json"))
+    return [
+        path.parent / line.strip()
+        for line in path.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+# set in each pool worker by init_worker
+_bucket: TokenBucket | None = None
+
+
+def init_worker(bucket: TokenBucket | None, zone_index_dir: Path) -> None:
+    global _bucket  # ruff: ignore[global-statement]
+    _bucket = bucket
+    # zones chdir into their own working dir, but share the zone index cache
+    os.environ["ZONE_INDEX_DIR"] = str(zone_index_dir)
+    setup_logging()
+
+
+def prepare_workdir(workdir: Path, module_dir: Path) -> None:
+    """Give a zone its own copy of the terraform module."""
+    shutil.copytree(
+        module_dir,
+        workdir / "module",
+        ignore=shutil.ignore_patterns(*MODULE_GENERATED_FILES),
+        dirs_exist_ok=True,
+    )
+    (workdir / "tmp").mkdir(exist_ok=True)
+
+
+@contextlib.contextmanager
+def zone_environ(input_file: Path, workdir: Path) -> Generator[None]:
+    """Point terraform and the files at the zone, restoring the environment after."""
+    saved = dict(os.environ)
+    os.environ.update(
+        ZONE_FILES,
+        INPUT_FILE=str(input_file),
+        TERRAFORM_CMD=chdir_terraform_cmd(workdir / "module"),
+    )
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def _run_zone(
+    command: Command, input_file: Path, workdir_root: Path, module_dir: Path
+) -> ZoneSummary:
+    with run_metrics(command) as metrics:
+        ai_input = get_ai_input(input_file)
+        workdir = workdir_root / ai_input.provision.identifier
+        prepare_workdir(workdir, module_dir)
+        with zone_environ(input_file, workdir), contextlib.chdir(workdir):
+            generate_tf_config(ai_input)
+            if command == Command.GENERATE_TF_CONFIG:
+                write_run_report(metrics, ai_input.provision.identifier)
+                return ZoneSummary(input_file=str(input_file), workdir=str(workdir))
+            config = ImportConfig()
+            with timed("terraform_init"):
+                terraform_run(["init", "-input=false"], dry_run=config.dry_run)
+            results = run_import(ai_input, config, _bucket)
+            write_run_report(metrics, ai_input.provision.identifier, results)
+    succeeded, already_present, failed = count_results(results)
+    return ZoneSummary(
+        input_file=str(input_file),
+        workdir=str(workdir),
+        succeeded=succeeded,
+        already_present=already_present,
+        failed=failed,
+    )
+
+
+def run_zone(
+    command: Command, input_file: Path, workdir_root: Path, module_dir: Path
+) -> ZoneSummary:
+    """Run the command for one zone in its own working dir.
+
+    Never raises; an error is reported in the summary instead.
+    """
+    try:
+        return _run_zone(command, input_file, workdir_root, module_dir)
+    except Exception as e:
+        logger.exception("Failed to run %s for %s", command, input_file)
+        return ZoneSummary(input_file=str(input_file), error=str(e))
+
+
+def check_identifiers(input_files: list[Path]) -> None:
+    """Make sure no two inputs share the identifier their workdir is named by.
+
+    An input that cannot be read is left to fail in its own zone run.
+
+    Raises:
+        ValueError: If any do.
+    """
+    inputs_by_identifier: dict[str, list[Path]] = {}
+    for input_file in input_files:
+        try:
+            identifier = get_ai_input(input_file).provision.identifier
+        except OSError, ValidationError:
+            continue
+        inputs_by_identifier.setdefault(identifier, []).append(input_file)
+    duplicates = {
+        identifier: inputs
+        for identifier, inputs in inputs_by_identifier.items()
+        if len(inputs) > 1
+    }
+    if duplicates:
+        raise ValueError(
+            "Inputs sharing a provision identifier: "
+            + "; ".join(
+                f"{identifier}: {', '.join(map(str, inputs))}"
+                for identifier, inputs in sorted(duplicates.items())
+            )
+        )
+
+
+def run_batch(
+    command: Command,
+    input_files: list[Path],
+    *,
+    workdir_root: Path,
+    module_dir: Path,
+    jobs: int,
+) -> list[ZoneSummary]:
+    """Run the command for every input in a pool of jobs processes.
+
+    All processes draw from one rate limit shared in memory and resolve zone
+    IDs from one zone index cache.
+
+    Raises:
+        ValueError: If two inputs share a provision identifier, and so would
+            share a working dir.
+    """
+    check_identifiers(input_files)
+    config = ImportConfig()
+    settings = config.client_settings()
+    bucket = SharedTokenBucket(settings.rate, settings.burst)
+    workdir_root.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(bucket, Path(config.zone_index_dir).resolve()),
+    ) as pool:
+        futures = [
+            pool.submit(
+                run_zone,
+                command,
+                input_file.resolve(),
+                workdir_root.resolve(),
+                module_dir.resolve(),
+            )
+            for input_file in input_files
+        ]
+        return [future.result() for future in futures]
+
+
+def log_summary(summaries: list[ZoneSummary]) -> None:
+    for summary in summaries:
+        if summary.error is not None:
+            logger.error("%s: error: %s", summary.input_file, summary.error)
+        else:
+            logger.info(
+                "%s: %d succeeded, %d already present, %d failed",
+                summary.input_file,
+                summary.succeeded,
+                summary.already_present,
+                summary.failed,
+            )
+    failed = [summary for summary in summaries if not summary.ok]
+    logger.info(
+        "Batch complete: %d zones, %d ok, %d failed",
+        len(summaries),
+        len(summaries) - len(failed),
+        len(failed),
+    )
+    for summary in failed:
+        logger.error("Failed zone: %s", summary.input_file)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="batch-run",
+        description="Run generate-tf-config or import-tfstate for many zones.",
+    )
+    parser.add_argument("command", type=Command, choices=list(Command))
+    parser.add_argument(
+        "inputs",
+        type=Path,
+        help="directory of input JSON files or manifest listing them",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="zones at once"
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path("tmp/zones"),
+        help="root of the per-zone working dirs",
+    )
+    parser.add_argument(
+        "--module-dir",
+        type=Path,
+        default=Path(os.environ.get("TERRAFORM_MODULE_SRC_DIR", "module")),
+        help="terraform module copied into every zone's working dir",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Main entry point for batch-run CLI."""
+    setup_logging()
+    args = parse_args(argv)
+    summaries = run_batch(
+        args.command,
+        collect_inputs(args.inputs),
+        workdir_root=args.workdir,
+        module_dir=args.module_dir,
+        jobs=args.jobs,
+    )
+    log_summary(summaries)
+    if any(not summary.ok for summary in summaries):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,132 @@
+"""Incremental parser for BIND zone files, as returned by the DNS zone export."""
+
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+_WORD_RE = re.compile(r'"(?:\\.|[^"\\])*"|[()]|;|[^\s;()"]+')
+_TTL_RE = re.compile(r"(?:\d+[wdhms]?)+", re.IGNORECASE)
+_TTL_PART_RE = re.compile(r"(\d+)([wdhms]?)", re.IGNORECASE)
+_TTL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_CLASSES = frozenset({"IN", "CH", "HS", "CS"})
+
+
+class BindRecord(NamedTuple):
+    """A resource record of a zone file, with an absolute owner name."""
+
+    name: str
+    ttl: int | None
+    type: str
+    rdata: str
+
+
+def split_words(line: str) -> Iterator[str]:
+    """Split a zone file line into words, dropping its comment.
+
+    Quoted strings are kept whole, quotes included; parentheses are words of
+    their own.
+    """
+    for word in _WORD_RE.findall(line):
+        if word == ";":
+            return
+        yield word
+
+
+def parse_ttl(value: str) -> int:
+    """Parse a TTL in seconds, with optional BIND units, e.g. 1h30m."""
+    return sum(
+        int(amount) * _TTL_UNITS[unit.lower()]
+        for amount, unit in _TTL_PART_RE.findall(value)
+    )
+
+
+class ZoneParser:
+    """Zone file parser fed one line at a time.
+
+    Only the entry being read is buffered, so memory does not grow with the
+    zone size. Names are made absolute and returned without the trailing dot.
+    """
+
+    def __init__(self, origin: str = "") -> None:
+        self.origin = origin.rstrip(".")
+        self.default_ttl: int | None = None
+        self.last_name: str | None = None
+        self._pending: list[str] = []
+        self._depth = 0
+        self._inherit_owner = False
+
+    def absolute_name(self, name: str) -> str:
+        if name == "@":
+            return self.origin
+        if name.endswith("."):
+            return name[:-1]
+        return f"{name}.{self.origin}" if self.origin else name
+
+    def feed(self, line: str) -> BindRecord | None:
+        """Parse the next line, returning the record it completes if any.
+
+        Raises:
+            ValueError: If the line completes a malformed entry.
+        """
+        if not self._pending:
+            # an entry starting with blank space belongs to the previous owner
+            self._inherit_owner = line[:1].isspace()
+        for word in split_words(line):
+            if word == "(":
+                self._depth += 1
+            elif word == ")":
+                self._depth -= 1
+            else:
+                self._pending.append(word)
+        if self._depth > 0 or not self._pending:
+            return None
+        entry, self._pending = self._pending, []
+        if entry[0].startswith("$"):
+            self._directive(entry)
+            return None
+        return self._record(entry)
+
+    def _directive(self, entry: list[str]) -> None:
+        match entry:
+            case ["$ORIGIN", origin, *_]:
+                self.origin = self.absolute_name(origin)
+            case ["$TTL", ttl, *_]:
+                self.default_ttl = parse_ttl(ttl)
+            # other directives, e.g. $INCLUDE, never appear in an export
+
+    def _record(self, entry: list[str]) -> BindRecord:
+        if not self._inherit_owner:
+            self.last_name = self.absolute_name(entry[0])
+            entry = entry[1:]
+        if self.last_name is None:
+            msg = f"Zone file record without owner name: {' '.join(entry)}"
+            raise ValueError(msg)
+        ttl = self.default_ttl
+        # TTL and class are both optional and may come in either order
+        while len(entry) > 1:
+            if entry[0].upper() in _CLASSES:
+                entry = entry[1:]
+            elif _TTL_RE.fullmatch(entry[0]):
+                ttl = parse_ttl(entry[0])
+                entry = entry[1:]
+            else:
+                break
+        if len(entry) < 2:  # ruff: ignore[magic-value-comparison]
+            msg = f"Zone file record without type or data: {' '.join(entry)}"
+            raise ValueError(msg)
+        return BindRecord(
+            name=self.last_name,
+            ttl=ttl,
+            type=entry[0].upper(),
+            rdata=" ".join(entry[1:]),
+        )
+
+
+def parse_zone(lines: Iterable[str], origin: str = "") -> Iterator[BindRecord]:
+    """Parse the records of a zone file lazily, line by line."""
+    parser = ZoneParser(origin)
+    for line in lines:
+        if (record := parser.feed(line)) is not None:
+            yield record
@@ -0,0 +1,214 @@
+"""Cloudflare API clients sharing a rate limit and a connection pool.
+
+The Cloudflare SDK and httpx take a good share of the startup time, so they
+are only imported once the first client is created.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
+    from cloudflare import AsyncCloudflare, Cloudflare
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """Rate limit, retry and connection pool settings of the API clients.
+
+    The default rate spreads Cloudflare's budget of 1200 requests per
+    5 minutes evenly; lower it when several runs share an account.
+    """
+
+    rate: float = 4.0
+    burst: int = 10
+    max_retries: int = 5
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    max_connections: int = 16
+    http2: bool = True
+
+
+class TokenBucket:
+    """Thread-safe token bucket handing out one token per API request.
+
+    Tokens are reserved ahead: a caller takes its token right away and waits
+    for it outside the lock, so concurrent callers queue up fairly.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token, returning the seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next seconds, e.g. after a 429."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def acquire(self) -> None:
+        time.sleep(self.reserve())
+
+    async def async_acquire(self) -> None:
+        await asyncio.sleep(self.reserve())
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket shared by several processes, e.g. those of a pool.
+
+    The bucket state lives in shared memory; hand the bucket to the pool
+    workers on creation (initargs) for them to draw from one budget.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._state = multiprocessing.Array("d", [capacity, clock()])
+        super().__init__(rate, capacity, clock)
+        self._lock = self._state.get_lock()  # type: ignore[assignment]
+
+    @property
+    def _tokens(self) -> float:
+        return self._state[0]
+
+    @_tokens.setter
+    def _tokens(self, value: float) -> None:
+        self._state[0] = value
+
+    @property
+    def _updated(self) -> float:
+        return self._state[1]
+
+    @_updated.setter
+    def _updated(self, value: float) -> None:
+        self._state[1] = value
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait according to the Retry-After header, if any."""
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except ValueError:
+        return None
+
+
+def retry_delay(
+    response: httpx.Response, attempt: int, settings: ClientSettings
+) -> float:
+    """Delay before retrying a rate limited request.
+
+    Retry-After is honored when given, otherwise the delay backs off
+    exponentially. Jitter keeps parallel runs from retrying in lockstep.
+    """
+    backoff = min(settings.max_backoff, settings.backoff * 2**attempt)
+    jitter = random.uniform(0, backoff)  # ruff: ignore[suspicious-non-cryptographic-random-usage]
+    delay = retry_after(response)
+    return jitter if delay is None else delay + jitter / 2
+
+
+def rate_limited(
+    response: httpx.Response, attempt: int, settings: ClientSettings
+) -> bool:
+    return (
+        response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        and attempt < settings.max_retries
+    )
+
+
+def token_bucket(settings: ClientSettings) -> TokenBucket:
+    return TokenBucket(settings.rate, settings.burst)
+
+
+def cloudflare_client(
+    settings: ClientSettings | None = None, bucket: TokenBucket | None = None
+) -> Cloudflare:
+    """Cloudflare client whose every API call goes through the rate limit.
+
+    Pass the same bucket to several clients to share one budget between them.
+    429 responses are retried by the transport only; the SDK's own retries
+    are off, they would retry a 429 the transport gave up on several times
+    over.
+    """
+    from cloudflare import Cloudflare, DefaultHttpxClient  # ruff: ignore[import-outside-top-level]
+
+    from .transport import rate_limited_transport  # ruff: ignore[import-outside-top-level]
+
+    settings = settings or ClientSettings()
+    return Cloudflare(
+        max_retries=0,
+        http_client=DefaultHttpxClient(
+            transport=rate_limited_transport(settings, bucket or token_bucket(settings))
+        ),
+    )
+
+
+def async_cloudflare_client(
+    settings: ClientSettings | None = None, bucket: TokenBucket | None = None
+) -> AsyncCloudflare:
+    """AsyncCloudflare client whose every API call goes through the rate limit.
+
+    Like cloudflare_client, 429 responses are retried by the transport only.
+    """
+    from cloudflare import (  # ruff: ignore[import-outside-top-level]
+        AsyncCloudflare,
+        DefaultAsyncHttpxClient,
+    )
+
+    from .transport import (  # ruff: ignore[import-outside-top-level]
+        async_rate_limited_transport,
+    )
+
+    settings = settings or ClientSettings()
+    return AsyncCloudflare(
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(
+            transport=async_rate_limited_transport(
+                settings, bucket or token_bucket(settings)
+            )
+        ),
+    )
@@ -0,0 +1,590 @@
+"""Discover the live Cloudflare objects a zone configuration refers to."""
+
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from enum import StrEnum
+from math import ceil
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from .bind import BindRecord, ZoneParser
+from .client import async_cloudflare_client
+from .dns_index import DNSRecordIndex, DNSRecordKey, canonical_name, content_key
+from .metrics import timed
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from cloudflare import AsyncCloudflare, Cloudflare
+
+    from .app_interface_input import CloudflareDNSRecord, CloudflareZone
+    from .client import ClientSettings, TokenBucket
+    from .zone_index import ZoneIndex
+
+logger = logging.getLogger(__name__)
+
+RulesetKey = tuple[str, str]
+
+
+# smallest page size the DNS records API accepts
+MIN_PER_PAGE = 5
+
+
+class DNSLookup(StrEnum):
+    AUTO = "auto"
+    FULL = "full"
+    FILTERED = "filtered"
+    EXPORT = "export"
+
+
+class ZoneNotFoundError(Exception):
+    """Raised when a zone cannot be found in Cloudflare."""
+
+
+class LeanDNSRecord(NamedTuple):
+    """The fields of a listed DNS record the import and drift check need."""
+
+    id: str
+    name: str
+    type: str
+    content: str | None
+    data: dict[str, Any] | None
+    ttl: int | None = None
+    priority: int | None = None
+    proxied: bool | None = None
+
+
+@dataclass(frozen=True)
+class Discovery:
+    """Live zone ID and lookup indexes of the zone's DNS records and rulesets.
+
+    An index is None when listing the objects failed.
+    """
+
+    zone_id: str
+    dns_record_by_key: DNSRecordIndex | None
+    ruleset_by_key: dict[RulesetKey, Any] | None
+
+
+def dns_record_index(records: Iterable[Any]) -> DNSRecordIndex:
+    """Index listed DNS records by canonical name, type and content or data."""
+    return DNSRecordIndex(records)
+
+
+def ruleset_index(rulesets: Iterable[Any]) -> dict[RulesetKey, Any]:
+    """Index listed rulesets by name and phase."""
+    return {(ruleset.name, str(ruleset.phase)): ruleset for ruleset in rulesets}
+
+
+def exported_record_key(record: BindRecord) -> DNSRecordKey:
+    """Index key of an exported record, its data shaped like the API content."""
+    match record.type, record.rdata.split(" "):
+        case "MX", [_, exchange]:
+            # the API has the preference in a field of its own
+            content = exchange
+        case _:
+            content = record.rdata
+    return content_key(record.name, record.type, content)
+
+
+def zone_not_found(zone_name: str) -> ZoneNotFoundError:
+    msg = f"Zone '{zone_name}' not found in Cloudflare"
+    logger.error(msg)
+    return ZoneNotFoundError(msg)
+
+
+@timed("lookup_zone_id")
+def lookup_zone_id(client: Cloudflare, zone_name: str, account_id: str) -> str | None:
+    """Look up the zone ID by zone name.
+
+    Args:
+        client: Cloudflare API client.
+        zone_name: The domain name (e.g., "openshift.io").
+        account_id: The account owning the zone.
+
+    Returns:
+        The zone ID if found, None otherwise.
+    """
+    zones = client.zones.list(name=zone_name, account={"id": account_id})
+    for zone in zones:
+        if zone.name == zone_name:
+            return zone.id
+    return None
+
+
+@timed("resolve_zone_id")
+def resolve_zone_id(
+    client: Cloudflare, zone: CloudflareZone, zone_index: ZoneIndex | None = None
+) -> str:
+    """The zone's ID, from the zone index if given.
+
+    Raises:
+        ZoneNotFoundError: If the zone is not found in its account.
+    """
+    logger.info("Looking up zone ID for '%s'", zone.name)
+    zone_id = (
+        zone_index.lookup(client, zone.account_id, zone.name)
+        if zone_index is not None
+        else lookup_zone_id(client, zone.name, zone.account_id)
+    )
+    if zone_id is None:
+        raise zone_not_found(zone.name)
+    logger.info("Found zone ID: %s", zone_id)
+    return zone_id
+
+
+@timed("count_dns_records")
+def count_dns_records(client: Cloudflare, zone_id: str) -> int | None:
+    """Total number of DNS records in the zone, from a single minimal page."""
+    page = client.dns.records.list(zone_id=zone_id, per_page=MIN_PER_PAGE)
+    total_count = getattr(getattr(page, "result_info", None), "total_count", None)
+    return None if total_count is None else int(total_count)
+
+
+def lean_dns_record(record: dict[str, Any]) -> LeanDNSRecord:
+    """Pick the lean fields off a raw DNS record, interning the repeated ones."""
+    return LeanDNSRecord(
+        id=record["id"],
+        name=sys.intern(record["name"]),
+        type=sys.intern(record["type"]),
+        content=record.get("content"),
+        data=record.get("data"),
+        ttl=record.get("ttl"),
+        priority=record.get("priority"),
+        proxied=record.get("proxied"),
+    )
+
+
+def list_dns_records_lean(
+    client: Cloudflare, zone_id: str, *, per_page: int = 1000
+) -> Iterator[LeanDNSRecord]:
+    """List the DNS records of a zone straight from the raw JSON pages.
+
+    No SDK model is built; each page is decoded and reduced to LeanDNSRecords
+    before the next one is requested.
+    """
+    page = 1
+    while True:
+        response = client.dns.records.with_raw_response.list(
+            zone_id=zone_id, per_page=per_page, page=page
+        )
+        body = cast("dict[str, Any]", response.json())
+        result = body["result"]
+        yield from map(lean_dns_record, result)
+        total_pages = (body.get("result_info") or {}).get("total_pages")
+        if len(result) < per_page if total_pages is None else page >= total_pages:
+            return
+        page += 1
+
+
+@timed("list_dns_records")
+def list_dns_record_index(
+    client: Cloudflare, zone_id: str, *, lean: bool = False
+) -> DNSRecordIndex | None:
+    """List and index all DNS records of a zone, None on failure.
+
+    With lean, the index holds LeanDNSRecords instead of SDK models.
+    """
+    try:
+        return dns_record_index(
+            list_dns_records_lean(client, zone_id)
+            if lean
+            else client.dns.records.list(zone_id=zone_id)
+        )
+    except Exception:
+        logger.exception("Failed to list DNS records for zone ID %s", zone_id)
+        return None
+
+
+@timed("list_rulesets")
+def list_ruleset_index(
+    client: Cloudflare, zone_id: str
+) -> dict[RulesetKey, Any] | None:
+    """List and index all rulesets of a zone, None on failure."""
+    try:
+        return ruleset_index(client.rulesets.list(zone_id=zone_id))
+    except Exception:
+        logger.exception("Failed to list rulesets for zone ID %s", zone_id)
+        return None
+
+
+def discover(
+    client: Cloudflare,
+    zone: CloudflareZone,
+    *,
+    lean: bool = False,
+    zone_index: ZoneIndex | None = None,
+    zone_id: str | None = None,
+) -> Discovery:
+    """Discover the zone one API call after the other.
+
+    Objects are only listed if the zone configuration has any of them. With
+    lean, DNS records are listed without their SDK models, see
+    list_dns_records_lean. With a zone index, the zone ID is resolved from
+    it instead of looking up the zone by name, unless it is given already.
+    """
+    zone_id = zone_id or resolve_zone_id(client, zone, zone_index)
+    return Discovery(
+        zone_id=zone_id,
+        dns_record_by_key=(
+            list_dns_record_index(client, zone_id, lean=lean)
+            if zone.dns_records
+            else DNSRecordIndex()
+        ),
+        ruleset_by_key=list_ruleset_index(client, zone_id) if zone.rulesets else {},
+    )
+
+
+async def async_lookup_zone_id(
+    client: AsyncCloudflare, zone_name: str, account_id: str
+) -> str | None:
+    """Look up the zone ID by zone name with the async client."""
+    async for zone in client.zones.list(name=zone_name, account={"id": account_id}):
+        if zone.name == zone_name:
+            return zone.id
+    return None
+
+
+async def async_list_dns_records(
+    client: AsyncCloudflare,
+    zone_id: str,
+    *,
+    per_page: int,
+    semaphore: asyncio.Semaphore,
+    **filters: Any,  # ruff: ignore[any-type]
+) -> tuple[list[Any], int]:
+    """List the DNS records of a zone, prefetching pages concurrently.
+
+    The first page tells the total page count; all remaining pages are then
+    requested at once, bounded by the semaphore.
+
+    Returns:
+        The listed records and the number of API calls made.
+    """
+
+    async def fetch_page(page: int) -> Any:  # ruff: ignore[any-type]
+        async with semaphore:
+            return await client.dns.records.list(
+                zone_id=zone_id, per_page=per_page, page=page, **filters
+            )
+
+    first_page = await fetch_page(1)
+    records = list(first_page.result)
+    total_pages = getattr(first_page.result_info, "total_pages", None)
+    if total_pages is None:
+        # no page count to prefetch with, walk the pages until a short one
+        calls = 1
+        last_page = first_page
+        while len(last_page.result) >= per_page:
+            calls += 1
+            last_page = await fetch_page(calls)
+            records.extend(last_page.result)
+        return records, calls
+
+    for page in await asyncio.gather(
+        *(fetch_page(page) for page in range(2, int(total_pages) + 1))
+    ):
+        records.extend(page.result)
+    return records, max(int(total_pages), 1)
+
+
+async def async_count_dns_records(client: AsyncCloudflare, zone_id: str) -> int | None:
+    """Total number of DNS records in the zone, from a single minimal page."""
+    page = await client.dns.records.list(zone_id=zone_id, per_page=MIN_PER_PAGE)
+    total_count = getattr(page.result_info, "total_count", None)
+    return None if total_count is None else int(total_count)
+
+
+async def async_list_dns_records_filtered(
+    client: AsyncCloudflare,
+    zone_id: str,
+    records: list[CloudflareDNSRecord],
+    *,
+    per_page: int,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[Any], int]:
+    """List only the DNS records matching the configured names and types.
+
+    Returns:
+        The listed records and the number of API calls made.
+    """
+    pages = await asyncio.gather(
+        *(
+            async_list_dns_records(
+                client,
+                zone_id,
+                per_page=per_page,
+                semaphore=semaphore,
+                name={"exact": name},
+                type=type_,
+            )
+            for name, type_ in sorted({(r.name, r.type) for r in records})
+        )
+    )
+    return (
+        [record for listed, _ in pages for record in listed],
+        sum(calls for _, calls in pages),
+    )
+
+
+def cheaper_dns_lookup(
+    records: list[CloudflareDNSRecord], total_count: int | None, *, per_page: int
+) -> DNSLookup:
+    """Filtered queries need one call per name and type, a full scan one per page."""
+    filtered_calls = len({(r.name, r.type) for r in records})
+    full_calls = None if total_count is None else max(ceil(total_count / per_page), 1)
+    lookup = (
+        DNSLookup.FILTERED
+        if full_calls is not None and filtered_calls < full_calls
+        else DNSLookup.FULL
+    )
+    logger.info(
+        "DNS record lookup: %s, %d name/type pairs to look up, "
+        "%s records in zone (%s pages)",
+        lookup,
+        filtered_calls,
+        total_count,
+        full_calls,
+    )
+    return lookup
+
+
+async def async_choose_dns_lookup(
+    client: AsyncCloudflare, zone: CloudflareZone, zone_id: str, *, per_page: int
+) -> DNSLookup:
+    """Pick the DNS record lookup taking fewer API calls.
+
+    The zone's record count is fetched with one minimal call.
+    """
+    total_count = await async_count_dns_records(client, zone_id)
+    return cheaper_dns_lookup(zone.dns_records, total_count, per_page=per_page)
+
+
+async def async_export_dns_record_keys(
+    client: AsyncCloudflare, zone_id: str, *, semaphore: asyncio.Semaphore
+) -> set[DNSRecordKey]:
+    """Stream the zone's BIND export into the set of its record keys.
+
+    The export is parsed line by line as it arrives; only the keys are kept.
+    """
+    parser = ZoneParser()
+    keys: set[DNSRecordKey] = set()
+    async with (
+        semaphore,
+        client.dns.records.with_streaming_response.export(zone_id=zone_id) as response,
+    ):
+        async for line in response.iter_lines():
+            if (record := parser.feed(line)) is not None:
+                keys.add(exported_record_key(record))
+    return keys
+
+
+async def async_list_dns_records_exported(
+    client: AsyncCloudflare,
+    zone: CloudflareZone,
+    zone_id: str,
+    *,
+    per_page: int,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[Any], int]:
+    """List the configured DNS records found in the zone export.
+
+    The export has no record IDs, but tells in one call which configured
+    records exist and how large the zone is. Only the existing records are
+    then listed for their IDs, with the cheaper of filtered queries and a
+    full scan.
+
+    Returns:
+        The listed records and the number of API calls made.
+    """
+    exported = await async_export_dns_record_keys(client, zone_id, semaphore=semaphore)
+    exported_pairs = {(name, type_) for name, type_, _ in exported}
+    present = [
+        r
+        for r in zone.dns_records
+        if (canonical_name(r.name), r.type.upper()) in exported_pairs
+    ]
+    if not present:
+        return [], 1
+    records, calls = await (
+        async_list_dns_records_filtered(
+            client, zone_id, present, per_page=per_page, semaphore=semaphore
+        )
+        if cheaper_dns_lookup(present, len(exported), per_page=per_page)
+        == DNSLookup.FILTERED
+        else async_list_dns_records(
+            client, zone_id, per_page=per_page, semaphore=semaphore
+        )
+    )
+    return records, calls + 1
+
+
+async def _async_list_dns_records(
+    client: AsyncCloudflare,
+    zone: CloudflareZone,
+    zone_id: str,
+    *,
+    per_page: int,
+    semaphore: asyncio.Semaphore,
+    lookup: DNSLookup,
+) -> tuple[list[Any], int]:
+    match lookup:
+        case DNSLookup.FILTERED:
+            return await async_list_dns_records_filtered(
+                client,
+                zone_id,
+                zone.dns_records,
+                per_page=per_page,
+                semaphore=semaphore,
+            )
+        case DNSLookup.EXPORT:
+            return await async_list_dns_records_exported(
+                client, zone, zone_id, per_page=per_page, semaphore=semaphore
+            )
+    return await async_list_dns_records(
+        client, zone_id, per_page=per_page, semaphore=semaphore
+    )
+
+
+async def async_list_dns_record_index(
+    client: AsyncCloudflare,
+    zone: CloudflareZone,
+    zone_id: str,
+    *,
+    per_page: int,
+    semaphore: asyncio.Semaphore,
+    lookup: DNSLookup = DNSLookup.AUTO,
+) -> DNSRecordIndex | None:
+    """List and index the DNS records of a zone, None on failure.
+
+    The AUTO lookup decides between filtered queries and a full scan of the
+    zone, see async_choose_dns_lookup. The EXPORT lookup finds the configured
+    records in the zone export first, see async_list_dns_records_exported.
+    """
+    try:
+        with timed("list_dns_records"):
+            if lookup == DNSLookup.AUTO:
+                lookup = await async_choose_dns_lookup(
+                    client, zone, zone_id, per_page=per_page
+                )
+            records, calls = await _async_list_dns_records(
+                client,
+                zone,
+                zone_id,
+                per_page=per_page,
+                semaphore=semaphore,
+                lookup=lookup,
+            )
+    except Exception:
+        logger.exception("Failed to list DNS records for zone ID %s", zone_id)
+        return None
+    logger.info(
+        "Listed %d DNS records with %d API calls (%s lookup)",
+        len(records),
+        calls,
+        lookup,
+    )
+    return dns_record_index(records)
+
+
+async def async_list_ruleset_index(
+    client: AsyncCloudflare, zone_id: str, *, semaphore: asyncio.Semaphore
+) -> dict[RulesetKey, Any] | None:
+    """List and index all rulesets of a zone, None on failure.
+
+    Rulesets are cursor paginated, so their pages cannot be prefetched.
+    """
+    try:
+        with timed("list_rulesets"):
+            async with semaphore:
+                return ruleset_index([
+                    ruleset async for ruleset in client.rulesets.list(zone_id=zone_id)
+                ])
+    except Exception:
+        logger.exception("Failed to list rulesets for zone ID %s", zone_id)
+        return None
+
+
+async def async_discover(
+    client: AsyncCloudflare,
+    zone: CloudflareZone,
+    *,
+    concurrency: int = 8,
+    per_page: int = 1000,
+    dns_lookup: DNSLookup = DNSLookup.AUTO,
+    zone_index: ZoneIndex | None = None,
+    zone_id: str | None = None,
+) -> Discovery:
+    """Discover the zone, listing DNS records and rulesets concurrently.
+
+    The zone ID is looked up unless given.
+    """
+    if zone_id is None:
+        logger.info("Looking up zone ID for '%s'", zone.name)
+        with timed("resolve_zone_id"):
+            zone_id = (
+                await zone_index.async_lookup(client, zone.account_id, zone.name)
+                if zone_index is not None
+                else await async_lookup_zone_id(client, zone.name, zone.account_id)
+            )
+        if zone_id is None:
+            raise zone_not_found(zone.name)
+        logger.info("Found zone ID: %s", zone_id)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with asyncio.TaskGroup() as tg:
+        dns_records = (
+            tg.create_task(
+                async_list_dns_record_index(
+                    client,
+                    zone,
+                    zone_id,
+                    per_page=per_page,
+                    semaphore=semaphore,
+                    lookup=dns_lookup,
+                )
+            )
+            if zone.dns_records
+            else None
+        )
+        rulesets = (
+            tg.create_task(
+                async_list_ruleset_index(client, zone_id, semaphore=semaphore)
+            )
+            if zone.rulesets
+            else None
+        )
+    return Discovery(
+        zone_id=zone_id,
+        dns_record_by_key=dns_records.result() if dns_records else DNSRecordIndex(),
+        ruleset_by_key=rulesets.result() if rulesets else {},
+    )
+
+
+def discover_concurrently(
+    zone: CloudflareZone,
+    *,
+    concurrency: int = 8,
+    per_page: int = 1000,
+    dns_lookup: DNSLookup = DNSLookup.AUTO,
+    client_settings: ClientSettings | None = None,
+    bucket: TokenBucket | None = None,
+    zone_index: ZoneIndex | None = None,
+    zone_id: str | None = None,
+) -> Discovery:
+    """Run the async discovery with its own rate limited AsyncCloudflare client."""
+
+    async def run() -> Discovery:
+        async with async_cloudflare_client(client_settings, bucket) as client:
+            return await async_discover(
+                client,
+                zone,
+                concurrency=concurrency,
+                per_page=per_page,
+                dns_lookup=dns_lookup,
+                zone_index=zone_index,
+                zone_id=zone_id,
+            )
+
+    return asyncio.run(run())
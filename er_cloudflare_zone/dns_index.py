@@ -0,0 +1,121 @@
+"""Lookup index of live DNS records on canonical keys."""
+
+import hashlib
+import ipaddress
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from .app_interface_input import CloudflareDNSRecord
+
+DNSRecordKey = tuple[str, str, str]
+
+_HOSTNAME_TYPES = frozenset({"CNAME", "DNAME", "MX", "NS", "PTR"})
+_TXT_CHUNK_RE = re.compile(r'"((?:\\.|[^"\\])*)"')
+_ESCAPE_RE = re.compile(r"\\(.)")
+
+
+def canonical_name(name: str) -> str:
+    """DNS names compare case-insensitively and without the trailing dot."""
+    return name.rstrip(".").lower()
+
+
+def _canonical_txt(content: str) -> str:
+    # quoted character-strings are joined, unquoted content is taken as is
+    chunks = _TXT_CHUNK_RE.findall(content)
+    if not chunks or _TXT_CHUNK_RE.sub("", content).strip():
+        return content
+    return "".join(_ESCAPE_RE.sub(r"\1", chunk) for chunk in chunks)
+
+
+def canonical_content(type_: str, content: str) -> str:
+    """Normalize the formatting of a record's content for its type."""
+    content = content.strip()
+    match type_:
+        case "A" | "AAAA":
+            try:
+                return ipaddress.ip_address(content).compressed
+            except ValueError:
+                return content
+        case "TXT" | "SPF":
+            return _canonical_txt(content)
+        case _ if type_ in _HOSTNAME_TYPES:
+            return canonical_name(content)
+    return content
+
+
+def _canonical_data(value: Any) -> Any:  # ruff: ignore[any-type]
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json")
+    match value:
+        case dict():
+            return {k: _canonical_data(v) for k, v in value.items() if v is not None}
+        case list():
+            return [_canonical_data(v) for v in value]
+        case float() if value.is_integer():
+            return int(value)
+    return value
+
+
+def data_hash(data: Any) -> str:  # ruff: ignore[any-type]
+    """Hash of a record's data, independent of key order, nulls and 1 vs 1.0."""
+    canonical = json.dumps(_canonical_data(data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def content_key(name: str, type_: str, content: str) -> DNSRecordKey:
+    type_ = type_.upper()
+    return canonical_name(name), type_, canonical_content(type_, content)
+
+
+def data_key(name: str, type_: str, data: Any) -> DNSRecordKey:  # ruff: ignore[any-type]
+    return canonical_name(name), type_.upper(), data_hash(data)
+
+
+class DNSRecordIndex:
+    """Live DNS records indexed by canonical content and by data.
+
+    A record is indexed under its content key and, if it has data, under the
+    hash of its data as well; records sharing a key are all kept, so that an
+    ambiguous lookup can be told apart from a unique one.
+    """
+
+    def __init__(self, records: Iterable[Any] = ()) -> None:
+        self._records: list[Any] = []
+        self._by_content: dict[DNSRecordKey, list[Any]] = {}
+        self._by_data: dict[DNSRecordKey, list[Any]] = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any) -> None:  # ruff: ignore[any-type]
+        self._records.append(record)
+        type_ = str(record.type)
+        if record.content is not None:
+            key = content_key(record.name, type_, record.content)
+            self._by_content.setdefault(key, []).append(record)
+        if (data := getattr(record, "data", None)) is not None:
+            key = data_key(record.name, type_, data)
+            self._by_data.setdefault(key, []).append(record)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._records)
+
+    def lookup(self, record: CloudflareDNSRecord) -> list[Any]:
+        """All live records matching a configured record.
+
+        Records with content are matched on it, records with only data on the
+        data hash.
+        """
+        if record.content is not None:
+            key = content_key(record.name, record.type, record.content)
+            return list(self._by_content.get(key, []))
+        if record.data is not None:
+            key = data_key(record.name, record.type, record.data)
+            return list(self._by_data.get(key, []))
+        return []
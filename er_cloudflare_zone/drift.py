@@ -0,0 +1,381 @@
+"""Terraform-free drift check of a zone configuration against live Cloudflare."""
+
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from external_resources_io.log import setup_logging
+from pydantic import BaseModel, Field, computed_field
+
+from .client import cloudflare_client
+from .discovery import list_dns_records_lean, resolve_zone_id
+from .dns_index import DNSRecordIndex, canonical_content, canonical_name
+from .import_tfstate import ImportConfig
+from .inputs import get_ai_input
+from .plan_targets import AppliedInputs, PlanTargetsConfig
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from cloudflare import Cloudflare
+
+    from .app_interface_input import (
+        CloudflareDNSRecord,
+        CloudflareRuleset,
+        CloudflareZone,
+    )
+    from .zone_index import ZoneIndex
+
+logger = logging.getLogger(__name__)
+
+# like terraform plan -detailed-exitcode: 0 no drift, 1 error, 2 drift
+EXIT_DRIFT = 2
+
+_DNS_RECORD_FIELDS = ("ttl", "priority", "proxied")
+
+
+class DriftConfig(ImportConfig):
+    """Environment variables for drift-check."""
+
+    drift_changeset_file: str = Field(
+        "tmp/changeset.json", alias="DRIFT_CHANGESET_FILE"
+    )
+
+
+class FieldChange(BaseModel):
+    """A configured value and the live value it differs from."""
+
+    config: Any
+    live: Any
+
+
+class ObjectChange(BaseModel):
+    """A configured object whose live counterpart differs from it."""
+
+    identifier: str
+    live_id: str
+    fields: dict[str, FieldChange]
+
+
+class ObjectChanges(BaseModel):
+    """Drift of one kind of object.
+
+    added are the identifiers of configured objects missing in Cloudflare,
+    removed the IDs of live objects no configured object accounts for. Live
+    objects never applied from an input are unmanaged rather than removed,
+    terraform leaves them alone and so they are no drift.
+    """
+
+    added: list[str] = []
+    changed: list[ObjectChange] = []
+    removed: list[str] = []
+    unmanaged: list[str] = []
+
+    @property
+    def drifted(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class Changeset(BaseModel):
+    """Drift of a zone's DNS records and rulesets, as written for pipelines."""
+
+    zone_id: str
+    dns_records: ObjectChanges
+    rulesets: ObjectChanges
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def drifted(self) -> bool:
+        return self.dns_records.drifted or self.rulesets.drifted
+
+
+def matches(config: Any, live: Any) -> bool:  # ruff: ignore[any-type]
+    """Whether the live value has everything the configured value sets.
+
+    Unset (None) configured values match anything and live dicts may have
+    more keys, e.g. the IDs and defaults the API adds; lists match item by
+    item.
+    """
+    match config:
+        case None:
+            return True
+        case dict():
+            return isinstance(live, dict) and all(
+                matches(value, live.get(key)) for key, value in config.items()
+            )
+        case list():
+            return (
+                isinstance(live, list)
+                and len(config) == len(live)
+                and all(map(matches, config, live, strict=True))
+            )
+        case bool():
+            return config is live
+    return config == live
+
+
+def _claim(candidates: Iterable[Any], claimed: set[str]) -> Any:  # ruff: ignore[any-type]
+    """The first candidate not claimed yet, claiming it; None if none is left."""
+    for candidate in candidates:
+        if candidate.id not in claimed:
+            claimed.add(candidate.id)
+            return candidate
+    return None
+
+
+def dns_record_changes(
+    record: CloudflareDNSRecord,
+    live: Any,  # ruff: ignore[any-type]
+) -> dict[str, FieldChange]:
+    """The configured fields of a DNS record its live counterpart differs in.
+
+    Name and type only differ for a record paired by its ID, e.g. when the
+    configuration renames a record terraform manages.
+    """
+    type_ = record.type.upper()
+    changes: dict[str, FieldChange] = {}
+    if canonical_name(record.name) != canonical_name(live.name):
+        changes["name"] = FieldChange(config=record.name, live=live.name)
+    if type_ != str(live.type).upper():
+        changes["type"] = FieldChange(config=record.type, live=live.type)
+    if record.content is not None and canonical_content(
+        type_, record.content
+    ) != canonical_content(type_, live.content or ""):
+        changes["content"] = FieldChange(config=record.content, live=live.content)
+    if not matches(record.data, live.data):
+        changes["data"] = FieldChange(config=record.data, live=live.data)
+    for field in _DNS_RECORD_FIELDS:
+        value = getattr(record, field)
+        if not matches(value, getattr(live, field)):
+            changes[field] = FieldChange(config=value, live=getattr(live, field))
+    return changes
+
+
+def match_dns_records(
+    records: list[CloudflareDNSRecord],
+    live_records: list[Any],
+    *,
+    by_name_type: bool = True,
+) -> tuple[list[tuple[CloudflareDNSRecord, Any]], list[CloudflareDNSRecord]]:
+    """Pair configured with live DNS records, each live record used once.
+
+    A configured record is matched to a live one with the same content (or
+    data) first, and, with by_name_type, only then to any left with the same
+    name and type.
+
+    Returns:
+        The matched pairs and the configured records left unmatched.
+    """
+    index = DNSRecordIndex(live_records)
+    name_type_index: dict[tuple[str, str], list[Any]] = {}
+    if by_name_type:
+        for live in live_records:
+            key = canonical_name(live.name), str(live.type).upper()
+            name_type_index.setdefault(key, []).append(live)
+
+    claimed: set[str] = set()
+    pairs: list[tuple[CloudflareDNSRecord, Any]] = []
+    unmatched: list[CloudflareDNSRecord] = []
+    for record in records:
+        live = _claim(index.lookup(record), claimed)
+        if live is None:
+            unmatched.append(record)
+        else:
+            pairs.append((record, live))
+    added: list[CloudflareDNSRecord] = []
+    for record in unmatched:
+        key = canonical_name(record.name), record.type.upper()
+        live = _claim(name_type_index.get(key, []), claimed)
+        if live is None:
+            added.append(record)
+        else:
+            pairs.append((record, live))
+    return pairs, added
+
+
+def diff_dns_records(
+    records: list[CloudflareDNSRecord],
+    live_records: list[Any],
+    applied: list[CloudflareDNSRecord] | None = None,
+) -> ObjectChanges:
+    """Match configured to live DNS records and tell how they differ.
+
+    A configured record matched to a live one by name and type only is a
+    changed record rather than an added one. Of the live records left, those
+    matching a record of the last applied input are managed by terraform and
+    removed, the others unmanaged. Without an applied input to tell them
+    apart, all of them are removed.
+    """
+    pairs, added = match_dns_records(records, live_records)
+    claimed = {live.id for _, live in pairs}
+    leftover = [live for live in live_records if live.id not in claimed]
+    if applied is None:
+        removed = {live.id for live in leftover}
+    else:
+        managed, _ = match_dns_records(applied, leftover)
+        removed = {live.id for _, live in managed}
+    return ObjectChanges(
+        added=[record.identifier for record in added],
+        changed=[
+            ObjectChange(identifier=record.identifier, live_id=live.id, fields=fields)
+            for record, live in pairs
+            if (fields := dns_record_changes(record, live))
+        ],
+        removed=[live.id for live in leftover if live.id in removed],
+        unmanaged=[live.id for live in leftover if live.id not in removed],
+    )
+
+
+def ruleset_changes(
+    ruleset: CloudflareRuleset,
+    live: Any,  # ruff: ignore[any-type]
+) -> dict[str, FieldChange]:
+    """The configured fields of a ruleset its live counterpart differs in."""
+    changes: dict[str, FieldChange] = {}
+    if not matches(ruleset.description, live.description):
+        changes["description"] = FieldChange(
+            config=ruleset.description, live=live.description
+        )
+    config_rules = [
+        rule.model_dump(mode="json", exclude_none=True) for rule in ruleset.rules
+    ]
+    live_rules = [rule.model_dump(mode="json") for rule in live.rules or []]
+    if not matches(config_rules, live_rules):
+        changes["rules"] = FieldChange(config=config_rules, live=live_rules)
+    return changes
+
+
+def diff_rulesets(
+    rulesets: list[CloudflareRuleset],
+    live_rulesets: list[Any],
+    get_ruleset: Callable[[str], Any],
+    applied: list[CloudflareRuleset] | None = None,
+) -> ObjectChanges:
+    """Match configured to live rulesets by name and phase, telling how they differ.
+
+    The listing has no rules, so each matched ruleset is fetched with
+    get_ruleset. Managed rulesets are never reported. Of the other live
+    rulesets left, those named and phased like a ruleset of the last applied
+    input are removed, the others unmanaged; without an applied input, all
+    of them are removed.
+    """
+    by_key = {(live.name, str(live.phase)): live for live in live_rulesets}
+    claimed: set[str] = set()
+    added: list[str] = []
+    changed: list[ObjectChange] = []
+    for ruleset in rulesets:
+        live = by_key.get((ruleset.name, ruleset.phase))
+        if live is None:
+            added.append(ruleset.identifier)
+            continue
+        claimed.add(live.id)
+        if fields := ruleset_changes(ruleset, get_ruleset(live.id)):
+            changed.append(
+                ObjectChange(
+                    identifier=ruleset.identifier, live_id=live.id, fields=fields
+                )
+            )
+    leftover = [
+        live
+        for live in live_rulesets
+        if live.id not in claimed and str(live.kind) != "managed"
+    ]
+    applied_keys = (
+        None
+        if applied is None
+        else {(ruleset.name, ruleset.phase) for ruleset in applied}
+    )
+    removed = {
+        live.id
+        for live in leftover
+        if applied_keys is None or (live.name, str(live.phase)) in applied_keys
+    }
+    return ObjectChanges(
+        added=added,
+        changed=changed,
+        removed=[live.id for live in leftover if live.id in removed],
+        unmanaged=[live.id for live in leftover if live.id not in removed],
+    )
+
+
+def check_drift(
+    client: Cloudflare,
+    zone: CloudflareZone,
+    zone_index: ZoneIndex | None = None,
+    applied: CloudflareZone | None = None,
+) -> Changeset:
+    """Compare the zone configuration to the live zone, listed once.
+
+    With an applied input, only the live objects of it are reported as
+    removed; without one, every live object not configured is.
+
+    Raises:
+        ZoneNotFoundError: If the zone is not found in its account.
+    """
+    zone_id = resolve_zone_id(client, zone, zone_index)
+    return Changeset(
+        zone_id=zone_id,
+        dns_records=diff_dns_records(
+            zone.dns_records,
+            list(list_dns_records_lean(client, zone_id)),
+            applied.dns_records if applied is not None else None,
+        ),
+        rulesets=diff_rulesets(
+            zone.rulesets,
+            list(client.rulesets.list(zone_id=zone_id)),
+            lambda ruleset_id: client.rulesets.get(ruleset_id, zone_id=zone_id),
+            applied.rulesets if applied is not None else None,
+        ),
+    )
+
+
+def log_changeset(changeset: Changeset) -> None:
+    for kind, changes in (
+        ("DNS records", changeset.dns_records),
+        ("Rulesets", changeset.rulesets),
+    ):
+        logger.info(
+            "%s: %d added, %d changed, %d removed, %d unmanaged",
+            kind,
+            len(changes.added),
+            len(changes.changed),
+            len(changes.removed),
+            len(changes.unmanaged),
+        )
+
+
+def main() -> None:
+    """Main entry point for drift-check CLI.
+
+    Writes the changeset and exits with EXIT_DRIFT if the zone drifted, so a
+    pipeline can skip terraform when it did not.
+    """
+    setup_logging()
+    config = DriftConfig()
+    applied_inputs_dir = PlanTargetsConfig().applied_inputs_dir
+    applied = AppliedInputs(Path(applied_inputs_dir)).last_applied()
+    if applied is None:
+        logger.warning(
+            "No applied input in %s, every live object not configured counts as "
+            "removed; run mark-applied after applying to tell unmanaged ones",
+            applied_inputs_dir,
+        )
+    changeset = check_drift(
+        cloudflare_client(config.client_settings()),
+        get_ai_input().data,
+        config.zone_index(),
+        applied[1] if applied is not None else None,
+    )
+    changeset_file = Path(config.drift_changeset_file)
+    changeset_file.parent.mkdir(parents=True, exist_ok=True)
+    changeset_file.write_text(changeset.model_dump_json(indent=2), encoding="utf-8")
+    log_changeset(changeset)
+
+    if changeset.drifted:
+        logger.info("Zone %s drifted, see %s", changeset.zone_id, changeset_file)
+        raise SystemExit(EXIT_DRIFT)
+    logger.info("Zone %s has not drifted", changeset.zone_id)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
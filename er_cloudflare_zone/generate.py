@@ -0,0 +1,158 @@
+"""Generate the terraform config of a zone, short-circuited while unchanged."""
+
+import hashlib
+import importlib.metadata
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, Field, ValidationError
+
+from .inputs import model_digest
+from .metrics import timed
+from .plan_targets import create_plan_targets_file
+from .shards import SHARD_MODULE_FILES, ShardConfig, create_shards, root_zone
+from .tf_files import write_backend_tf, write_if_changed, write_tf_vars
+
+if TYPE_CHECKING:
+    from .app_interface_input import AppInterfaceInput
+
+logger = logging.getLogger(__name__)
+
+PACKAGE = "er-cloudflare-zone"
+# written into the module dir by the tools, not part of the module sources
+MODULE_GENERATED_FILES = (
+    ".terraform",
+    "backend.tf",
+    "imports.tf",
+    "terraform.tfvars.json",
+)
+_DIGEST_SETTINGS = {
+    "backend_tf_file",
+    "tf_vars_file",
+    "dns_record_shards",
+    "shards_dir",
+    "shard_module_dir",
+}
+
+
+class GenerateConfig(ShardConfig):
+    """Environment variables for generate-tf-config."""
+
+    tf_config_digest_file: str = Field(
+        "tmp/tf-config-digest.json", alias="TF_CONFIG_DIGEST_FILE"
+    )
+    unchanged_exit_code: int = Field(0, alias="UNCHANGED_EXIT_CODE")
+
+
+class TfConfigDigest(BaseModel):
+    """Sidecar of the generated config, with the digest it was generated for.
+
+    digest covers the input, the module version and the settings that shape
+    the generated files; changed tells whether this run had to regenerate.
+    """
+
+    digest: str
+    module_version: str
+    changed: bool
+    files: list[str]
+
+
+def package_version() -> str:
+    try:
+        return importlib.metadata.version(PACKAGE)
+    except importlib.metadata.PackageNotFoundError:
+        return "dev"
+
+
+def module_digest(*module_dirs: Path) -> str:
+    """Hash of the terraform sources of the modules, generated files left out."""
+    digest = hashlib.sha256()
+    for module_dir in module_dirs:
+        sources = sorted(
+            path
+            for pattern in SHARD_MODULE_FILES
+            for path in (*module_dir.glob(pattern), *module_dir.glob(f"*/{pattern}"))
+            if path.name not in MODULE_GENERATED_FILES
+        )
+        for path in sources:
+            digest.update(path.relative_to(module_dir).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@timed("module_version")
+def module_version(config: GenerateConfig) -> str:
+    """Version of the code generating the config, package and module sources."""
+    module_dirs = [Path(config.backend_tf_file).parent]
+    if config.layout() is not None:
+        module_dirs.append(Path(config.shard_module_dir))
+    return f"{package_version()}+{module_digest(*module_dirs)[:12]}"
+
+
+def read_digest(path: Path) -> TfConfigDigest | None:
+    try:
+        return TfConfigDigest.model_validate_json(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except ValidationError:
+        logger.warning("Ignoring corrupt tf config digest %s", path)
+        return None
+
+
+@timed("write_tf_config")
+def write_tf_config(ai_input: AppInterfaceInput, config: GenerateConfig) -> None:
+    """Write the backend config and tfvars, of the shards too if sharded."""
+    write_backend_tf(ai_input.provision, Path(config.backend_tf_file))
+    layout = config.layout()
+    if layout is None:
+        write_tf_vars(ai_input.data, Path(config.tf_vars_file))
+        return
+    write_tf_vars(root_zone(ai_input.data), Path(config.tf_vars_file))
+    create_shards(ai_input, layout, Path(config.shard_module_dir))
+
+
+def generate_tf_config(ai_input: AppInterfaceInput) -> TfConfigDigest:
+    """Generate the zone's terraform config, unless generated for it already.
+
+    The config is skipped while the digest of the input, module version and
+    settings matches the sidecar of the last run and its files still exist.
+    Otherwise each file is only written if its content changed, so unchanged
+    files keep their mtime either way. The plan targets are always updated,
+    since they depend on the last applied input too.
+    """
+    config = GenerateConfig()
+    layout = config.layout()
+    files = [Path(config.backend_tf_file), Path(config.tf_vars_file)]
+    if layout is not None:
+        files += layout.generated_files()
+    version = module_version(config)
+    digest = hashlib.sha256(
+        "\0".join((
+            model_digest(ai_input),
+            version,
+            config.model_dump_json(include=_DIGEST_SETTINGS),
+        )).encode()
+    ).hexdigest()
+    digest_file = Path(config.tf_config_digest_file)
+    previous = read_digest(digest_file)
+    changed = (
+        previous is None
+        or previous.digest != digest
+        or not all(path.exists() for path in files)
+    )
+    if changed:
+        write_tf_config(ai_input, config)
+    else:
+        logger.info("Terraform config of %s unchanged", ai_input.provision.identifier)
+    with timed("create_plan_targets_file"):
+        create_plan_targets_file(ai_input.data, layout)
+
+    tf_config_digest = TfConfigDigest(
+        digest=digest,
+        module_version=version,
+        changed=changed,
+        files=[str(path) for path in files],
+    )
+    write_if_changed(digest_file, tf_config_digest.model_dump_json(indent=2))
+    return tf_config_digest
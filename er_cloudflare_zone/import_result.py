@@ -0,0 +1,40 @@
+from enum import StrEnum
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class ErrorClass(StrEnum):
+    """Kind of a failed import, telling whether trying again can help."""
+
+    # rate limits, 5xx responses, timeouts, a held state lock
+    TRANSIENT = "transient"
+    # the resource is in the state already, e.g. imported by a concurrent run
+    ALREADY_MANAGED = "already_managed"
+    PERMANENT = "permanent"
+
+
+class ImportTarget(BaseModel):
+    """A resolved terraform resource address and its import ID."""
+
+    resource_address: str
+    import_id: str
+    # the listed Cloudflare API object (or its attributes) the target was resolved from
+    api_object: Any = Field(default=None, exclude=True, repr=False)
+
+
+class ImportResult(BaseModel):
+    """Result of a terraform import operation."""
+
+    resource_address: str
+    import_id: str
+    success: bool
+    already_present: bool = False
+    error_message: str | None = None
+    error_class: ErrorClass | None = None
+    # times the import was tried again after a transient error
+    retries: int = 0
+    # Unix time the terraform call importing the resource started and its
+    # seconds, shared by all resources imported in one call
+    started_at: float | None = None
+    duration_seconds: float | None = None
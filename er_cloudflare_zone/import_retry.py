@@ -0,0 +1,146 @@
+"""Classification of failed imports and retries of the transient ones.
+
+A few records failing on a flaky API minute should not cost a rerun of the
+whole zone. The terraform stderr of every failed import is classified; the
+transient failures are imported again, all together after the main pass,
+backing off exponentially between the rounds.
+"""
+
+import logging
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .import_result import ErrorClass, ImportResult, ImportTarget
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+_ALREADY_MANAGED_RE = re.compile(
+    r"Resource already managed by Terraform", re.IGNORECASE
+)
+_TRANSIENT_PATTERNS = (
+    r"\b(?:status(?: code)?|HTTP(?:/[\d.]+)?)[:= ]*(?:429|5\d\d)\b",
+    r"too many requests",
+    r"rate limit",
+    r"internal server error",
+    r"bad gateway",
+    r"service unavailable",
+    r"gateway time-?out",
+    r"timeout|timed out",
+    r"deadline exceeded",
+    r"connection (?:reset|refused)",
+    r"unexpected EOF",
+    r"TLS handshake",
+    r"temporary failure in name resolution",
+    r"error acquiring the state lock",
+)
+_TRANSIENT_RE = re.compile("|".join(_TRANSIENT_PATTERNS), re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RetrySettings:
+    """Rounds of retrying transient import failures and the backoff between them.
+
+    The backoff doubles every round, up to max_backoff; 0 retries only
+    classifies the failures.
+    """
+
+    retries: int = 3
+    backoff: float = 10.0
+    max_backoff: float = 120.0
+
+
+def classify_error(message: str, resource_address: str) -> ErrorClass:
+    """Classify the terraform stderr of a failed import of the resource.
+
+    Terraform names the address it already manages, so a failed batch of
+    several resources is not taken as all of them being managed already.
+    """
+    if _ALREADY_MANAGED_RE.search(message) and resource_address in message:
+        return ErrorClass.ALREADY_MANAGED
+    if _TRANSIENT_RE.search(message):
+        return ErrorClass.TRANSIENT
+    return ErrorClass.PERMANENT
+
+
+def classify_result(result: ImportResult) -> ImportResult:
+    """The result with its failure classified.
+
+    A resource terraform already manages is as good as imported, it is
+    reported as already present.
+    """
+    if result.success:
+        return result
+    error_class = classify_error(result.error_message or "", result.resource_address)
+    if error_class == ErrorClass.ALREADY_MANAGED:
+        return result.model_copy(
+            update={
+                "success": True,
+                "already_present": True,
+                "error_class": error_class,
+            }
+        )
+    return result.model_copy(update={"error_class": error_class})
+
+
+def retry_delay(attempt: int, settings: RetrySettings) -> float:
+    """Delay before the retry round, half of it jitter against lockstep runs."""
+    backoff = min(settings.max_backoff, settings.backoff * 2**attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)  # ruff: ignore[suspicious-non-cryptographic-random-usage]
+
+
+def retry_transient(
+    targets: list[ImportTarget],
+    results: list[ImportResult],
+    import_targets: Callable[[list[ImportTarget]], list[ImportResult]],
+    settings: RetrySettings,
+) -> list[ImportResult]:
+    """Classify the failed results, importing the transient ones again.
+
+    Args:
+        targets: The targets the results are for.
+        results: The results of the main pass.
+        import_targets: Imports targets the same way the main pass did.
+        settings: Rounds and backoff of the retries.
+
+    Returns:
+        The final result per target, in the order of the main pass.
+    """
+    by_address = {target.resource_address: target for target in targets}
+    final = {result.resource_address: classify_result(result) for result in results}
+    for attempt in range(settings.retries):
+        transient = [
+            by_address[address]
+            for address, result in final.items()
+            if result.error_class == ErrorClass.TRANSIENT and address in by_address
+        ]
+        if not transient:
+            break
+        delay = retry_delay(attempt, settings)
+        logger.info(
+            "Retrying %d imports failed with transient errors in %.1fs (%d of %d)",
+            len(transient),
+            delay,
+            attempt + 1,
+            settings.retries,
+        )
+        time.sleep(delay)
+        for result in import_targets(transient):
+            final[result.resource_address] = classify_result(result).model_copy(
+                update={"retries": attempt + 1}
+            )
+    failed = Counter(r.error_class for r in final.values() if not r.success)
+    if failed:
+        logger.warning(
+            "Imports still failing: %s",
+            ", ".join(
+                f"{n} {error_class}" for error_class, n in sorted(failed.items())
+            ),
+        )
+    return list(final.values())
@@ -1,58 +1,139 @@
 """Import existing Cloudflare resources into Terraform state."""
 
+import functools
+import itertools
+import json
 import logging
 import subprocess
+import tempfile
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from cloudflare import Cloudflare
 from external_resources_io.config import Config
-from external_resources_io.input import parse_model, read_input_from_file
 from external_resources_io.log import setup_logging
 from external_resources_io.terraform import terraform_run
-from pydantic import BaseModel
-
-from .app_interface_input import (
-    AppInterfaceInput,
-    CloudflareDNSRecord,
-    CloudflareRuleset,
-    CloudflareZone,
+from pydantic import Field, field_validator
+
+from .client import ClientSettings, cloudflare_client, token_bucket
+from .discovery import (
+    Discovery,
+    DNSLookup,
+    RulesetKey,
+    # moved to the discovery module, still importable from here
+    ZoneNotFoundError,  # ruff: ignore[unused-import]
+    count_dns_records,
+    discover,
+    discover_concurrently,
+    list_dns_record_index,
+    list_ruleset_index,
+    lookup_zone_id,  # ruff: ignore[unused-import]
+    resolve_zone_id,
+)
+from .import_result import ErrorClass, ImportResult, ImportTarget
+from .import_retry import (
+    RetrySettings,
+    classify_error,
+    classify_result,
+    retry_transient,
 )
+from .inputs import get_ai_input
+from .journal import ImportJournal
+from .metrics import run_metrics, timed, write_run_report
+from .profiling import profiled
+from .shards import ShardConfig, shard_environ
+from .snapshot import DiscoverySnapshots
+from .tfstate import MAX_COMMAND_ADDRESSES, synthesize_state
+from .zone_index import ZoneIndex
+
+if TYPE_CHECKING:
+    from cloudflare import Cloudflare
+
+    from .app_interface_input import (
+        AppInterfaceInput,
+        CloudflareDNSRecord,
+        CloudflareRuleset,
+        CloudflareZone,
+    )
+    from .client import TokenBucket
+    from .dns_index import DNSRecordIndex
+    from .shards import ShardLayout
 
 logger = logging.getLogger(__name__)
 
 
-class ZoneNotFoundError(Exception):
-    """Raised when a zone cannot be found in Cloudflare."""
+class ImportMode(StrEnum):
+    SEQUENTIAL = "sequential"
+    BATCH = "batch"
+    STATE = "state"
 
 
-class ImportResult(BaseModel):
-    """Result of a terraform import operation."""
+class DiscoveryMode(StrEnum):
+    SYNC = "sync"
+    ASYNC = "async"
 
-    resource_address: str
-    import_id: str
-    success: bool
-    error_message: str | None = None
 
+class ImportConfig(Config):
+    """Environment variables for import-tfstate."""
 
-def get_ai_input() -> AppInterfaceInput:
-    """Get the AppInterfaceInput from the input file."""
-    return parse_model(AppInterfaceInput, read_input_from_file())
-
-
-def lookup_zone_id(client: Cloudflare, zone_name: str) -> str | None:
-    """Look up the zone ID by zone name.
+    import_mode: ImportMode = Field(ImportMode.SEQUENTIAL, alias="IMPORT_MODE")
+    import_journal_file: str = Field(
+        "tmp/import-journal.jsonl", alias="IMPORT_JOURNAL_FILE"
+    )
+    import_resume: bool = Field(default=False, alias="IMPORT_RESUME")
+    discovery_mode: DiscoveryMode = Field(DiscoveryMode.SYNC, alias="DISCOVERY_MODE")
+    discovery_concurrency: int = Field(8, alias="DISCOVERY_CONCURRENCY")
+    discovery_per_page: int = Field(1000, alias="DISCOVERY_PER_PAGE")
+    dns_lookup: DNSLookup = Field(DNSLookup.AUTO, alias="DNS_LOOKUP")
+    cloudflare_rate: float = Field(4.0, alias="CLOUDFLARE_RATE")
+    cloudflare_burst: int = Field(10, alias="CLOUDFLARE_BURST")
+    cloudflare_max_retries: int = Field(5, alias="CLOUDFLARE_MAX_RETRIES")
+    cloudflare_max_connections: int = Field(16, alias="CLOUDFLARE_MAX_CONNECTIONS")
+    cloudflare_http2: bool = Field(default=True, alias="CLOUDFLARE_HTTP2")
+    zone_index_dir: str = Field("tmp/zone-index", alias="ZONE_INDEX_DIR")
+    zone_index_ttl: float = Field(3600, alias="ZONE_INDEX_TTL")
+    discovery_snapshot_dir: str = Field("tmp/discovery", alias="DISCOVERY_SNAPSHOT_DIR")
+    discovery_snapshot_max_age: float = Field(3600, alias="DISCOVERY_SNAPSHOT_MAX_AGE")
+    discovery_refresh: bool = Field(default=False, alias="DISCOVERY_REFRESH")
+    import_retries: int = Field(3, alias="IMPORT_RETRIES")
+    import_retry_backoff: float = Field(10.0, alias="IMPORT_RETRY_BACKOFF")
+    import_retry_max_backoff: float = Field(120.0, alias="IMPORT_RETRY_MAX_BACKOFF")
+
+    @field_validator("import_mode", "discovery_mode", "dns_lookup", mode="before")
+    @classmethod
+    def import_mode_lower(cls, v: str) -> str:
+        """Always lower mode strings to match with the mode enums."""
+        return v.lower()
+
+    def client_settings(self) -> ClientSettings:
+        return ClientSettings(
+            rate=self.cloudflare_rate,
+            burst=self.cloudflare_burst,
+            max_retries=self.cloudflare_max_retries,
+            max_connections=self.cloudflare_max_connections,
+            http2=self.cloudflare_http2,
+        )
 
-    Args:
-        client: Cloudflare API client.
-        zone_name: The domain name (e.g., "openshift.io").
+    def retry_settings(self) -> RetrySettings:
+        return RetrySettings(
+            retries=self.import_retries,
+            backoff=self.import_retry_backoff,
+            max_backoff=self.import_retry_max_backoff,
+        )
 
-    Returns:
-        The zone ID if found, None otherwise.
-    """
-    zones = client.zones.list(name=zone_name)
-    for zone in zones:
-        if zone.name == zone_name:
-            return zone.id
-    return None
+    def zone_index(self) -> ZoneIndex | None:
+        """The cached zone index, None if disabled with a TTL of 0."""
+        if self.zone_index_ttl <= 0:
+            return None
+        return ZoneIndex(Path(self.zone_index_dir), self.zone_index_ttl)
+
+    def discovery_snapshots(self) -> DiscoverySnapshots | None:
+        """The discovery snapshots, None if disabled with a max age of 0."""
+        if self.discovery_snapshot_max_age <= 0:
+            return None
+        return DiscoverySnapshots(
+            Path(self.discovery_snapshot_dir), self.discovery_snapshot_max_age
+        )
 
 
 def import_resource(
@@ -71,37 +152,298 @@ def import_resource(
     Returns:
         ImportResult with success status and any error message.
     """
-    try:
-        terraform_run(["import", resource_address, import_id], dry_run=dry_run)
-        logger.info("Successfully imported %s", resource_address)
-        return ImportResult(
-            resource_address=resource_address,
-            import_id=import_id,
-            success=True,
+    error_msg: str | None = None
+    with timed("import_resource") as timing:
+        try:
+            terraform_run(["import", resource_address, import_id], dry_run=dry_run)
+        except subprocess.CalledProcessError as e:
+            error_msg = str(e.stderr) if e.stderr else str(e)
+            logger.warning("Failed to import %s: %s", resource_address, error_msg)
+        else:
+            logger.info("Successfully imported %s", resource_address)
+    return ImportResult(
+        resource_address=resource_address,
+        import_id=import_id,
+        success=error_msg is None,
+        error_message=error_msg,
+        started_at=timing.started_at,
+        duration_seconds=timing.seconds,
+    )
+
+
+def resolve_zone(zone_id: str, zone: CloudflareZone) -> list[ImportTarget]:
+    """Resolve the zone and its subscription to import targets."""
+    return [
+        ImportTarget(
+            resource_address="cloudflare_zone.this",
+            import_id=zone_id,
+            api_object={
+                "account": {"id": zone.account_id},
+                "name": zone.name,
+                "type": zone.type,
+            },
         )
-    except subprocess.CalledProcessError as e:
-        error_msg = str(e.stderr) if e.stderr else str(e)
-        logger.warning("Failed to import %s: %s", resource_address, error_msg)
-        return ImportResult(
-            resource_address=resource_address,
-            import_id=import_id,
-            success=False,
-            error_message=error_msg,
+    ] + (
+        [
+            ImportTarget(
+                resource_address="cloudflare_zone_subscription.this[0]",
+                import_id=zone_id,
+                api_object={"rate_plan": {"id": zone.plan}},
+            )
+        ]
+        if zone.plan is not None
+        else []
+    )
+
+
+@timed("load_state_addresses")
+def load_state_addresses() -> set[str]:
+    """Load the resource addresses already managed in the terraform state.
+
+    The state is read even in dry-run mode, since listing it changes nothing.
+    """
+    try:
+        output = terraform_run(["state", "list"], dry_run=False)
+    except subprocess.CalledProcessError:
+        logger.warning("Failed to list terraform state, importing all resources")
+        return set()
+    return {line.strip() for line in output.splitlines() if line.strip()}
+
+
+def skip_present_targets(
+    targets: list[ImportTarget], state_addresses: set[str]
+) -> tuple[list[ImportTarget], list[ImportResult]]:
+    """Split off the targets whose address is already in the terraform state.
+
+    Returns:
+        The targets still to import and an ImportResult for each skipped one.
+    """
+    remaining: list[ImportTarget] = []
+    skipped: list[ImportResult] = []
+    for target in targets:
+        if target.resource_address in state_addresses:
+            logger.info("Skipping %s, already in state", target.resource_address)
+            skipped.append(
+                ImportResult(
+                    resource_address=target.resource_address,
+                    import_id=target.import_id,
+                    success=True,
+                    already_present=True,
+                )
+            )
+        else:
+            remaining.append(target)
+    return remaining, skipped
+
+
+def import_targets(
+    targets: list[ImportTarget],
+    *,
+    dry_run: bool = False,
+    journal: ImportJournal | None = None,
+) -> list[ImportResult]:
+    """Import resolved targets one by one, checkpointing each classified result."""
+    results: list[ImportResult] = []
+    for target in targets:
+        result = classify_result(
+            import_resource(target.resource_address, target.import_id, dry_run=dry_run)
         )
+        if journal is not None:
+            journal.record_results([result])
+        results.append(result)
+    return results
+
+
+def import_blocks_file() -> Path:
+    """Path of the generated import blocks file, next to the module sources."""
+    return Path(Config().backend_tf_file).with_name("imports.tf")
+
+
+def _hcl_string(value: str) -> str:
+    """Quote a string as HCL literal, escaping template sequences."""
+    return (
+        json.dumps(value, ensure_ascii=False).replace("${", "$${").replace("%{", "%%{")
+    )
+
 
+def render_import_blocks(targets: list[ImportTarget]) -> str:
+    """Render terraform import blocks for the given targets."""
+    return "".join(
+        f"import {{\n  to = {target.resource_address}\n  id = {_hcl_string(target.import_id)}\n}}\n\n"
+        for target in targets
+    )
 
-def import_zone(zone_id: str, *, dry_run: bool = False) -> ImportResult:
-    """Import the zone."""
-    return import_resource("cloudflare_zone.this", zone_id, dry_run=dry_run)
 
+def non_import_changes(plan: dict[str, Any]) -> dict[str, list[str]]:
+    """Actions of the planned resource changes that are not a plain import.
 
-def import_zone_subscription(zone_id: str, *, dry_run: bool = False) -> ImportResult:
-    """Import zone subscription."""
-    return import_resource(
-        "cloudflare_zone_subscription.this[0]", zone_id, dry_run=dry_run
+    An import of a resource matching its configuration is planned as a
+    no-op; any update, create or delete is drift the import must not apply.
+    """
+    return {
+        change["address"]: change["change"]["actions"]
+        for change in plan.get("resource_changes", [])
+        if change["change"]["actions"] not in (["no-op"], ["read"])
+    }
+
+
+def plan_import_batch(
+    targets: list[ImportTarget], plan_file: Path, *, dry_run: bool = False
+) -> dict[str, list[str]]:
+    """Plan the import of the targets into the file, see non_import_changes."""
+    terraform_run(
+        [
+            "plan",
+            "-input=false",
+            f"-out={plan_file}",
+            *(f"-target={target.resource_address}" for target in targets),
+        ],
+        dry_run=dry_run,
+    )
+    if dry_run:
+        return {}
+    return non_import_changes(
+        json.loads(terraform_run(["show", "-json", str(plan_file)], dry_run=False))
     )
 
 
+def import_batch(
+    targets: list[ImportTarget], *, dry_run: bool = False
+) -> list[ImportResult]:
+    """Import the targets with one terraform apply per MAX_COMMAND_ADDRESSES.
+
+    Each chunk of targets is written as import blocks to a generated file in
+    the module directory and planned with the imported addresses as targets,
+    so resources missing in Cloudflare are never created. The plan is applied
+    only if it imports and nothing else: drift between the configuration and
+    the live resources, e.g. a changed rate plan, fails the chunk and is left
+    to the next regular apply. A chunk terraform cannot even be started for
+    is imported one by one instead.
+
+    Args:
+        targets: Resolved resource addresses and import IDs.
+        dry_run: If True, only log the command without executing.
+
+    Returns:
+        One ImportResult per target. A failed plan or apply fails all of its
+        chunk.
+    """
+    return [
+        result
+        for chunk in itertools.batched(targets, MAX_COMMAND_ADDRESSES, strict=False)
+        for result in _import_batch_chunk(list(chunk), dry_run=dry_run)
+    ]
+
+
+def _import_batch_chunk(
+    targets: list[ImportTarget], *, dry_run: bool
+) -> list[ImportResult]:
+    imports_file = import_blocks_file()
+    imports_file.write_text(render_import_blocks(targets), encoding="utf-8")
+    with tempfile.TemporaryDirectory() as tmp, timed("import_batch") as timing:
+        plan_file = Path(tmp) / "imports.tfplan"
+        error_msg = None
+        one_by_one = False
+        try:
+            if changes := plan_import_batch(targets, plan_file, dry_run=dry_run):
+                error_msg = "Import plan changes more than it imports: " + ", ".join(
+                    f"{address} ({'/'.join(actions)})"
+                    for address, actions in changes.items()
+                )
+            else:
+                terraform_run(
+                    ["apply", "-input=false", str(plan_file)], dry_run=dry_run
+                )
+        except subprocess.CalledProcessError as e:
+            error_msg = str(e.stderr) if e.stderr else str(e)
+        except OSError as e:
+            logger.warning(
+                "Failed to run the batch import of %d resources, "
+                "importing them one by one: %s",
+                len(targets),
+                e,
+            )
+            one_by_one = True
+        finally:
+            imports_file.unlink(missing_ok=True)
+    if one_by_one:
+        return import_targets(targets, dry_run=dry_run)
+    if error_msg is not None:
+        logger.warning(
+            "Failed to batch import %d resources: %s", len(targets), error_msg
+        )
+        return [
+            ImportResult(
+                resource_address=target.resource_address,
+                import_id=target.import_id,
+                success=False,
+                error_message=error_msg,
+                started_at=timing.started_at,
+                duration_seconds=timing.seconds,
+            )
+            for target in targets
+        ]
+    logger.info("Successfully imported %d resources in batch", len(targets))
+    return [
+        ImportResult(
+            resource_address=target.resource_address,
+            import_id=target.import_id,
+            success=True,
+            started_at=timing.started_at,
+            duration_seconds=timing.seconds,
+        )
+        for target in targets
+    ]
+
+
+def resolve_dns_records(
+    dns_record_by_key: DNSRecordIndex | None,
+    zone_id: str,
+    records: list[CloudflareDNSRecord],
+) -> tuple[list[ImportTarget], list[ImportResult]]:
+    """Resolve DNS records to import targets.
+
+    Returns:
+        The resolved targets and a failed ImportResult for each record not
+        found or matching more than one live record.
+        Nothing is resolved if the DNS records could not be listed.
+    """
+    if dns_record_by_key is None:
+        return [], []
+    targets: list[ImportTarget] = []
+    failures: list[ImportResult] = []
+    for record in records:
+        live_records = dns_record_by_key.lookup(record)
+        resource_address = f'cloudflare_dns_record.this["{record.identifier}"]'
+        if len(live_records) == 1:
+            targets.append(
+                ImportTarget(
+                    resource_address=resource_address,
+                    import_id=f"{zone_id}/{live_records[0].id}",
+                    api_object=live_records[0],
+                )
+            )
+            continue
+        error_msg = (
+            f"DNS record '{record.name}' ({record.type}) is ambiguous, "
+            f"matching live records {', '.join(r.id for r in live_records)}"
+            if live_records
+            else f"DNS record '{record.name}' ({record.type}) not found"
+        )
+        logger.error(error_msg)
+        failures.append(
+            ImportResult(
+                resource_address=resource_address,
+                import_id="",
+                success=False,
+                error_message=error_msg,
+                error_class=ErrorClass.PERMANENT,
+            )
+        )
+    return targets, failures
+
+
+@timed("import_dns_records")
 def import_dns_records(
     client: Cloudflare,
     zone_id: str,
@@ -110,40 +452,54 @@ def import_dns_records(
     dry_run: bool = False,
 ) -> list[ImportResult]:
     """Import DNS records."""
-    try:
-        dns_record_by_key = {
-            (record.name, str(record.type), record.content): record.id
-            for record in client.dns.records.list(zone_id=zone_id)
-        }
-    except Exception:
-        logger.exception("Failed to list DNS records for zone ID %s", zone_id)
-        return []
-    results: list[ImportResult] = []
-    for record in records:
-        record_id = dns_record_by_key.get((record.name, record.type, record.content))
-        resource_address = f'cloudflare_dns_record.this["{record.identifier}"]'
-        if record_id is None:
-            error_msg = f"DNS record '{record.name}' ({record.type}) not found"
+    targets, failures = resolve_dns_records(
+        list_dns_record_index(client, zone_id, lean=True), zone_id, records
+    )
+    return import_targets(targets, dry_run=dry_run) + failures
+
+
+def resolve_rulesets(
+    ruleset_by_key: dict[RulesetKey, Any] | None,
+    zone_id: str,
+    rulesets: list[CloudflareRuleset],
+) -> tuple[list[ImportTarget], list[ImportResult]]:
+    """Resolve rulesets to import targets.
+
+    Returns:
+        The resolved targets and a failed ImportResult for each ruleset not found.
+        Nothing is resolved if the rulesets could not be listed.
+    """
+    if ruleset_by_key is None:
+        return [], []
+    targets: list[ImportTarget] = []
+    failures: list[ImportResult] = []
+    for ruleset in rulesets:
+        live_ruleset = ruleset_by_key.get((ruleset.name, ruleset.phase))
+        resource_address = f'cloudflare_ruleset.this["{ruleset.identifier}"]'
+        if live_ruleset is None:
+            error_msg = f"Ruleset '{ruleset.name}' (phase: {ruleset.phase}) not found"
             logger.error(error_msg)
-            results.append(
+            failures.append(
                 ImportResult(
                     resource_address=resource_address,
                     import_id="",
                     success=False,
                     error_message=error_msg,
+                    error_class=ErrorClass.PERMANENT,
                 )
             )
         else:
-            results.append(
-                import_resource(
-                    resource_address,
-                    f"{zone_id}/{record_id}",
-                    dry_run=dry_run,
+            targets.append(
+                ImportTarget(
+                    resource_address=resource_address,
+                    import_id=f"zones/{zone_id}/{live_ruleset.id}",
+                    api_object=live_ruleset,
                 )
             )
-    return results
+    return targets, failures
 
 
+@timed("import_rulesets")
 def import_rulesets(
     client: Cloudflare,
     zone_id: str,
@@ -152,36 +508,122 @@ def import_rulesets(
     dry_run: bool = False,
 ) -> list[ImportResult]:
     """Import rulesets."""
+    targets, failures = resolve_rulesets(
+        list_ruleset_index(client, zone_id), zone_id, rulesets
+    )
+    return import_targets(targets, dry_run=dry_run) + failures
+
+
+def import_with_mode(
+    targets: list[ImportTarget],
+    *,
+    dry_run: bool = False,
+    mode: ImportMode = ImportMode.SEQUENTIAL,
+    journal: ImportJournal | None = None,
+) -> list[ImportResult]:
+    """Import the targets as the mode says, checkpointing the classified results."""
+    match mode:
+        case ImportMode.BATCH:
+            results = list(map(classify_result, import_batch(targets, dry_run=dry_run)))
+            if journal is not None:
+                journal.record_results(results)
+        case ImportMode.STATE:
+            results = list(
+                map(classify_result, synthesize_state(targets, dry_run=dry_run))
+            )
+            if journal is not None:
+                journal.record_results(results)
+        case _:
+            results = import_targets(targets, dry_run=dry_run, journal=journal)
+    return results
+
+
+def run_module_imports(
+    targets: list[ImportTarget],
+    *,
+    dry_run: bool = False,
+    mode: ImportMode = ImportMode.SEQUENTIAL,
+    journal: ImportJournal | None = None,
+    retry: RetrySettings | None = None,
+) -> list[ImportResult]:
+    """Import the targets not yet present in the terraform state of one module.
+
+    Failed imports are classified; with retry settings, those failed with a
+    transient error are imported again in the same mode after the main pass.
+    """
+    targets, skipped = skip_present_targets(targets, load_state_addresses())
+    if journal is not None:
+        journal.record_results(skipped)
+
+    results = retry_transient(
+        targets,
+        import_with_mode(targets, dry_run=dry_run, mode=mode, journal=journal),
+        lambda transient: import_with_mode(
+            transient, dry_run=dry_run, mode=mode, journal=journal
+        ),
+        retry or RetrySettings(retries=0),
+    )
+    if journal is not None:
+        # the retried results were checkpointed before their retries were counted
+        journal.record_results([result for result in results if result.retries])
+    return skipped + results
+
+
+@timed("init_shard")
+def init_shard(targets: list[ImportTarget], *, dry_run: bool) -> list[ImportResult]:
+    """Initialize the working dir of a shard, failing its targets if that fails."""
     try:
-        ruleset_by_key = {
-            (ruleset.name, str(ruleset.phase)): ruleset.id
-            for ruleset in client.rulesets.list(zone_id=zone_id)
-        }
-    except Exception:
-        logger.exception("Failed to list rulesets for zone ID %s", zone_id)
-        return []
-    results: list[ImportResult] = []
-    for ruleset in rulesets:
-        ruleset_id = ruleset_by_key.get((ruleset.name, ruleset.phase))
-        resource_address = f'cloudflare_ruleset.this["{ruleset.identifier}"]'
-        if ruleset_id is None:
-            error_msg = f"Ruleset '{ruleset.name}' (phase: {ruleset.phase}) not found"
-            logger.error(error_msg)
-            results.append(
-                ImportResult(
-                    resource_address=resource_address,
-                    import_id="",
-                    success=False,
-                    error_message=error_msg,
-                )
+        terraform_run(["init", "-input=false"], dry_run=dry_run)
+    except subprocess.CalledProcessError as e:
+        error_msg = str(e.stderr) if e.stderr else str(e)
+        error_class = classify_error(error_msg, "")
+        return [
+            ImportResult(
+                resource_address=target.resource_address,
+                import_id=target.import_id,
+                success=False,
+                error_message=error_msg,
+                error_class=error_class,
             )
-        else:
-            results.append(
-                import_resource(
-                    resource_address,
-                    f"zones/{zone_id}/{ruleset_id}",
-                    dry_run=dry_run,
-                )
+            for target in targets
+        ]
+    return []
+
+
+def run_imports(
+    targets: list[ImportTarget],
+    *,
+    dry_run: bool = False,
+    mode: ImportMode = ImportMode.SEQUENTIAL,
+    journal: ImportJournal | None = None,
+    layout: ShardLayout | None = None,
+    retry: RetrySettings | None = None,
+) -> list[ImportResult]:
+    """Import the targets not yet present in the terraform state.
+
+    With a shard layout, DNS records are imported into the state of their
+    shard, each shard's working dir initialized first; the rest go into the
+    root module's state.
+    """
+    if layout is None:
+        return run_module_imports(
+            targets, dry_run=dry_run, mode=mode, journal=journal, retry=retry
+        )
+    groups = layout.partition(targets)
+    results = run_module_imports(
+        groups.get(None, []), dry_run=dry_run, mode=mode, journal=journal, retry=retry
+    )
+    for index in range(layout.count):
+        if not (shard_targets := groups.get(index)):
+            continue
+        with shard_environ(layout.shard_dir(index)):
+            if failures := init_shard(shard_targets, dry_run=dry_run):
+                if journal is not None:
+                    journal.record_results(failures)
+                results += failures
+                continue
+            results += run_module_imports(
+                shard_targets, dry_run=dry_run, mode=mode, journal=journal, retry=retry
             )
     return results
 
@@ -191,53 +633,259 @@ def import_state(
     zone: CloudflareZone,
     *,
     dry_run: bool = False,
+    mode: ImportMode = ImportMode.SEQUENTIAL,
+    journal: ImportJournal | None = None,
+    discovery: Discovery | None = None,
+    zone_index: ZoneIndex | None = None,
+    layout: ShardLayout | None = None,
+    retry: RetrySettings | None = None,
 ) -> list[ImportResult]:
     """Import all resources for a Cloudflare zone.
 
     Args:
-        client: Cloudflare API client.
+        client: Cloudflare API client, used to discover the zone if needed.
         zone: The CloudflareZone configuration.
         dry_run: If True, only log commands without executing.
+        mode: Import one resource per terraform call, all of them in a batch, or
+            by pushing a state synthesized from the listed API objects.
+        journal: If set, checkpoint the resolved targets and every result.
+        discovery: The already discovered zone, e.g. from the async discovery.
+        zone_index: If set, resolve the zone ID from it when discovering.
+        layout: If set, import the DNS records into the states of their shards.
+        retry: If set, retry the imports failed with transient errors.
 
     Returns:
         List of ImportResult for each import operation.
     """
-    logger.info("Looking up zone ID for '%s'", zone.name)
-    zone_id = lookup_zone_id(client, zone.name)
+    if discovery is None:
+        # only the state synthesis needs the full API objects
+        discovery = discover(
+            client, zone, lean=mode != ImportMode.STATE, zone_index=zone_index
+        )
+    zone_id = discovery.zone_id
+
+    dns_record_targets, dns_record_failures = resolve_dns_records(
+        discovery.dns_record_by_key, zone_id, zone.dns_records
+    )
+    ruleset_targets, ruleset_failures = resolve_rulesets(
+        discovery.ruleset_by_key, zone_id, zone.rulesets
+    )
+    targets = resolve_zone(zone_id, zone) + dns_record_targets + ruleset_targets
+    failures = dns_record_failures + ruleset_failures
+    if journal is not None:
+        journal.record_targets(targets)
+        journal.record_results(failures)
+
+    return (
+        run_imports(
+            targets,
+            dry_run=dry_run,
+            mode=mode,
+            journal=journal,
+            layout=layout,
+            retry=retry,
+        )
+        + failures
+    )
+
 
-    if zone_id is None:
-        msg = f"Zone '{zone.name}' not found in Cloudflare"
-        logger.error(msg)
-        raise ZoneNotFoundError(msg)
+def resume_state(
+    journal: ImportJournal,
+    *,
+    dry_run: bool = False,
+    mode: ImportMode = ImportMode.SEQUENTIAL,
+    layout: ShardLayout | None = None,
+    retry: RetrySettings | None = None,
+) -> list[ImportResult]:
+    """Continue a previous import run from its journal.
 
-    logger.info("Found zone ID: %s", zone_id)
+    Only targets without a successful result are imported again, Cloudflare is
+    not queried. Resources that could not be resolved in the previous run are
+    reported as failed again; start a fresh run to look them up once more.
 
+    Returns:
+        List of ImportResult covering the whole run, including earlier successes.
+    """
+    replay = journal.replay()
+    outstanding = replay.outstanding()
+    logger.info(
+        "Resuming import: %d of %d resources outstanding",
+        len(outstanding),
+        len(replay.targets),
+    )
     return (
-        [import_zone(zone_id, dry_run=dry_run)]
-        + (
-            [import_zone_subscription(zone_id, dry_run=dry_run)]
-            if zone.plan is not None
-            else []
+        replay.succeeded()
+        + run_imports(
+            outstanding,
+            dry_run=dry_run,
+            mode=mode,
+            journal=journal,
+            layout=layout,
+            retry=retry,
         )
-        + import_dns_records(client, zone_id, zone.dns_records, dry_run=dry_run)
-        + import_rulesets(client, zone_id, zone.rulesets, dry_run=dry_run)
+        + replay.unresolved()
     )
 
 
-def main() -> None:
-    """Main entry point for import-tfstate CLI."""
-    setup_logging()
-    config = Config()
+@timed("discover_zone")
+def discover_zone(
+    client: Cloudflare,
+    zone: CloudflareZone,
+    config: ImportConfig,
+    bucket: TokenBucket,
+    zone_index: ZoneIndex | None = None,
+) -> Discovery:
+    """Discover the zone as configured, reusing its snapshot while still fresh.
+
+    A run lists the zone only if no recent snapshot of an earlier run, e.g. the
+    dry run before it, is found, or DISCOVERY_REFRESH forces it to.
+    """
+    # only the state synthesis needs the full API objects
+    lean = config.import_mode != ImportMode.STATE
+    snapshots = config.discovery_snapshots()
+    zone_id: str | None = None
+    # the zone's DNS record count, once counted
+    counted: list[int | None] = []
+
+    def dns_record_count(zone_id: str) -> int | None:
+        if not counted:
+            counted.append(count_dns_records(client, zone_id))
+        return counted[0]
+
+    if snapshots is not None and not config.discovery_refresh:
+        zone_id = resolve_zone_id(client, zone, zone_index)
+        snapshot = snapshots.load(
+            zone_id,
+            zone,
+            lean=lean,
+            dns_record_count=functools.partial(dns_record_count, zone_id),
+        )
+        if snapshot is not None:
+            return snapshot
+
+    if config.discovery_mode == DiscoveryMode.SYNC and config.dns_lookup not in {
+        DNSLookup.AUTO,
+        DNSLookup.FULL,
+    }:
+        # the sync discovery always lists the whole zone
+        logger.warning(
+            "DNS_LOOKUP=%s needs DISCOVERY_MODE=async, listing all DNS records",
+            config.dns_lookup,
+        )
+    discovery = (
+        discover_concurrently(
+            zone,
+            concurrency=config.discovery_concurrency,
+            per_page=config.discovery_per_page,
+            dns_lookup=config.dns_lookup,
+            client_settings=config.client_settings(),
+            bucket=bucket,
+            zone_index=zone_index,
+            zone_id=zone_id,
+        )
+        if config.discovery_mode == DiscoveryMode.ASYNC
+        else discover(client, zone, lean=lean, zone_index=zone_index, zone_id=zone_id)
+    )
+    if snapshots is not None:
+        if (
+            zone.dns_records
+            and not counted
+            and config.discovery_mode == DiscoveryMode.SYNC
+            and discovery.dns_record_by_key is not None
+        ):
+            # the sync discovery lists every record of the zone, so counts them
+            counted.append(len(discovery.dns_record_by_key))
+        snapshots.save(
+            discovery,
+            zone,
+            dns_record_count=(
+                dns_record_count(discovery.zone_id) if zone.dns_records else None
+            ),
+        )
+    return discovery
+
 
-    ai_input = get_ai_input()
-    client = Cloudflare()
+def run_import(
+    ai_input: AppInterfaceInput,
+    config: ImportConfig,
+    bucket: TokenBucket | None = None,
+) -> list[ImportResult]:
+    """Import one zone as configured, fresh or resumed from its journal.
 
-    results = import_state(client, ai_input.data, dry_run=config.dry_run)
+    Args:
+        ai_input: The zone's app-interface input.
+        config: The import settings.
+        bucket: Rate limit to share with other imports, one of its own if None.
 
-    succeeded = sum(1 for r in results if r.success)
-    failed = sum(1 for r in results if not r.success)
+    Returns:
+        List of ImportResult for each resource of the zone.
+    """
+    client_settings = config.client_settings()
+    # the sync and the async client share one rate limit
+    bucket = bucket or token_bucket(client_settings)
+    client = cloudflare_client(client_settings, bucket)
+    # a dry run imports nothing, so it must not checkpoint anything either
+    journal = (
+        None if config.dry_run else ImportJournal(Path(config.import_journal_file))
+    )
 
-    logger.info("Import complete: %d succeeded, %d failed", succeeded, failed)
+    layout = ShardConfig().layout()
+    resume = config.import_resume and journal is not None and journal.exists()
+    if resume and config.import_mode == ImportMode.STATE:
+        # the journal keeps no API objects to synthesize the state from; a
+        # fresh run looks them up again and skips what is in the state already
+        logger.warning("IMPORT_RESUME is not supported in state mode, importing afresh")
+        resume = False
+    if resume and journal is not None:
+        return resume_state(
+            journal,
+            dry_run=config.dry_run,
+            mode=config.import_mode,
+            layout=layout,
+            retry=config.retry_settings(),
+        )
+    if journal is not None:
+        journal.reset()
+    return import_state(
+        client,
+        ai_input.data,
+        dry_run=config.dry_run,
+        mode=config.import_mode,
+        journal=journal,
+        discovery=discover_zone(
+            client, ai_input.data, config, bucket, config.zone_index()
+        ),
+        layout=layout,
+        retry=config.retry_settings(),
+    )
+
+
+def count_results(results: list[ImportResult]) -> tuple[int, int, int]:
+    """Number of succeeded, already present and failed imports."""
+    return (
+        sum(1 for r in results if r.success and not r.already_present),
+        sum(1 for r in results if r.already_present),
+        sum(1 for r in results if not r.success),
+    )
+
+
+def main() -> None:
+    """Main entry point for import-tfstate CLI."""
+    setup_logging()
+    config = ImportConfig()
+
+    with profiled("import-tfstate"), run_metrics("import-tfstate") as metrics:
+        ai_input = get_ai_input()
+        results = run_import(ai_input, config)
+    write_run_report(metrics, ai_input.provision.identifier, results)
+    succeeded, already_present, failed = count_results(results)
+
+    logger.info(
+        "Import complete: %d succeeded, %d already present, %d failed",
+        succeeded,
+        already_present,
+        failed,
+    )
 
     if failed > 0:
         raise SystemExit(1)
@@ -0,0 +1,40 @@
+"""Reading the app-interface input, validated straight from its JSON."""
+
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from external_resources_io.config import Config
+
+from .app_interface_input import AppInterfaceInput
+from .metrics import timed
+from .tf_files import canonical_json
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+
+def read_input_bytes(file_path: Path | str | None = None) -> bytes:
+    """The raw input JSON, from INPUT_FILE unless a file is given."""
+    return Path(file_path or Config().input_file).read_bytes()
+
+
+def parse_ai_input(raw: bytes | str) -> AppInterfaceInput:
+    """Validate the input JSON into the input models.
+
+    Unlike loading the JSON into dicts and validating those, the models are
+    built by pydantic-core in a single pass over the JSON, with the validator
+    the model class caches; for large zones that is faster and peaks lower.
+    """
+    return AppInterfaceInput.model_validate_json(raw)
+
+
+@timed("get_ai_input")
+def get_ai_input(file_path: Path | str | None = None) -> AppInterfaceInput:
+    """Get the AppInterfaceInput from the input file."""
+    return parse_ai_input(read_input_bytes(file_path))
+
+
+def model_digest(model: BaseModel) -> str:
+    """Hash of a model's canonical JSON."""
+    return hashlib.sha256(canonical_json(model).encode()).hexdigest()
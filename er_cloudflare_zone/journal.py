@@ -0,0 +1,130 @@
+"""Append-only journal of import-tfstate runs."""
+
+from typing import TYPE_CHECKING, Literal
+
+from pydantic import BaseModel
+
+from .import_result import ErrorClass, ImportResult, ImportTarget
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class JournalEntry(BaseModel):
+    """A single journal line, either a resolved target or an import result."""
+
+    kind: Literal["target", "result"]
+    resource_address: str
+    import_id: str
+    success: bool | None = None
+    already_present: bool = False
+    error_message: str | None = None
+    error_class: ErrorClass | None = None
+    retries: int = 0
+    started_at: float | None = None
+    duration_seconds: float | None = None
+
+
+class JournalReplay(BaseModel):
+    """State of a previous run reconstructed from its journal."""
+
+    targets: list[ImportTarget] = []
+    results: list[ImportResult] = []
+
+    def outstanding(self) -> list[ImportTarget]:
+        """Targets without a successful result yet."""
+        done = {
+            (result.resource_address, result.import_id)
+            for result in self.results
+            if result.success
+        }
+        return [
+            target
+            for target in self.targets
+            if (target.resource_address, target.import_id) not in done
+        ]
+
+    def succeeded(self) -> list[ImportResult]:
+        """Successful results of the resolved targets."""
+        keys = {(target.resource_address, target.import_id) for target in self.targets}
+        return [
+            result
+            for result in self.results
+            if result.success and (result.resource_address, result.import_id) in keys
+        ]
+
+    def unresolved(self) -> list[ImportResult]:
+        """Failed results of resources that could not be resolved in Cloudflare."""
+        return [result for result in self.results if not result.import_id]
+
+
+class ImportJournal:
+    """Append-only JSON lines file checkpointing an import run.
+
+    The resolved targets are written first, followed by one result line per
+    import as soon as it finishes. A later run can replay the journal to
+    continue with the outstanding targets without listing Cloudflare again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def exists(self) -> bool:
+        """Whether a journal from a previous run is available."""
+        return self.path.is_file() and self.path.stat().st_size > 0
+
+    def reset(self) -> None:
+        """Start a new, empty journal."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding="utf-8")
+
+    def _append(self, entries: list[JournalEntry]) -> None:
+        if not entries:
+            return
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(entry.model_dump_json() + "\n" for entry in entries)
+            f.flush()
+
+    def record_targets(self, targets: list[ImportTarget]) -> None:
+        """Record the resolved targets of a run."""
+        self._append([
+            JournalEntry(
+                kind="target",
+                resource_address=target.resource_address,
+                import_id=target.import_id,
+            )
+            for target in targets
+        ])
+
+    def record_results(self, results: list[ImportResult]) -> None:
+        """Record finished imports with every field of their results."""
+        self._append([
+            JournalEntry(kind="result", **result.model_dump()) for result in results
+        ])
+
+    def replay(self) -> JournalReplay:
+        """Reconstruct the previous run, the last result per resource wins.
+
+        A truncated last line, e.g. from a killed process, is ignored.
+        """
+        targets: dict[tuple[str, str], ImportTarget] = {}
+        results: dict[str, ImportResult] = {}
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                entry = JournalEntry.model_validate_json(line)
+                match entry.kind:
+                    case "target":
+                        targets[entry.resource_address, entry.import_id] = ImportTarget(
+                            resource_address=entry.resource_address,
+                            import_id=entry.import_id,
+                        )
+                    case "result":
+                        results[entry.resource_address] = ImportResult.model_validate(
+                            entry.model_dump(exclude={"kind"})
+                            | {"success": bool(entry.success)}
+                        )
+        return JournalReplay(
+            targets=list(targets.values()), results=list(results.values())
+        )
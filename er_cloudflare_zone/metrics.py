@@ -0,0 +1,221 @@
+"""Per-phase timing of a run, reported as JSON and as Prometheus textfile.
+
+Phases are timed with timed(), as context manager or decorator, into the
+metrics of the current run; the API clients' transports count every request.
+The phases of concurrent calls, e.g. of the async discovery, overlap, so a
+phase's seconds are the time spent in it summed over all its calls.
+"""
+
+import contextlib
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from external_resources_io.config import Config
+from pydantic import BaseModel, Field
+
+from .import_result import ImportResult
+from .tf_files import write_if_changed
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+METRIC_PREFIX = "er_cloudflare_zone"
+SLOWEST_RESULTS = 10
+
+
+class MetricsConfig(Config):
+    """Environment variables for the run report and metrics, empty to disable."""
+
+    run_report_file: str = Field("tmp/run-report.json", alias="RUN_REPORT_FILE")
+    metrics_file: str = Field("tmp/metrics.prom", alias="METRICS_FILE")
+
+
+class PhaseStats(BaseModel):
+    """Calls of a phase and the seconds they took."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class RunReport(BaseModel):
+    """Where the time of a run went, and how its imports ended."""
+
+    command: str
+    zone: str
+    started_at: float
+    seconds: float
+    phases: dict[str, PhaseStats]
+    api_requests: dict[str, int]
+    succeeded: int = 0
+    already_present: int = 0
+    failed: int = 0
+    # the imports that took longest, with the terraform call they were part of
+    slowest: list[ImportResult] = []
+
+
+@dataclass
+class Timing:
+    """Start and duration of a timed phase, the latter set once it is left."""
+
+    started_at: float
+    seconds: float = 0.0
+
+
+class RunMetrics:
+    """Thread-safe collector of the phases and API requests of one run."""
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.started_at = time.time()
+        self.phases: dict[str, PhaseStats] = {}
+        self.api_requests: Counter[int] = Counter()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases.setdefault(phase, PhaseStats()).add(seconds)
+
+    def record_api_request(self, status_code: int, seconds: float) -> None:
+        """Count an API request by response status, 429 retries included."""
+        with self._lock:
+            self.api_requests[status_code] += 1
+            self.phases.setdefault("api_request", PhaseStats()).add(seconds)
+
+    def report(self, zone: str, results: list[ImportResult] | None = None) -> RunReport:
+        results = results or []
+        with self._lock:
+            phases = {name: stats.model_copy() for name, stats in self.phases.items()}
+            api_requests = {
+                str(code): n for code, n in sorted(self.api_requests.items())
+            }
+        return RunReport(
+            command=self.command,
+            zone=zone,
+            started_at=self.started_at,
+            seconds=time.perf_counter() - self._start,
+            phases=phases,
+            api_requests=api_requests,
+            succeeded=sum(1 for r in results if r.success and not r.already_present),
+            already_present=sum(1 for r in results if r.already_present),
+            failed=sum(1 for r in results if not r.success),
+            slowest=sorted(
+                (r for r in results if r.duration_seconds is not None),
+                key=lambda r: -(r.duration_seconds or 0.0),
+            )[:SLOWEST_RESULTS],
+        )
+
+
+# metrics of the run in progress, a throwaway one outside of run_metrics
+_current = RunMetrics("")
+
+
+def current() -> RunMetrics:
+    return _current
+
+
+@contextlib.contextmanager
+def run_metrics(command: str) -> Generator[RunMetrics]:
+    """Collect the metrics of a run of the command, e.g. one zone of a batch."""
+    global _current  # ruff: ignore[global-statement]
+    saved, _current = _current, RunMetrics(command)
+    try:
+        yield _current
+    finally:
+        _current = saved
+
+
+@contextlib.contextmanager
+def timed(phase: str) -> Generator[Timing]:
+    """Time the phase into the current run, as context manager or decorator."""
+    timing = Timing(started_at=time.time())
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        _current.record(phase, timing.seconds)
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(report: RunReport) -> str:
+    """The report in the Prometheus textfile collector format."""
+    run = {"command": report.command, "zone": report.zone}
+    gauges: list[tuple[str, str, list[tuple[dict[str, str], float]]]] = [
+        ("run_seconds", "Wall time of the last run.", [(run, report.seconds)]),
+        (
+            "run_timestamp_seconds",
+            "Start of the last run, as Unix time.",
+            [(run, report.started_at)],
+        ),
+        (
+            "phase_seconds",
+            "Seconds spent in a phase in the last run, over all its calls.",
+            [(run | {"phase": name}, s.seconds) for name, s in report.phases.items()],
+        ),
+        (
+            "phase_calls",
+            "Calls of a phase in the last run.",
+            [(run | {"phase": name}, s.calls) for name, s in report.phases.items()],
+        ),
+        (
+            "phase_max_seconds",
+            "Longest call of a phase in the last run.",
+            [
+                (run | {"phase": name}, s.max_seconds)
+                for name, s in report.phases.items()
+            ],
+        ),
+        (
+            "api_requests",
+            "Cloudflare API requests in the last run, by response status.",
+            [(run | {"status": code}, n) for code, n in report.api_requests.items()],
+        ),
+        (
+            "imports",
+            "Resources of the last run, by import outcome.",
+            [
+                (run | {"outcome": "succeeded"}, report.succeeded),
+                (run | {"outcome": "already_present"}, report.already_present),
+                (run | {"outcome": "failed"}, report.failed),
+            ],
+        ),
+    ]
+    lines = []
+    for name, help_text, samples in gauges:
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} gauge"]
+        lines += [f"{full_name}{_labels(labels)} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def write_run_report(
+    metrics: RunMetrics, zone: str, results: list[ImportResult] | None = None
+) -> RunReport:
+    """Write the run report and metrics files, as configured."""
+    config = MetricsConfig()
+    report = metrics.report(zone, results)
+    if config.run_report_file:
+        write_if_changed(
+            Path(config.run_report_file), report.model_dump_json(indent=2) + "\n"
+        )
+    if config.metrics_file:
+        write_if_changed(Path(config.metrics_file), prometheus_text(report))
+    return report
@@ -0,0 +1,214 @@
+"""Plan targets from a diff of the input against the last applied one."""
+
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from external_resources_io.config import Config
+from pydantic import BaseModel, Field, ValidationError
+
+from .app_interface_input import CloudflareZone
+from .inputs import model_digest
+from .shards import PLAN_TARGETS_FILE
+from .tf_files import write_if_changed
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .app_interface_input import CloudflareDNSRecord, CloudflareRuleset
+    from .shards import ShardLayout
+
+logger = logging.getLogger(__name__)
+
+# changing any of these may touch every resource, e.g. through the zone ID
+ZONE_FIELDS = ("account_id", "name", "plan", "type")
+LAST_APPLIED = "last-applied"
+
+
+class PlanTargetsConfig(Config):
+    """Environment variables for the plan targets of generate-tf-config."""
+
+    applied_inputs_dir: str = Field("tmp/applied-inputs", alias="APPLIED_INPUTS_DIR")
+    plan_targets_file: str = Field("tmp/plan-targets.json", alias="PLAN_TARGETS_FILE")
+
+
+class PlanTargets(BaseModel):
+    """Resources a plan of the input needs to cover.
+
+    With full_plan, the whole module is planned and targets is empty;
+    otherwise only the targets are, none at all if the input is unchanged.
+    """
+
+    input_digest: str
+    applied_digest: str | None
+    full_plan: bool
+    targets: list[str] = []
+
+
+class AppliedInputs:
+    """Content-addressed store of zone inputs and a pointer to the applied one.
+
+    Inputs are stored under their digest; the pointer only moves once an
+    input is marked applied, so a failed apply is diffed against again. Only
+    the applied input and the one pending are kept, older ones are pruned.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def store(self, zone: CloudflareZone) -> str:
+        """Store the input as the pending one, returning its digest."""
+        digest = model_digest(zone)
+        input_file = self.path / f"{digest}.json"
+        if not input_file.exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            _write_atomic(input_file, zone.model_dump_json())
+        self._prune({digest, self._last_applied_digest()})
+        return digest
+
+    def _last_applied_digest(self) -> str | None:
+        try:
+            return (self.path / LAST_APPLIED).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+
+    def _prune(self, keep: set[str | None]) -> None:
+        """Delete the stored inputs but those with a digest to keep."""
+        for input_file in self.path.glob("*.json"):
+            if input_file.stem not in keep:
+                input_file.unlink(missing_ok=True)
+
+    def last_applied(self) -> tuple[str, CloudflareZone] | None:
+        """Digest and input last marked applied, None if unknown."""
+        digest = self._last_applied_digest()
+        if digest is None:
+            return None
+        try:
+            zone = CloudflareZone.model_validate_json(
+                (self.path / f"{digest}.json").read_bytes()
+            )
+        except FileNotFoundError:
+            return None
+        except ValidationError:
+            logger.warning("Ignoring corrupt applied input %s", digest)
+            return None
+        return digest, zone
+
+    def mark_applied(self, zone: CloudflareZone) -> str:
+        """Store the input and point at it as the applied one, pruning the rest."""
+        digest = self.store(zone)
+        _write_atomic(self.path / LAST_APPLIED, digest)
+        self._prune({digest})
+        return digest
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+def _changed_identifiers(
+    previous: Sequence[CloudflareDNSRecord | CloudflareRuleset],
+    current: Sequence[CloudflareDNSRecord | CloudflareRuleset],
+) -> list[str]:
+    """Identifiers of objects added, removed or changed, in input order."""
+    previous_by_id = {obj.identifier: obj for obj in previous}
+    current_by_id = {obj.identifier: obj for obj in current}
+    return [
+        identifier
+        for identifier, obj in current_by_id.items()
+        if previous_by_id.get(identifier) != obj
+    ] + [identifier for identifier in previous_by_id if identifier not in current_by_id]
+
+
+def plan_target_addresses(
+    previous: CloudflareZone, current: CloudflareZone
+) -> list[str] | None:
+    """Addresses of the resources changed between two inputs.
+
+    Returns:
+        The DNS record and ruleset addresses to target, None for a full plan
+        because zone-level fields changed.
+    """
+    if any(getattr(previous, f) != getattr(current, f) for f in ZONE_FIELDS):
+        return None
+    return [
+        f'cloudflare_dns_record.this["{identifier}"]'
+        for identifier in _changed_identifiers(
+            previous.dns_records, current.dns_records
+        )
+    ] + [
+        f'cloudflare_ruleset.this["{identifier}"]'
+        for identifier in _changed_identifiers(previous.rulesets, current.rulesets)
+    ]
+
+
+def plan_targets(applied_inputs: AppliedInputs, zone: CloudflareZone) -> PlanTargets:
+    """Plan targets of the input, a full plan if nothing was applied yet."""
+    digest = applied_inputs.store(zone)
+    applied = applied_inputs.last_applied()
+    if applied is None:
+        return PlanTargets(input_digest=digest, applied_digest=None, full_plan=True)
+    applied_digest, applied_zone = applied
+    targets = plan_target_addresses(applied_zone, zone)
+    return PlanTargets(
+        input_digest=digest,
+        applied_digest=applied_digest,
+        full_plan=targets is None,
+        targets=targets or [],
+    )
+
+
+def split_plan_targets(
+    targets: PlanTargets, layout: ShardLayout
+) -> tuple[PlanTargets, list[PlanTargets]]:
+    """The plan targets of the root module and of each shard.
+
+    A full plan is one of every module; otherwise each gets the addresses of
+    its own resources, the DNS records addressed within the shard module.
+    """
+    by_shard: dict[int | None, list[str]] = {}
+    for address in targets.targets:
+        by_shard.setdefault(layout.shard_of(address), []).append(address)
+    return targets.model_copy(update={"targets": by_shard.get(None, [])}), [
+        targets.model_copy(update={"targets": by_shard.get(index, [])})
+        for index in range(layout.count)
+    ]
+
+
+def create_plan_targets_file(
+    zone: CloudflareZone, layout: ShardLayout | None = None
+) -> PlanTargets:
+    """Write the plan targets of the input to PLAN_TARGETS_FILE.
+
+    With a shard layout, the file only targets the root module, and each
+    shard dir gets a plan-targets.json of its own.
+
+    Returns:
+        The plan targets of the whole input.
+    """
+    config = PlanTargetsConfig()
+    targets = plan_targets(AppliedInputs(Path(config.applied_inputs_dir)), zone)
+    if layout is None:
+        root_targets = targets
+    else:
+        root_targets, shard_targets = split_plan_targets(targets, layout)
+        for index, shard in enumerate(shard_targets):
+            write_if_changed(
+                layout.shard_dir(index) / PLAN_TARGETS_FILE,
+                shard.model_dump_json(indent=2),
+            )
+    write_if_changed(
+        Path(config.plan_targets_file), root_targets.model_dump_json(indent=2)
+    )
+    if targets.full_plan:
+        logger.info("Full plan needed for input %s", targets.input_digest)
+    else:
+        logger.info(
+            "%d plan targets changed since the applied input %s",
+            len(targets.targets),
+            targets.applied_digest,
+        )
+    return targets
@@ -0,0 +1,125 @@
+"""Opt-in CPU and memory profiling of a whole run.
+
+Set PROFILE to cpu, memory or cpu,memory to profile a run with cProfile,
+tracemalloc or both; the reports go to PROFILE_DIR. Without PROFILE nothing
+but the setting is read, the profilers are not even imported.
+"""
+
+import contextlib
+import logging
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from external_resources_io.config import Config
+from pydantic import Field
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileMode(StrEnum):
+    CPU = "cpu"
+    MEMORY = "memory"
+
+
+class ProfileConfig(Config):
+    """Environment variables for profiling a run."""
+
+    profile: str = Field("", alias="PROFILE")
+    profile_dir: str = Field("tmp/profile", alias="PROFILE_DIR")
+    profile_top: int = Field(30, alias="PROFILE_TOP")
+    profile_frames: int = Field(10, alias="PROFILE_FRAMES")
+
+    def modes(self) -> set[ProfileMode]:
+        """The profilers to run, from the comma separated PROFILE."""
+        return {
+            ProfileMode(mode.strip().lower())
+            for mode in self.profile.split(",")
+            if mode.strip()
+        }
+
+
+@contextlib.contextmanager
+def cpu_profile(name: str, config: ProfileConfig) -> Generator[None]:
+    """Profile with cProfile, writing NAME.pstats and the top functions.
+
+    The pstats file can be browsed with `python -m pstats` or snakeviz.
+    """
+    import cProfile  # ruff: ignore[import-outside-top-level]
+    import pstats  # ruff: ignore[import-outside-top-level]
+
+    profile_dir = Path(config.profile_dir)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_dir / f"{name}.pstats")
+        with (profile_dir / f"{name}.cpu.txt").open("w", encoding="utf-8") as f:
+            stats = pstats.Stats(profiler, stream=f).strip_dirs()
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(config.profile_top)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(config.profile_top)
+
+
+@contextlib.contextmanager
+def memory_profile(name: str, config: ProfileConfig) -> Generator[None]:
+    """Trace allocations, writing the peak and the top allocation sites.
+
+    The snapshot at the end of the run is dumped to NAME.tracemalloc for a
+    closer look with tracemalloc.Snapshot.load.
+    """
+    import tracemalloc  # ruff: ignore[import-outside-top-level]
+
+    profile_dir = Path(config.profile_dir)
+    tracemalloc.start(config.profile_frames)
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__)
+        ])
+        tracemalloc.stop()
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        snapshot.dump(str(profile_dir / f"{name}.tracemalloc"))
+        lines = [f"Peak traced memory: {peak / 2**20:.1f} MiB", "", "Top allocations:"]
+        lines += [
+            str(stat) for stat in snapshot.statistics("lineno")[: config.profile_top]
+        ]
+        lines += ["", "Top allocation tracebacks:"]
+        for stat in snapshot.statistics("traceback")[: config.profile_top]:
+            lines += ["", str(stat), *stat.traceback.format()]
+        (profile_dir / f"{name}.memory.txt").write_text(
+            "\n".join(lines) + "\n", encoding="utf-8"
+        )
+
+
+@contextlib.contextmanager
+def profiled(name: str) -> Generator[None]:
+    """Profile the run of an entry point as PROFILE says, if at all.
+
+    The reports are named after the entry point, e.g. import-tfstate.pstats.
+    """
+    config = ProfileConfig()
+    modes = config.modes()
+    if not modes:
+        yield
+        return
+    with contextlib.ExitStack() as stack:
+        # cProfile innermost, so the memory report is not in the CPU profile
+        if ProfileMode.MEMORY in modes:
+            stack.enter_context(memory_profile(name, config))
+        if ProfileMode.CPU in modes:
+            stack.enter_context(cpu_profile(name, config))
+        logger.info(
+            "Profiling %s (%s) into %s",
+            name,
+            ",".join(sorted(modes)),
+            config.profile_dir,
+        )
+        yield
@@ -0,0 +1,473 @@
+"""Reconcile a zone's DNS records through the batch API instead of terraform.
+
+Large DNS changes, e.g. migrating thousands of records, cost a terraform
+apply one API write per record. reconcile-dns diffs the configured DNS
+records against the live zone and writes the creates, updates and deletes in
+chunked transactions of the DNS batch endpoint, then brings the terraform
+state in line: deleted records are removed from it, created and adopted ones
+imported. Like terraform, it only deletes records the state manages.
+"""
+
+import itertools
+import logging
+import subprocess
+from dataclasses import dataclass, field
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from external_resources_io.log import setup_logging
+from external_resources_io.terraform import terraform_run
+from pydantic import BaseModel, Field, computed_field
+
+from .app_interface_input import CloudflareDNSRecord
+from .client import cloudflare_client
+from .discovery import list_dns_records_lean, resolve_zone_id
+from .drift import dns_record_changes, match_dns_records
+from .import_result import ImportResult, ImportTarget
+from .import_tfstate import ImportConfig, count_results, run_imports
+from .inputs import get_ai_input
+from .metrics import run_metrics, timed, write_run_report
+from .shards import DNS_RECORD_TYPE, ShardConfig, shard_environ
+from .tfstate import MAX_COMMAND_ADDRESSES, pull_state
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from cloudflare import Cloudflare
+
+    from .app_interface_input import CloudflareZone
+    from .shards import ShardLayout
+
+logger = logging.getLogger(__name__)
+
+
+class ReconcileConfig(ImportConfig):
+    """Environment variables for reconcile-dns.
+
+    The batch endpoint takes up to 200 changes per request on Free plans and
+    more on paid ones; raise DNS_BATCH_SIZE accordingly.
+    """
+
+    dns_batch_size: int = Field(200, alias="DNS_BATCH_SIZE", gt=0)
+    dns_reconcile_file: str = Field(
+        "tmp/dns-reconcile.json", alias="DNS_RECONCILE_FILE"
+    )
+
+
+class DNSAction(StrEnum):
+    # the batch endpoint applies them in this order within a transaction
+    DELETE = "delete"
+    PATCH = "patch"
+    POST = "post"
+
+
+class DNSChange(BaseModel):
+    """A write of one configured DNS record, and how it went once applied."""
+
+    action: DNSAction
+    identifier: str
+    # the live record, for posts only known once created
+    record_id: str | None = None
+    # the record for posts, the changed fields for patches
+    body: dict[str, Any] = {}
+    success: bool | None = None
+    error_message: str | None = None
+
+
+class DNSReconcileReport(BaseModel):
+    """The DNS changes of a reconcile and the state imports following them."""
+
+    zone_id: str
+    changes: list[DNSChange]
+    removed_from_state: list[str] = []
+    imports: list[ImportResult] = []
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def failed(self) -> bool:
+        return any(change.success is False for change in self.changes) or any(
+            not result.success for result in self.imports
+        )
+
+
+@dataclass(frozen=True)
+class DNSPlan:
+    """The changes to write and what the state must look like after them.
+
+    pairs are the configured records with a live counterpart, to be imported
+    unless managed already; stale the identifiers the state manages but the
+    configuration no longer has, to be removed from it; replaced those the
+    state manages with a record gone from the zone, to be removed from it
+    before the record adopted or created in its place is imported.
+    """
+
+    changes: list[DNSChange]
+    pairs: list[tuple[CloudflareDNSRecord, Any]]
+    stale: list[str]
+    replaced: list[str] = field(default_factory=list)
+
+
+def dns_record_address(identifier: str) -> str:
+    return f'cloudflare_dns_record.this["{identifier}"]'
+
+
+def record_body(record: CloudflareDNSRecord) -> dict[str, Any]:
+    """The configured record as the API creates it."""
+    return {
+        "name": record.name,
+        "type": record.type.upper(),
+        "ttl": record.ttl,
+    } | {
+        field: value
+        for field in ("content", "data", "priority", "proxied")
+        if (value := getattr(record, field)) is not None
+    }
+
+
+@timed("load_state_dns_records")
+def load_state_dns_records() -> dict[str, str]:
+    """IDs of the DNS records in the current module's state, by identifier.
+
+    No state, e.g. of a module never applied, manages no records; a state
+    that cannot be pulled is no empty state though, the reconcile would
+    create the managed records a second time.
+
+    Raises:
+        subprocess.CalledProcessError: If the state cannot be pulled.
+    """
+    state = pull_state()
+    return {
+        instance["index_key"]: instance["attributes"]["id"]
+        for resource in (state or {}).get("resources", [])
+        if resource.get("mode") == "managed"
+        and "module" not in resource
+        and (resource["type"], resource["name"]) == (DNS_RECORD_TYPE, "this")
+        for instance in resource["instances"]
+    }
+
+
+def load_managed_dns_records(layout: ShardLayout | None) -> dict[str, str]:
+    """IDs of the DNS records terraform manages, from the root or shard states.
+
+    The shards are initialized even on a dry run, their states are needed to
+    plan the changes at all; init changes no state.
+
+    Raises:
+        subprocess.CalledProcessError: If a shard cannot be initialized or any
+            state cannot be pulled; a partial view is never taken for all.
+    """
+    if layout is None:
+        return load_state_dns_records()
+    managed: dict[str, str] = {}
+    for index in range(layout.count):
+        with shard_environ(layout.shard_dir(index)):
+            terraform_run(["init", "-input=false"], dry_run=False)
+            managed |= load_state_dns_records()
+    return managed
+
+
+def plan_dns_changes(
+    records: list[CloudflareDNSRecord],
+    live_records: list[Any],
+    managed: dict[str, str],
+) -> DNSPlan:
+    """Diff the configured against the live records, as terraform would.
+
+    A managed record keeps its live record, the others are adopted only by a
+    live record with the same content (or data) and created otherwise. Live
+    records terraform manages under identifiers no longer configured are
+    deleted; unmanaged ones are left alone.
+    """
+    live_by_id = {live.id: live for live in live_records}
+    configured = {record.identifier for record in records}
+    pairs: list[tuple[CloudflareDNSRecord, Any]] = []
+    unpaired: list[CloudflareDNSRecord] = []
+    for record in records:
+        live = live_by_id.get(managed.get(record.identifier, ""))
+        if live is None:
+            unpaired.append(record)
+        else:
+            pairs.append((record, live))
+    managed_ids = set(managed.values())
+    # a record terraform does not manage is only adopted as it is, never
+    # overwritten because of its name
+    matched, added = match_dns_records(
+        unpaired,
+        [live for live in live_records if live.id not in managed_ids],
+        by_name_type=False,
+    )
+    pairs += matched
+    stale = [identifier for identifier in managed if identifier not in configured]
+    replaced = [
+        record.identifier
+        for record in records
+        if record.identifier in managed and managed[record.identifier] not in live_by_id
+    ]
+
+    changes = [
+        DNSChange(
+            action=DNSAction.DELETE,
+            identifier=identifier,
+            record_id=managed[identifier],
+        )
+        for identifier in stale
+        if managed[identifier] in live_by_id
+    ]
+    changes += [
+        DNSChange(
+            action=DNSAction.PATCH,
+            identifier=record.identifier,
+            record_id=live.id,
+            body={field: change.config for field, change in fields.items()}
+            | {"type": record.type.upper()},
+        )
+        for record, live in pairs
+        if (fields := dns_record_changes(record, live))
+    ]
+    changes += [
+        DNSChange(
+            action=DNSAction.POST,
+            identifier=record.identifier,
+            body=record_body(record),
+        )
+        for record in added
+    ]
+    return DNSPlan(changes=changes, pairs=pairs, stale=stale, replaced=replaced)
+
+
+def batches(changes: list[DNSChange], size: int) -> Iterator[list[DNSChange]]:
+    """Chunks of at most size changes, deletes first and posts last.
+
+    Across the chunks the changes keep the order the endpoint applies them in
+    within one, so e.g. a deleted CNAME makes room for the A record replacing it.
+    """
+    ordered = sorted(changes, key=lambda change: list(DNSAction).index(change.action))
+    for start in range(0, len(ordered), size):
+        yield ordered[start : start + size]
+
+
+@timed("dns_batch")
+def apply_batch(client: Cloudflare, zone_id: str, changes: list[DNSChange]) -> None:
+    """Write the changes in one transaction of the batch endpoint.
+
+    The IDs of the created records are set on their changes; the batch is all
+    or nothing, so any error fails all of them.
+    """
+    by_action = {
+        action: [change for change in changes if change.action == action]
+        for action in DNSAction
+    }
+    response = client.dns.records.batch(
+        zone_id=zone_id,
+        deletes=[
+            {"id": change.record_id or ""} for change in by_action[DNSAction.DELETE]
+        ],
+        patches=[
+            {"id": change.record_id, **change.body}  # type: ignore[misc]
+            for change in by_action[DNSAction.PATCH]
+        ],
+        posts=[change.body for change in by_action[DNSAction.POST]],  # type: ignore[misc]
+    )
+    created = (response.posts if response is not None else None) or []
+    for change, record in zip(by_action[DNSAction.POST], created, strict=False):
+        change.record_id = record.id
+    for change in changes:
+        change.success = True
+
+
+def apply_changes(
+    client: Cloudflare, zone_id: str, changes: list[DNSChange], batch_size: int
+) -> None:
+    """Apply the changes batch by batch, stopping at the first failed batch.
+
+    The changes of the failed batch and of those not attempted after it are
+    marked failed.
+    """
+    error_msg: str | None = None
+    for chunk in batches(changes, batch_size):
+        if error_msg is not None:
+            for change in chunk:
+                change.success = False
+                change.error_message = "Not applied, an earlier batch failed"
+            continue
+        try:
+            apply_batch(client, zone_id, chunk)
+        except Exception as e:
+            logger.exception("Failed to apply a batch of %d DNS changes", len(chunk))
+            error_msg = str(e)
+            for change in chunk:
+                change.success = False
+                change.error_message = error_msg
+        else:
+            logger.info("Applied a batch of %d DNS changes", len(chunk))
+
+
+def remove_from_state(
+    addresses: list[str], layout: ShardLayout | None, *, dry_run: bool
+) -> list[str]:
+    """Remove the addresses from the root or shard states, those removed.
+
+    Each state gets one terraform state rm per MAX_COMMAND_ADDRESSES addresses.
+    """
+    groups: dict[int | None, list[str]] = {}
+    for address in addresses:
+        shard = layout.shard_of(address) if layout is not None else None
+        groups.setdefault(shard, []).append(address)
+    removed: list[str] = []
+    for shard, shard_addresses in groups.items():
+        for chunk in itertools.batched(
+            shard_addresses, MAX_COMMAND_ADDRESSES, strict=False
+        ):
+            try:
+                if shard is None or layout is None:
+                    terraform_run(["state", "rm", *chunk], dry_run=dry_run)
+                else:
+                    with shard_environ(layout.shard_dir(shard)):
+                        terraform_run(["state", "rm", *chunk], dry_run=dry_run)
+            except subprocess.CalledProcessError as e:
+                logger.warning(
+                    "Failed to remove %d DNS records from the state: %s",
+                    len(chunk),
+                    e.stderr or e,
+                )
+                continue
+            removed += chunk
+    return removed
+
+
+def sync_state(
+    zone_id: str,
+    plan: DNSPlan,
+    config: ReconcileConfig,
+    layout: ShardLayout | None,
+) -> tuple[list[str], list[ImportResult]]:
+    """Bring the state in line with the applied changes.
+
+    Stale records are removed from it unless deleting them failed, and so
+    are the records whose managed live record is gone: left in the state
+    with their dead ID, their replacement would be skipped as imported and
+    created once more by the next apply. The configured records with a live
+    record, created or adopted, are then imported unless managed already.
+    Updated records are refreshed by the next plan.
+    """
+    kept = {
+        change.identifier
+        for change in plan.changes
+        if change.action == DNSAction.DELETE and not change.success
+    }
+    removed = remove_from_state(
+        [
+            dns_record_address(identifier)
+            for identifier in plan.stale
+            if identifier not in kept
+        ]
+        + [dns_record_address(identifier) for identifier in plan.replaced],
+        layout,
+        dry_run=config.dry_run,
+    )
+    patched = {
+        change.identifier: change.body
+        for change in plan.changes
+        if change.action == DNSAction.PATCH and change.success
+    }
+    targets = [
+        ImportTarget(
+            resource_address=dns_record_address(record.identifier),
+            import_id=f"{zone_id}/{live.id}",
+            api_object=live._asdict() | patched.get(record.identifier, {}),
+        )
+        for record, live in plan.pairs
+    ] + [
+        ImportTarget(
+            resource_address=dns_record_address(change.identifier),
+            import_id=f"{zone_id}/{change.record_id}",
+            api_object={"id": change.record_id, **change.body},
+        )
+        for change in plan.changes
+        if change.action == DNSAction.POST and change.success
+    ]
+    return removed, run_imports(
+        targets,
+        dry_run=config.dry_run,
+        mode=config.import_mode,
+        layout=layout,
+        retry=config.retry_settings(),
+    )
+
+
+def reconcile_dns(
+    client: Cloudflare,
+    zone: CloudflareZone,
+    config: ReconcileConfig,
+    layout: ShardLayout | None = None,
+) -> DNSReconcileReport:
+    """Write the zone's DNS changes through the batch API, then sync the state.
+
+    A dry run only plans the changes.
+
+    Raises:
+        ZoneNotFoundError: If the zone is not found in its account.
+        subprocess.CalledProcessError: If the managed records cannot be told,
+            see load_managed_dns_records.
+    """
+    zone_id = resolve_zone_id(client, zone, config.zone_index())
+    plan = plan_dns_changes(
+        zone.dns_records,
+        list(
+            list_dns_records_lean(client, zone_id, per_page=config.discovery_per_page)
+        ),
+        load_managed_dns_records(layout),
+    )
+    for action in DNSAction:
+        logger.info(
+            "DNS records to %s: %d",
+            action,
+            sum(1 for change in plan.changes if change.action == action),
+        )
+    if config.dry_run:
+        return DNSReconcileReport(zone_id=zone_id, changes=plan.changes)
+
+    apply_changes(client, zone_id, plan.changes, config.dns_batch_size)
+    removed, imports = sync_state(zone_id, plan, config, layout)
+    return DNSReconcileReport(
+        zone_id=zone_id,
+        changes=plan.changes,
+        removed_from_state=removed,
+        imports=imports,
+    )
+
+
+def main() -> None:
+    """Main entry point for reconcile-dns CLI."""
+    setup_logging()
+    config = ReconcileConfig()
+
+    with run_metrics("reconcile-dns") as metrics:
+        ai_input = get_ai_input()
+        report = reconcile_dns(
+            cloudflare_client(config.client_settings()),
+            ai_input.data,
+            config,
+            ShardConfig().layout(),
+        )
+    write_run_report(metrics, ai_input.provision.identifier, report.imports)
+    report_file = Path(config.dns_reconcile_file)
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    report_file.write_text(report.model_dump_json(indent=2), encoding="utf-8")
+    succeeded, already_present, failed = count_results(report.imports)
+    logger.info(
+        "Reconcile complete: %d DNS changes, %d imported, %d already present, "
+        "%d failed imports",
+        sum(1 for change in report.changes if change.success),
+        succeeded,
+        already_present,
+        failed,
+    )
+
+    if report.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
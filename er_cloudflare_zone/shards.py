@@ -0,0 +1,197 @@
+"""Optional sharding of a zone's DNS records over several terraform states."""
+
+import contextlib
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+
+from external_resources_io.config import Config
+from pydantic import BaseModel, Field
+
+from .app_interface_input import CloudflareDNSRecordShard
+from .tf_files import write_backend_tf, write_if_changed, write_tf_vars
+from .tfstate import parse_address
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+
+    from external_resources_io.input import AppInterfaceProvision
+
+    from .app_interface_input import AppInterfaceInput, CloudflareZone
+    from .import_result import ImportTarget
+
+logger = logging.getLogger(__name__)
+
+DNS_RECORD_TYPE = "cloudflare_dns_record"
+SHARD_MODULE_FILES = ("*.tf", ".terraform.lock.hcl")
+BACKEND_TF_FILE = "backend.tf"
+TF_VARS_FILE = "terraform.tfvars.json"
+PLAN_TARGETS_FILE = "plan-targets.json"
+MANIFEST_FILE = "manifest.json"
+
+
+class ShardConfig(Config):
+    """Environment variables for DNS record sharding."""
+
+    dns_record_shards: int = Field(0, alias="DNS_RECORD_SHARDS")
+    shards_dir: str = Field("shards", alias="SHARDS_DIR")
+    shard_module_dir: str = Field("module/shard", alias="SHARD_MODULE_DIR")
+
+    def layout(self) -> ShardLayout | None:
+        """The shard layout, None unless sharding is enabled."""
+        if self.dns_record_shards <= 0:
+            return None
+        return ShardLayout(Path(self.shards_dir), self.dns_record_shards)
+
+
+class ShardManifest(BaseModel):
+    """Shard working dirs and the DNS record identifiers each one manages."""
+
+    shards: dict[str, str]
+    dns_records: dict[str, list[str]]
+
+
+def shard_index(identifier: str, count: int) -> int:
+    """Stable shard of a DNS record, by the hash of its identifier."""
+    digest = hashlib.sha256(identifier.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+@dataclass(frozen=True)
+class ShardLayout:
+    """count DNS record shards in working dirs below shards_dir.
+
+    The zone, its subscription and its rulesets stay in the root module and
+    its state; the DNS records are spread over the shards, each a module of
+    its own with its own state, so shards plan and apply in parallel.
+    """
+
+    shards_dir: Path
+    count: int
+
+    @staticmethod
+    def shard_name(index: int) -> str:
+        return f"dns-{index}"
+
+    def shard_dir(self, index: int) -> Path:
+        return self.shards_dir / self.shard_name(index)
+
+    def generated_files(self) -> list[Path]:
+        """The files create_shards generates."""
+        return [self.shards_dir / MANIFEST_FILE] + [
+            self.shard_dir(index) / name
+            for index in range(self.count)
+            for name in (BACKEND_TF_FILE, TF_VARS_FILE)
+        ]
+
+    def shard_of(self, resource_address: str) -> int | None:
+        """Shard of a resource address, None for the root module's resources."""
+        resource_type, _, key = parse_address(resource_address)
+        if resource_type != DNS_RECORD_TYPE or not isinstance(key, str):
+            return None
+        return shard_index(key, self.count)
+
+    def partition(
+        self, targets: Iterable[ImportTarget]
+    ) -> dict[int | None, list[ImportTarget]]:
+        """Group targets by shard, None being the root module."""
+        groups: dict[int | None, list[ImportTarget]] = {}
+        for target in targets:
+            groups.setdefault(self.shard_of(target.resource_address), []).append(target)
+        return groups
+
+
+def root_zone(zone: CloudflareZone) -> CloudflareZone:
+    """The zone as managed by the root module, without its DNS records."""
+    return zone.model_copy(update={"dns_records": []})
+
+
+def shard_provision(
+    provision: AppInterfaceProvision, name: str
+) -> AppInterfaceProvision:
+    """The provision of a shard, its state key suffixed with the shard name."""
+    options = provision.module_provision_data
+    key = PurePosixPath(options.tf_state_key)
+    shard_key = key.with_name(f"{key.stem}-{name}{key.suffix}")
+    return provision.model_copy(
+        update={
+            "module_provision_data": options.model_copy(
+                update={"tf_state_key": str(shard_key)}
+            )
+        }
+    )
+
+
+def create_shards(
+    ai_input: AppInterfaceInput, layout: ShardLayout, module_dir: Path
+) -> ShardManifest:
+    """Write the working dir of every shard and the manifest listing them.
+
+    Each shard dir gets a copy of the shard module, its backend config and
+    the tfvars of its DNS records; files already up to date are left alone.
+    """
+    zone = ai_input.data
+    records: list[list[str]] = [[] for _ in range(layout.count)]
+    shard_records = [
+        CloudflareDNSRecordShard(account_id=zone.account_id, name=zone.name)
+        for _ in range(layout.count)
+    ]
+    for record in zone.dns_records:
+        index = shard_index(record.identifier, layout.count)
+        shard_records[index].dns_records.append(record)
+        records[index].append(record.identifier)
+
+    module_files = sorted(
+        path for pattern in SHARD_MODULE_FILES for path in module_dir.glob(pattern)
+    )
+    for index, shard in enumerate(shard_records):
+        shard_dir = layout.shard_dir(index)
+        for path in module_files:
+            write_if_changed(shard_dir / path.name, path.read_text(encoding="utf-8"))
+        write_backend_tf(
+            shard_provision(ai_input.provision, layout.shard_name(index)),
+            shard_dir / BACKEND_TF_FILE,
+        )
+        write_tf_vars(shard, shard_dir / TF_VARS_FILE)
+
+    manifest = ShardManifest(
+        shards={
+            layout.shard_name(i): str(layout.shard_dir(i)) for i in range(layout.count)
+        },
+        dns_records={
+            layout.shard_name(i): identifiers for i, identifiers in enumerate(records)
+        },
+    )
+    write_if_changed(
+        layout.shards_dir / MANIFEST_FILE, manifest.model_dump_json(indent=2)
+    )
+    logger.info(
+        "Split %d DNS records over %d shards", len(zone.dns_records), layout.count
+    )
+    return manifest
+
+
+def chdir_terraform_cmd(module_dir: Path) -> str:
+    """The configured terraform command, run in the module dir."""
+    # any -chdir of the configured command would point at the root module
+    words = [w for w in Config().terraform_cmd.split() if not w.startswith("-chdir")]
+    return " ".join([*words, f"-chdir={module_dir.resolve()}"])
+
+
+@contextlib.contextmanager
+def shard_environ(shard_dir: Path) -> Generator[None]:
+    """Point terraform and its files at a shard, restoring the environment after."""
+    saved = dict(os.environ)
+    os.environ.update(
+        TERRAFORM_CMD=chdir_terraform_cmd(shard_dir),
+        BACKEND_TF_FILE=str(shard_dir / BACKEND_TF_FILE),
+        TF_VARS_FILE=str(shard_dir / TF_VARS_FILE),
+    )
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
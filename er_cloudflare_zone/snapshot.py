@@ -0,0 +1,189 @@
+"""On-disk snapshots of discovered zones, shared between consecutive runs."""
+
+import functools
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from .discovery import Discovery, LeanDNSRecord, dns_record_index, ruleset_index
+from .inputs import model_digest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+    from .app_interface_input import CloudflareZone
+
+logger = logging.getLogger(__name__)
+
+# bump on any change of the snapshot format, older snapshots are then ignored
+SNAPSHOT_VERSION = 1
+
+
+@functools.cache
+def _record_adapter() -> TypeAdapter[Any]:
+    # the SDK types are only needed to restore a full snapshot, import lazily
+    from cloudflare.types.dns import RecordResponse  # ruff: ignore[import-outside-top-level]
+
+    return TypeAdapter(RecordResponse)
+
+
+def _ruleset_response(ruleset: dict[str, Any]) -> Any:  # ruff: ignore[any-type]
+    from cloudflare.types.rulesets import (  # ruff: ignore[import-outside-top-level]
+        RulesetListResponse,
+    )
+
+    return RulesetListResponse.model_validate(ruleset)
+
+
+class DiscoverySnapshot(BaseModel):
+    """A discovered zone as written to disk.
+
+    config_hash is the hash of the zone configuration the discovery was made
+    for, since e.g. a filtered DNS record lookup only lists configured records.
+    """
+
+    version: int
+    zone_id: str
+    config_hash: str
+    taken_at: float
+    lean: bool
+    dns_record_count: int | None
+    dns_records: list[dict[str, Any]]
+    rulesets: list[dict[str, Any]]
+
+
+def _dump(objects: Iterable[Any]) -> list[dict[str, Any]]:
+    return [
+        obj._asdict() if isinstance(obj, LeanDNSRecord) else obj.model_dump(mode="json")
+        for obj in objects
+    ]
+
+
+class DiscoverySnapshots:
+    """Discovered zones saved as versioned JSON files, one per zone ID.
+
+    A snapshot is reused for max_age seconds, as long as the zone's DNS record
+    count has not changed since; the count costs one minimal API call instead
+    of listing the whole zone again.
+    """
+
+    def __init__(
+        self,
+        snapshot_dir: Path,
+        max_age: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.snapshot_dir = snapshot_dir
+        self.max_age = max_age
+        self._clock = clock
+
+    def snapshot_file(self, zone_id: str) -> Path:
+        return self.snapshot_dir / f"{zone_id}.json"
+
+    def _write(self, snapshot: DiscoverySnapshot) -> None:
+        path = self.snapshot_file(snapshot.zone_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # concurrent runs must never read a partly written snapshot
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(snapshot.model_dump_json(), encoding="utf-8")
+        tmp.replace(path)
+
+    def _read(self, zone_id: str) -> DiscoverySnapshot | None:
+        try:
+            snapshot = DiscoverySnapshot.model_validate_json(
+                self.snapshot_file(zone_id).read_bytes()
+            )
+        except FileNotFoundError:
+            return None
+        except ValidationError:
+            logger.warning("Ignoring corrupt discovery snapshot of zone %s", zone_id)
+            return None
+        return snapshot if snapshot.version == SNAPSHOT_VERSION else None
+
+    def load(
+        self,
+        zone_id: str,
+        zone: CloudflareZone,
+        *,
+        lean: bool,
+        dns_record_count: Callable[[], int | None],
+    ) -> Discovery | None:
+        """The zone's snapshot if still fresh, None to discover the zone anew.
+
+        A lean snapshot only serves lean runs, a full one serves both.
+
+        Args:
+            zone_id: The zone ID the snapshot is keyed by.
+            zone: The zone configuration the snapshot must have been made for.
+            lean: Whether LeanDNSRecords do for the DNS records.
+            dns_record_count: Counts the zone's DNS records now.
+        """
+        snapshot = self._read(zone_id)
+        if (
+            snapshot is None
+            or snapshot.zone_id != zone_id
+            or snapshot.config_hash != model_digest(zone)
+            or (snapshot.lean and not lean)
+        ):
+            return None
+        age = self._clock() - snapshot.taken_at
+        if age > self.max_age:
+            return None
+        if (
+            snapshot.dns_record_count is not None
+            and (count := dns_record_count()) != snapshot.dns_record_count
+        ):
+            logger.info(
+                "Zone %s has %s DNS records instead of %d, discovering it anew",
+                zone_id,
+                count,
+                snapshot.dns_record_count,
+            )
+            return None
+        logger.info("Reusing discovery snapshot of zone %s (%.0fs old)", zone_id, age)
+        return Discovery(
+            zone_id=zone_id,
+            dns_record_by_key=dns_record_index(
+                LeanDNSRecord(**record)
+                if snapshot.lean
+                else _record_adapter().validate_python(record)
+                for record in snapshot.dns_records
+            ),
+            ruleset_by_key=ruleset_index(map(_ruleset_response, snapshot.rulesets)),
+        )
+
+    def save(
+        self,
+        discovery: Discovery,
+        zone: CloudflareZone,
+        *,
+        dns_record_count: int | None,
+    ) -> None:
+        """Write the discovery as the zone's snapshot.
+
+        Discoveries with a failed listing are never saved. Saving is best
+        effort: a failure is logged, the run goes on without a snapshot.
+        """
+        if discovery.dns_record_by_key is None or discovery.ruleset_by_key is None:
+            return
+        records = list(discovery.dns_record_by_key)
+        try:
+            snapshot = DiscoverySnapshot(
+                version=SNAPSHOT_VERSION,
+                zone_id=discovery.zone_id,
+                config_hash=model_digest(zone),
+                taken_at=self._clock(),
+                lean=any(isinstance(r, LeanDNSRecord) for r in records),
+                dns_record_count=dns_record_count,
+                dns_records=_dump(records),
+                rulesets=_dump(discovery.ruleset_by_key.values()),
+            )
+            self._write(snapshot)
+        except Exception:
+            logger.exception(
+                "Failed to save discovery snapshot of zone %s", discovery.zone_id
+            )
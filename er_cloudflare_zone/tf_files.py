@@ -0,0 +1,131 @@
+"""Deterministic terraform files, rewritten only when their content changes."""
+
+import filecmp
+import json
+import os
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, TypeGuard
+
+from external_resources_io.terraform import create_backend_tf_file
+from pydantic_core import to_json, to_jsonable_python
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from external_resources_io.input import AppInterfaceProvision
+    from pydantic import BaseModel
+
+
+def sort_keys(value: Any) -> Any:  # ruff: ignore[any-type]
+    """The JSON value with the keys of all its objects sorted, at any depth."""
+    match value:
+        case dict():
+            return {key: sort_keys(value[key]) for key in sorted(value)}
+        case list():
+            return [sort_keys(item) for item in value]
+    return value
+
+
+def canonical_json(value: Any, indent: int | None = None) -> str:  # ruff: ignore[any-type]
+    """A model or plain value as JSON with sorted keys, nested dicts included.
+
+    Free-form dicts, e.g. the data of a DNS record, keep the key order of the
+    input in the models; sorted, the same content always gives the same JSON.
+    """
+    return to_json(sort_keys(to_jsonable_python(value)), indent=indent).decode()
+
+
+def _identified(value: object) -> TypeGuard[list[Any]]:
+    """Whether the value is a list of objects with an identifier."""
+    return isinstance(value, list) and all(
+        hasattr(item, "identifier") for item in value
+    )
+
+
+def canonical_tf_vars(model: BaseModel) -> str:
+    """The model as canonical tfvars JSON.
+
+    Keys are sorted at every depth and lists of objects with an identifier,
+    e.g. the DNS records, are ordered by it; terraform keys them by
+    identifier anyway, so reordering the input never changes the document.
+    """
+    ordered = {
+        name: sorted(value, key=attrgetter("identifier"))
+        for name in type(model).model_fields
+        if _identified(value := getattr(model, name))
+    }
+    return canonical_json(model.model_copy(update=ordered), indent=2) + "\n"
+
+
+def iter_tf_vars(model: BaseModel) -> Iterator[str]:
+    """canonical_tf_vars in chunks, one per field and per list item.
+
+    Only one list item is serialized at a time, so the memory needed stays
+    flat however many DNS records the zone has, bar a reference per record
+    to put them in order.
+    """
+    yield "{"
+    for index, name in enumerate(sorted(type(model).model_fields)):
+        yield f"{',' if index else ''}\n  {json.dumps(name)}: "
+        value = getattr(model, name)
+        if not (_identified(value) and value):
+            yield canonical_json(value, indent=2).replace("\n", "\n  ")
+            continue
+        yield "["
+        for item_index, item in enumerate(sorted(value, key=attrgetter("identifier"))):
+            item_json = canonical_json(item, indent=2).replace("\n", "\n    ")
+            yield f"{',' if item_index else ''}\n    {item_json}"
+        yield "\n  ]"
+    yield "\n}\n"
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write the file unless it already holds the text, leaving it untouched then.
+
+    Returns:
+        Whether the file was written.
+    """
+    if path.is_file() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+    return True
+
+
+def write_chunks_if_changed(path: Path, chunks: Iterable[str]) -> bool:
+    """Stream the chunks into the file, unless it already holds the same.
+
+    The chunks go to a temp file first, compared to the file a block at a
+    time, so neither the text nor the file is ever held in memory whole.
+
+    Returns:
+        Whether the file was written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.writelines(chunks)
+    if path.is_file() and filecmp.cmp(tmp, path, shallow=False):
+        tmp.unlink()
+        return False
+    tmp.replace(path)
+    return True
+
+
+def write_tf_vars(model: BaseModel, path: Path) -> bool:
+    """Stream the model as canonical tfvars into the file, if they changed."""
+    return write_chunks_if_changed(path, iter_tf_vars(model))
+
+
+def write_backend_tf(provision: AppInterfaceProvision, path: Path) -> bool:
+    """Write the backend config of the provision, if it changed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rendered = path.with_name(f".{path.name}.{os.getpid()}.render")
+    try:
+        create_backend_tf_file(provision, rendered)
+        return write_if_changed(path, rendered.read_text(encoding="utf-8"))
+    finally:
+        rendered.unlink(missing_ok=True)
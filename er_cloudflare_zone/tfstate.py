@@ -0,0 +1,330 @@
+"""Synthesize terraform state straight from Cloudflare API objects."""
+
+import itertools
+import json
+import logging
+import re
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any
+
+from external_resources_io.terraform import terraform_run
+
+from .import_result import ImportResult, ImportTarget
+from .metrics import Timing, timed
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_SOURCE = "registry.terraform.io/cloudflare/cloudflare"
+PROVIDER = f'provider["{PROVIDER_SOURCE}"]'
+STATE_VERSION = 4
+# addresses per terraform command line, far below the argument list limit
+MAX_COMMAND_ADDRESSES = 2000
+
+_ADDRESS_RE = re.compile(r'^(?P<type>\w+)\.(?P<name>\w+)(?:\[(?P<key>"[^"]*"|\d+)\])?$')
+_DROP = object()
+
+
+def parse_address(resource_address: str) -> tuple[str, str, str | int | None]:
+    """Split a resource address into resource type, name and instance key."""
+    match = _ADDRESS_RE.match(resource_address)
+    if match is None:
+        msg = f"Unsupported resource address '{resource_address}'"
+        raise ValueError(msg)
+    key = match["key"]
+    index_key: str | int | None
+    if key is None:
+        index_key = None
+    elif key.startswith('"'):
+        index_key = json.loads(key)
+    else:
+        index_key = int(key)
+    return match["type"], match["name"], index_key
+
+
+def identity_attributes(resource_type: str, import_id: str) -> dict[str, Any]:
+    """Attributes the provider needs to read a resource back, from its import ID."""
+    match resource_type, import_id.split("/"):
+        case "cloudflare_zone", [zone_id]:
+            return {"id": zone_id}
+        case "cloudflare_zone_subscription", [zone_id]:
+            return {"id": zone_id, "zone_id": zone_id}
+        case "cloudflare_dns_record", [zone_id, record_id]:
+            return {"id": record_id, "zone_id": zone_id}
+        case "cloudflare_ruleset", ["zones", zone_id, ruleset_id]:
+            return {"id": ruleset_id, "zone_id": zone_id}
+    msg = f"Unsupported import ID '{import_id}' for {resource_type}"
+    raise ValueError(msg)
+
+
+def target_attributes(resource_type: str, target: ImportTarget) -> dict[str, Any]:
+    """Known attributes of a target: the listed API object plus its identity."""
+    match target.api_object:
+        case None:
+            attributes = {}
+        case dict():
+            attributes = dict(target.api_object)
+        case _:
+            attributes = target.api_object.model_dump(mode="json")
+    return attributes | identity_attributes(resource_type, target.import_id)
+
+
+def _conform_scalar(value: Any, type_: str) -> Any:  # ruff: ignore[any-type]
+    match type_:
+        case "string":
+            fits = isinstance(value, str)
+        case "number":
+            fits = isinstance(value, int | float) and not isinstance(value, bool)
+        case "bool":
+            fits = isinstance(value, bool)
+        case _:
+            # dynamic values are left for the provider to refresh
+            fits = False
+    return value if fits else _DROP
+
+
+def _conform(value: Any, type_: Any) -> Any:  # ruff: ignore[any-type]
+    """Shape a JSON value to a terraform type, _DROP if it does not fit."""
+    if value is None:
+        return None
+    match type_:
+        case ["list" | "set", element_type] if isinstance(value, list):
+            elements = [_conform(element, element_type) for element in value]
+            return _DROP if _DROP in elements else elements
+        case ["map", element_type] if isinstance(value, dict):
+            items = {k: _conform(v, element_type) for k, v in value.items()}
+            return _DROP if _DROP in items.values() else items
+        case ["object", dict() as attribute_types] if isinstance(value, dict):
+            return {
+                name: None
+                if (conformed := _conform(value.get(name), t)) is _DROP
+                else conformed
+                for name, t in attribute_types.items()
+            }
+        case str():
+            return _conform_scalar(value, type_)
+    return _DROP
+
+
+def _nested_type(nested: dict[str, Any]) -> Any:  # ruff: ignore[any-type]
+    """Convert a nested attribute schema to the equivalent terraform type."""
+    object_type = [
+        "object",
+        {
+            name: _attribute_type(schema)
+            for name, schema in nested["attributes"].items()
+        },
+    ]
+    match nested.get("nesting_mode", "single"):
+        case "list":
+            return ["list", object_type]
+        case "set":
+            return ["set", object_type]
+        case "map":
+            return ["map", object_type]
+    return object_type
+
+
+def _attribute_type(schema: dict[str, Any]) -> Any:  # ruff: ignore[any-type]
+    if "nested_type" in schema:
+        return _nested_type(schema["nested_type"])
+    return schema.get("type", "dynamic")
+
+
+def conform_attributes(
+    attributes: dict[str, Any], block: dict[str, Any]
+) -> dict[str, Any]:
+    """Keep the attributes matching the resource schema, null for the rest.
+
+    Listed API objects carry fields the provider models differently or not at
+    all; those are left null for the provider to fill in on the next refresh.
+    """
+    conformed = _conform(
+        attributes,
+        [
+            "object",
+            {
+                name: _attribute_type(schema)
+                for name, schema in block.get("attributes", {}).items()
+            },
+        ],
+    )
+    return {} if conformed is _DROP else conformed
+
+
+def load_resource_schemas() -> dict[str, Any]:
+    """Load the Cloudflare provider resource schemas, keyed by resource type."""
+    output = terraform_run(["providers", "schema", "-json"], dry_run=False)
+    return json.loads(output)["provider_schemas"][PROVIDER_SOURCE]["resource_schemas"]
+
+
+def pull_state() -> dict[str, Any] | None:
+    """Pull the current state, None if there is none yet."""
+    output = terraform_run(["state", "pull"], dry_run=False)
+    return json.loads(output) if output.strip() else None
+
+
+def build_state(
+    existing: dict[str, Any] | None,
+    targets: list[ImportTarget],
+    schemas: dict[str, Any],
+) -> dict[str, Any]:
+    """Merge synthesized resource instances into a state document.
+
+    The existing document is updated in place; instances already in it are
+    kept untouched. The serial is bumped so terraform accepts the push.
+    """
+    state: dict[str, Any] = existing or {
+        "version": STATE_VERSION,
+        "lineage": str(uuid.uuid4()),
+        "serial": 0,
+        "outputs": {},
+        "resources": [],
+        "check_results": None,
+    }
+    state["serial"] += 1
+    resources: dict[tuple[str, str], dict[str, Any]] = {
+        (resource["type"], resource["name"]): resource
+        for resource in state["resources"]
+        if resource.get("mode") == "managed" and "module" not in resource
+    }
+    present = {
+        (resource_type, name, instance.get("index_key"))
+        for (resource_type, name), resource in resources.items()
+        for instance in resource["instances"]
+    }
+    for target in targets:
+        resource_type, name, index_key = parse_address(target.resource_address)
+        schema = schemas[resource_type]
+        resource = resources.get((resource_type, name))
+        if resource is None:
+            resource = {
+                "mode": "managed",
+                "type": resource_type,
+                "name": name,
+                "provider": PROVIDER,
+                "instances": [],
+            }
+            resources[resource_type, name] = resource
+            state["resources"].append(resource)
+        if (resource_type, name, index_key) in present:
+            continue
+        instance: dict[str, Any] = {
+            "schema_version": schema.get("version", 0),
+            "attributes": conform_attributes(
+                target_attributes(resource_type, target), schema["block"]
+            ),
+            "sensitive_attributes": [],
+        }
+        if index_key is not None:
+            instance["index_key"] = index_key
+        resource["instances"].append(instance)
+    return state
+
+
+def verify_state(workdir: Path) -> dict[str, list[str]]:
+    """Run one refresh-only plan and collect the drift actions per address."""
+    plan_file = workdir / "refresh.tfplan"
+    terraform_run(
+        ["plan", "-refresh-only", "-input=false", f"-out={plan_file}"], dry_run=False
+    )
+    plan = json.loads(terraform_run(["show", "-json", str(plan_file)], dry_run=False))
+    return {
+        drift["address"]: drift["change"]["actions"]
+        for drift in plan.get("resource_drift", [])
+    }
+
+
+def remove_unverified(addresses: list[str]) -> None:
+    """Remove synthesized instances the provider could not read back.
+
+    Left in the state, a later run would skip them as imported already.
+    """
+    for chunk in itertools.batched(addresses, MAX_COMMAND_ADDRESSES, strict=False):
+        try:
+            terraform_run(["state", "rm", *chunk], dry_run=False)
+        except subprocess.CalledProcessError as e:
+            logger.warning(
+                "Failed to remove %d unverified resources from the state: %s",
+                len(chunk),
+                e.stderr or e,
+            )
+
+
+def _result(
+    target: ImportTarget, timing: Timing, error_msg: str | None = None
+) -> ImportResult:
+    return ImportResult(
+        resource_address=target.resource_address,
+        import_id=target.import_id,
+        success=error_msg is None,
+        error_message=error_msg,
+        started_at=timing.started_at,
+        duration_seconds=timing.seconds,
+    )
+
+
+def synthesize_state(
+    targets: list[ImportTarget], *, dry_run: bool = False
+) -> list[ImportResult]:
+    """Import all targets by pushing a synthesized state in one go.
+
+    The state instances are built from the listed API objects and shaped to
+    the provider schema, merged into the current state and pushed with one
+    `terraform state push`. A single refresh-only plan then verifies that the
+    provider can read every synthesized resource back.
+
+    Args:
+        targets: Resolved resource addresses and import IDs.
+        dry_run: If True, build the state but do not push it.
+
+    Returns:
+        One ImportResult per target.
+    """
+    if not targets:
+        return []
+
+    error_msg: str | None = None
+    with tempfile.TemporaryDirectory() as tmp, timed("synthesize_state") as timing:
+        workdir = Path(tmp)
+        state_file = workdir / "terraform.tfstate"
+        try:
+            state = build_state(pull_state(), targets, load_resource_schemas())
+            state_file.write_text(json.dumps(state), encoding="utf-8")
+            terraform_run(["state", "push", str(state_file)], dry_run=dry_run)
+            drift = {} if dry_run else verify_state(workdir)
+        except subprocess.CalledProcessError as e:
+            error_msg = str(e.stderr) if e.stderr else str(e)
+            logger.warning(
+                "Failed to synthesize state for %d resources: %s",
+                len(targets),
+                error_msg,
+            )
+    if error_msg is not None:
+        return [_result(target, timing, error_msg) for target in targets]
+
+    failed = {
+        target.resource_address
+        for target in targets
+        if "delete" in drift.get(target.resource_address, [])
+    }
+    if failed:
+        remove_unverified(sorted(failed))
+    results = [
+        _result(
+            target,
+            timing,
+            f"{target.resource_address} not found when refreshing the synthesized state"
+            if target.resource_address in failed
+            else None,
+        )
+        for target in targets
+    ]
+    logger.info(
+        "Synthesized state for %d resources, %d failed verification",
+        len(results),
+        sum(1 for result in results if not result.success),
+    )
+    return results
@@ -0,0 +1,100 @@
+"""httpx transports taking the rate limit of the Cloudflare API clients."""
+
+import logging
+import time
+
+import httpx
+
+from .client import ClientSettings, TokenBucket, rate_limited, retry_delay
+from .metrics import current
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Transport taking a bucket token per request and retrying 429s."""
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        bucket: TokenBucket,
+        settings: ClientSettings,
+    ) -> None:
+        self._transport = transport
+        self._bucket = bucket
+        self._settings = settings
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            start = time.perf_counter()
+            response = self._transport.handle_request(request)
+            current().record_api_request(
+                response.status_code, time.perf_counter() - start
+            )
+            if not rate_limited(response, attempt, self._settings):
+                return response
+            response.close()
+            delay = retry_delay(response, attempt, self._settings)
+            logger.warning("Rate limited by Cloudflare, retrying in %.1fs", delay)
+            self._bucket.pause(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async transport taking a bucket token per request and retrying 429s."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        bucket: TokenBucket,
+        settings: ClientSettings,
+    ) -> None:
+        self._transport = transport
+        self._bucket = bucket
+        self._settings = settings
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self._bucket.async_acquire()
+            start = time.perf_counter()
+            response = await self._transport.handle_async_request(request)
+            current().record_api_request(
+                response.status_code, time.perf_counter() - start
+            )
+            if not rate_limited(response, attempt, self._settings):
+                return response
+            await response.aclose()
+            delay = retry_delay(response, attempt, self._settings)
+            logger.warning("Rate limited by Cloudflare, retrying in %.1fs", delay)
+            self._bucket.pause(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _limits(settings: ClientSettings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_connections,
+    )
+
+
+def rate_limited_transport(
+    settings: ClientSettings, bucket: TokenBucket
+) -> RateLimitedTransport:
+    transport = httpx.HTTPTransport(http2=settings.http2, limits=_limits(settings))
+    return RateLimitedTransport(transport, bucket, settings)
+
+
+def async_rate_limited_transport(
+    settings: ClientSettings, bucket: TokenBucket
+) -> AsyncRateLimitedTransport:
+    transport = httpx.AsyncHTTPTransport(http2=settings.http2, limits=_limits(settings))
+    return AsyncRateLimitedTransport(transport, bucket, settings)
@@ -0,0 +1,119 @@
+"""Zone name to ID index of Cloudflare accounts, cached on disk."""
+
+import logging
+import os
+import time
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ValidationError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from cloudflare import AsyncCloudflare, Cloudflare
+
+logger = logging.getLogger(__name__)
+
+# largest page size the zones API accepts
+ZONES_PER_PAGE = 50
+
+
+class ZoneIndexCache(BaseModel):
+    """Cached zones of one account, as listed at listed_at (epoch seconds)."""
+
+    account_id: str
+    listed_at: float
+    zones: dict[str, str]
+
+
+def list_account_zones(client: Cloudflare, account_id: str) -> dict[str, str]:
+    """Names and IDs of all zones of an account, every page of them."""
+    return {
+        zone.name: zone.id
+        for zone in client.zones.list(
+            account={"id": account_id}, per_page=ZONES_PER_PAGE
+        )
+    }
+
+
+async def async_list_account_zones(
+    client: AsyncCloudflare, account_id: str
+) -> dict[str, str]:
+    """Names and IDs of all zones of an account with the async client."""
+    return {
+        zone.name: zone.id
+        async for zone in client.zones.list(
+            account={"id": account_id}, per_page=ZONES_PER_PAGE
+        )
+    }
+
+
+class ZoneIndex:
+    """Zone IDs by name of whole accounts, cached in one JSON file per account.
+
+    An account's zones are listed once and reused until the TTL expires, so
+    resolving many zones of an account takes a single paginated listing. A
+    name missing from the cached zones invalidates them: the account is
+    listed again before the zone is taken as not found.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._clock = clock
+
+    def cache_file(self, account_id: str) -> Path:
+        return self.cache_dir / f"{account_id}.json"
+
+    def cached(self, account_id: str) -> dict[str, str] | None:
+        """The account's cached zones, None if missing, expired or unreadable."""
+        try:
+            cache = ZoneIndexCache.model_validate_json(
+                self.cache_file(account_id).read_bytes()
+            )
+        except FileNotFoundError:
+            return None
+        except ValidationError:
+            logger.warning("Ignoring corrupt zone index cache of %s", account_id)
+            return None
+        if cache.account_id != account_id or self._clock() - cache.listed_at > self.ttl:
+            return None
+        return cache.zones
+
+    def store(self, account_id: str, zones: dict[str, str]) -> dict[str, str]:
+        """Cache the listed zones of an account, returning them."""
+        logger.info("Listed %d zones of account %s", len(zones), account_id)
+        cache = ZoneIndexCache(
+            account_id=account_id, listed_at=self._clock(), zones=zones
+        )
+        path = self.cache_file(account_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # concurrent runs must never read a partly written cache
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(cache.model_dump_json(), encoding="utf-8")
+        tmp.replace(path)
+        return zones
+
+    def lookup(self, client: Cloudflare, account_id: str, zone_name: str) -> str | None:
+        """The zone's ID, listing the account's zones if not cached."""
+        zones = self.cached(account_id)
+        if zones is None or zone_name not in zones:
+            zones = self.store(account_id, list_account_zones(client, account_id))
+        return zones.get(zone_name)
+
+    async def async_lookup(
+        self, client: AsyncCloudflare, account_id: str, zone_name: str
+    ) -> str | None:
+        """The zone's ID with the async client, see lookup."""
+        zones = self.cached(account_id)
+        if zones is None or zone_name not in zones:
+            zones = self.store(
+                account_id, await async_list_account_zones(client, account_id)
+            )
+        return zones.get(zone_name)
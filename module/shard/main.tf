@@ -0,0 +1,28 @@
+provider "cloudflare" {
+  # API token will be read from CLOUDFLARE_API_TOKEN environment variable
+}
+
+# the zone is managed by the root module, shards only look it up
+data "cloudflare_zone" "this" {
+  filter = {
+    account = {
+      id = var.account_id
+    }
+    name = var.name
+  }
+}
+
+resource "cloudflare_dns_record" "this" {
+  for_each = {
+    for record in var.dns_records : record.identifier => record
+  }
+
+  zone_id  = data.cloudflare_zone.this.id
+  name     = each.value.name
+  content  = each.value.content
+  type     = each.value.type
+  ttl      = each.value.ttl
+  proxied  = each.value.proxied
+  priority = each.value.priority
+  data     = each.value.data
+}
@@ -0,0 +1,12 @@
+variable "account_id" {
+  type = string
+}
+
+variable "dns_records" {
+  type    = list(object({ identifier = string, name = string, ttl = number, type = string, content = string, data = map(any), priority = number, proxied = bool }))
+  default = []
+}
+
+variable "name" {
+  type = string
+}
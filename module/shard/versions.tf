@@ -0,0 +1,10 @@
+terraform {
+  required_version = "1.13.4"
+
+  required_providers {
+    cloudflare = {
+      source  = "cloudflare/cloudflare"
+      version = "5.23.0"
+    }
+  }
+}
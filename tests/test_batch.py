@@ -0,0 +1,173 @@
+"""Tests for batch module."""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+import pytest
+
+from er_cloudflare_zone.batch import (
+    Command,
+    ZoneSummary,
+    collect_inputs,
+    main,
+    run_zone,
+)
+from er_cloudflare_zone.import_result import ImportResult
+
+IDENTIFIER = "cloudflare-zone-example"
+
+
+@pytest.fixture
+def module_dir(tmp_path: Path) -> Path:
+    module_dir = tmp_path / "module"
+    module_dir.mkdir()
+    (module_dir / "main.tf").write_text("# module\n", encoding="utf-8")
+    (module_dir / "backend.tf").write_text("# generated\n", encoding="utf-8")
+    return module_dir
+
+
+@pytest.fixture
+def input_file(tmp_path: Path, raw_input_data: dict) -> Path:
+    input_file = tmp_path / "inputs" / "example.json"
+    input_file.parent.mkdir()
+    input_file.write_text(json.dumps(raw_input_data), encoding="utf-8")
+    return input_file
+
+
+@pytest.fixture
+def mock_terraform_run() -> Iterator[MagicMock]:
+    with patch("er_cloudflare_zone.batch.terraform_run") as mock:
+        yield mock
+
+
+def test_collect_inputs(tmp_path: Path, input_file: Path) -> None:
+    """Test inputs are collected from a directory and from a manifest."""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# zones\n\ninputs/example.json\n", encoding="utf-8")
+
+    assert collect_inputs(input_file.parent) == [input_file]
+    assert collect_inputs(manifest) == [input_file]
+
+
+def test_run_zone_generate(tmp_path: Path, input_file: Path, module_dir: Path) -> None:
+    """Test the tf config is generated in the zone's own copy of the module."""
+    summary = run_zone(
+        Command.GENERATE_TF_CONFIG, input_file, tmp_path / "zones", module_dir
+    )
+
+    workdir = tmp_path / "zones" / IDENTIFIER
+    assert summary == ZoneSummary(input_file=str(input_file), workdir=str(workdir))
+    assert (workdir / "module" / "main.tf").exists()
+    assert "s3" in (workdir / "module" / "backend.tf").read_text(encoding="utf-8")
+    assert (
+        json.loads(
+            (workdir / "module" / "terraform.tfvars.json").read_text(encoding="utf-8")
+        )["name"]
+        == "example.com"
+    )
+    assert json.loads(
+        (workdir / "tmp" / "plan-targets.json").read_text(encoding="utf-8")
+    )["full_plan"]
+
+
+def test_run_zone_import(
+    tmp_path: Path,
+    input_file: Path,
+    module_dir: Path,
+    mock_terraform_run: MagicMock,
+) -> None:
+    """Test the import runs in the zone's working dir with its own files."""
+    seen: dict[str, str] = {}
+
+    def run_import(*_: object) -> list[ImportResult]:
+        seen["cwd"] = str(Path.cwd())
+        seen["journal"] = os.environ["IMPORT_JOURNAL_FILE"]
+        seen["terraform"] = os.environ["TERRAFORM_CMD"]
+        return [
+            ImportResult(resource_address="a", import_id="1", success=True),
+            ImportResult(resource_address="b", import_id="", success=False),
+        ]
+
+    with patch("er_cloudflare_zone.batch.run_import", side_effect=run_import):
+        summary = run_zone(
+            Command.IMPORT_TFSTATE, input_file, tmp_path / "zones", module_dir
+        )
+
+    assert (summary.succeeded, summary.failed, summary.ok) == (1, 1, False)
+    assert seen == {
+        "cwd": str(tmp_path / "zones" / IDENTIFIER),
+        "journal": "tmp/import-journal.jsonl",
+        "terraform": f"terraform -chdir={tmp_path / 'zones' / IDENTIFIER / 'module'}",
+    }
+    assert "IMPORT_JOURNAL_FILE" not in os.environ
+    mock_terraform_run.assert_called_once_with(["init", "-input=false"], dry_run=True)
+
+
+def test_run_zone_error(tmp_path: Path, module_dir: Path) -> None:
+    """Test a broken input is reported instead of raised."""
+    summary = run_zone(
+        Command.IMPORT_TFSTATE, tmp_path / "missing.json", tmp_path, module_dir
+    )
+
+    assert not summary.ok
+    assert summary.error is not None
+
+
+def test_main_fails_for_failed_zones(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    input_file: Path,
+    module_dir: Path,
+) -> None:
+    """Test the batch runs every zone and exits non-zero if one failed."""
+    (input_file.parent / "broken.json").write_text("{}", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ZONE_INDEX_DIR", "zone-index")
+
+    with (
+        patch("er_cloudflare_zone.batch.ProcessPoolExecutor", ThreadPoolExecutor),
+        patch("er_cloudflare_zone.batch.logger") as mock_logger,
+        pytest.raises(SystemExit) as exc_info,
+    ):
+        main([
+            "generate-tf-config",
+            str(input_file.parent),
+            "--jobs=1",
+            f"--workdir={tmp_path / 'zones'}",
+            f"--module-dir={module_dir}",
+        ])
+
+    assert exc_info.value.code == 1
+    mock_logger.error.assert_called_with(
+        "Failed zone: %s", str(input_file.parent / "broken.json")
+    )
+    assert (tmp_path / "zones" / IDENTIFIER / "module" / "backend.tf").exists()
+    # the workers share the zone index cache whatever their working dir
+    assert os.environ["ZONE_INDEX_DIR"] == str(tmp_path / "zone-index")
+
+
+def test_main_rejects_shared_identifiers(
+    tmp_path: Path, input_file: Path, module_dir: Path
+) -> None:
+    """Test inputs that would share a working dir fail the batch up front."""
+    (input_file.parent / "copy.json").write_bytes(input_file.read_bytes())
+
+    with (
+        patch("er_cloudflare_zone.batch.ProcessPoolExecutor") as mock_pool,
+        pytest.raises(ValueError, match=IDENTIFIER),
+    ):
+        main([
+            "generate-tf-config",
+            str(input_file.parent),
+            f"--workdir={tmp_path / 'zones'}",
+            f"--module-dir={module_dir}",
+        ])
+
+    mock_pool.assert_not_called()
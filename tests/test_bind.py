@@ -0,0 +1,73 @@
+"""Tests for bind module."""
+
+import pytest
+
+from er_cloudflare_zone.bind import BindRecord, parse_ttl, parse_zone
+
+EXPORT = """\
+;;
+;; Domain:     example.com.
+;; Exported:   2026-10-16 10:00:00
+;;
+;; SOA Record
+example.com	3600	IN	SOA	ns1.example.net. dns.example.net. (
+	2050000000 ; serial
+	10000 2400 604800 3600 )
+
+;; A Records
+a.example.com.	1	IN	A	192.0.2.1
+
+;; MX Records
+example.com.	300	IN	MX	10 mail.example.com.
+
+;; TXT Records
+example.com.	300	IN	TXT	"v=spf1 include:_spf.example.net; ~all"
+"""
+
+
+def test_parse_zone_export() -> None:
+    """Test an export is parsed including comments and multi-line entries."""
+    assert list(parse_zone(EXPORT.splitlines())) == [
+        BindRecord(
+            "example.com",
+            3600,
+            "SOA",
+            "ns1.example.net. dns.example.net. 2050000000 10000 2400 604800 3600",
+        ),
+        BindRecord("a.example.com", 1, "A", "192.0.2.1"),
+        BindRecord("example.com", 300, "MX", "10 mail.example.com."),
+        BindRecord(
+            "example.com", 300, "TXT", '"v=spf1 include:_spf.example.net; ~all"'
+        ),
+    ]
+
+
+def test_parse_zone_relative_names() -> None:
+    """Test relative and inherited owners, directives and TTL/class order."""
+    lines = [
+        "$ORIGIN example.com.",
+        "$TTL 1h",
+        "@ IN 300 A 192.0.2.1",
+        "www CNAME example.com.",
+        "    IN AAAA 2001:db8::1",
+    ]
+
+    assert list(parse_zone(lines)) == [
+        BindRecord("example.com", 300, "A", "192.0.2.1"),
+        BindRecord("www.example.com", 3600, "CNAME", "example.com."),
+        BindRecord("www.example.com", 3600, "AAAA", "2001:db8::1"),
+    ]
+
+
+def test_parse_zone_malformed() -> None:
+    """Test an entry without record data is rejected."""
+    with pytest.raises(ValueError, match="without type or data"):
+        list(parse_zone(["a.example.com. 300 IN A"]))
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"), [("300", 300), ("1h30m", 5400), ("1W", 604800)]
+)
+def test_parse_ttl(value: str, expected: int) -> None:
+    """Test TTLs with and without units."""
+    assert parse_ttl(value) == expected
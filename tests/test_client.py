@@ -0,0 +1,133 @@
+"""Tests for client module."""
+
+import asyncio
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+import httpx
+import pytest
+
+from er_cloudflare_zone.client import (
+    ClientSettings,
+    TokenBucket,
+    async_cloudflare_client,
+    cloudflare_client,
+    retry_after,
+)
+from er_cloudflare_zone.transport import AsyncRateLimitedTransport, RateLimitedTransport
+
+RATE = 2.0
+SETTINGS = ClientSettings(rate=RATE, burst=2, max_retries=2)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def mock_sleep() -> Iterator[MagicMock]:
+    with patch("er_cloudflare_zone.client.time.sleep") as mock:
+        yield mock
+
+
+def responses(*status_codes: int, headers: dict | None = None) -> httpx.MockTransport:
+    """Mock transport answering with the given status codes in turn."""
+    codes = iter(status_codes)
+    return httpx.MockTransport(lambda _: httpx.Response(next(codes), headers=headers))
+
+
+def test_token_bucket_burst_then_rate() -> None:
+    """Test the burst is served at once and further tokens at the rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(RATE, 2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now = 1.5
+    assert bucket.reserve() == pytest.approx(0.0)
+
+
+def test_token_bucket_pause() -> None:
+    """Test a pause holds back tokens for its duration."""
+    clock = FakeClock()
+    bucket = TokenBucket(RATE, 2, clock=clock)
+
+    bucket.pause(3)
+
+    assert bucket.reserve() == pytest.approx(3.5)
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, None),
+        ({"Retry-After": "7"}, 7.0),
+        ({"Retry-After": "Thu, 01 Jan 1970 00:00:00 GMT"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+    ],
+)
+def test_retry_after(headers: dict, expected: float | None) -> None:
+    """Test Retry-After in seconds and as HTTP date."""
+    assert retry_after(httpx.Response(429, headers=headers)) == expected
+
+
+def test_transport_retries_rate_limited_requests(mock_sleep: MagicMock) -> None:
+    """Test 429s are retried after at least the Retry-After delay."""
+    transport = RateLimitedTransport(
+        responses(429, 200, headers={"Retry-After": "10"}),
+        TokenBucket(RATE, 2),
+        SETTINGS,
+    )
+
+    with httpx.Client(transport=transport) as client:
+        response = client.get("https://api.cloudflare.com/client/v4/zones")
+
+    assert response.status_code == httpx.codes.OK
+    assert max(c.args[0] for c in mock_sleep.call_args_list) >= 10  # ruff: ignore[magic-value-comparison]
+
+
+def test_transport_gives_up_after_max_retries(mock_sleep: MagicMock) -> None:
+    """Test the last 429 is returned once the retries are used up."""
+    transport = RateLimitedTransport(
+        responses(429, 429, 429, 200), TokenBucket(RATE, 2), SETTINGS
+    )
+
+    with httpx.Client(transport=transport) as client:
+        response = client.get("https://api.cloudflare.com/client/v4/zones")
+
+    assert response.status_code == httpx.codes.TOO_MANY_REQUESTS
+    assert mock_sleep.call_count == SETTINGS.max_retries + 1
+
+
+def test_async_transport_retries_rate_limited_requests() -> None:
+    """Test the async transport retries 429s too."""
+    transport = AsyncRateLimitedTransport(
+        responses(429, 200, headers={"Retry-After": "0"}),
+        TokenBucket(1000, 10),
+        SETTINGS,
+    )
+
+    async def get() -> httpx.Response:
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://api.cloudflare.com/client/v4/zones")
+
+    with patch("er_cloudflare_zone.client.random.uniform", return_value=0.0):
+        response = asyncio.run(get())
+
+    assert response.status_code == httpx.codes.OK
+
+
+def test_clients_leave_retries_to_the_transport(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the SDK does not retry what the transport gave up on."""
+    monkeypatch.setenv("CLOUDFLARE_API_TOKEN", "test-token")
+
+    assert cloudflare_client(SETTINGS).max_retries == 0
+    assert async_cloudflare_client(SETTINGS).max_retries == 0
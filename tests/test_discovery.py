@@ -0,0 +1,274 @@
+"""Tests for discovery module."""
+
+import asyncio
+from math import ceil
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+from unittest.mock import AsyncMock, MagicMock, call
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+import pytest
+
+from er_cloudflare_zone.app_interface_input import CloudflareZone
+from er_cloudflare_zone.discovery import (
+    MIN_PER_PAGE,
+    DNSLookup,
+    LeanDNSRecord,
+    ZoneNotFoundError,
+    async_discover,
+    async_list_dns_records,
+    list_dns_records_lean,
+)
+
+
+class AsyncIter:
+    """Async iterable over a fixed list, like an SDK async paginator."""
+
+    def __init__(self, items: Iterable[Any]) -> None:
+        self.items = list(items)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        for item in self.items:
+            yield item
+
+
+def record(name: str) -> SimpleNamespace:
+    return SimpleNamespace(id=f"id-{name}", name=name, type="A", content="192.0.2.1")
+
+
+def page(
+    records: list[SimpleNamespace],
+    total_pages: int | None,
+    total_count: int | None = None,
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        result=records,
+        result_info=SimpleNamespace(total_pages=total_pages, total_count=total_count),
+    )
+
+
+ZONE_RECORDS = [record(f"{name}.example.com") for name in ("a", "b", "c")]
+
+
+def list_dns_records(**kwargs: Any) -> SimpleNamespace:  # ruff: ignore[any-type]
+    """Fake DNS records list endpoint, paginated or filtered by name/type."""
+    if "name" in kwargs:
+        matching = [r for r in ZONE_RECORDS if r.name == kwargs["name"]["exact"]]
+        return page(matching, 1, len(matching))
+    per_page = kwargs["per_page"]
+    start = (kwargs.get("page", 1) - 1) * per_page
+    return page(
+        ZONE_RECORDS[start : start + per_page],
+        ceil(len(ZONE_RECORDS) / per_page),
+        len(ZONE_RECORDS),
+    )
+
+
+@pytest.fixture
+def zone() -> CloudflareZone:
+    return CloudflareZone.model_validate({
+        "account_id": "acct-123",
+        "name": "example.com",
+        "dns_records": [
+            {"identifier": "a", "name": "a.example.com", "type": "A", "ttl": 1}
+        ],
+        "rulesets": [
+            {
+                "identifier": "redirects",
+                "name": "redirects",
+                "kind": "zone",
+                "phase": "http_request_dynamic_redirect",
+            }
+        ],
+    })
+
+
+@pytest.fixture
+def client() -> MagicMock:
+    client = MagicMock()
+    client.zones.list.return_value = AsyncIter([
+        SimpleNamespace(id="zone-123", name="example.com")
+    ])
+    client.dns.records.list = AsyncMock(side_effect=list_dns_records)
+    client.rulesets.list.return_value = AsyncIter([
+        SimpleNamespace(
+            id="ruleset-789", name="redirects", phase="http_request_dynamic_redirect"
+        )
+    ])
+    return client
+
+
+def test_async_discover(client: MagicMock, zone: CloudflareZone) -> None:
+    """Test records of all pages and rulesets end up in the lookup indexes."""
+    discovery = asyncio.run(
+        async_discover(
+            client, zone, concurrency=2, per_page=1, dns_lookup=DNSLookup.FULL
+        )
+    )
+
+    assert discovery.zone_id == "zone-123"
+    assert discovery.dns_record_by_key is not None
+    assert {record.id for record in discovery.dns_record_by_key} == {
+        "id-a.example.com",
+        "id-b.example.com",
+        "id-c.example.com",
+    }
+    assert discovery.ruleset_by_key is not None
+    assert (
+        discovery.ruleset_by_key["redirects", "http_request_dynamic_redirect"].id
+        == "ruleset-789"
+    )
+    assert sorted(
+        kwargs.get("page", 1) for _, kwargs in client.dns.records.list.call_args_list
+    ) == [1, 2, 3]
+
+
+def test_async_discover_auto_filtered_lookup(
+    client: MagicMock, zone: CloudflareZone
+) -> None:
+    """Test a sparse configuration is looked up with filtered queries."""
+    discovery = asyncio.run(async_discover(client, zone, per_page=1))
+
+    assert discovery.dns_record_by_key is not None
+    assert [r.id for r in discovery.dns_record_by_key] == ["id-a.example.com"]
+    assert client.dns.records.list.call_args_list == [
+        call(zone_id="zone-123", per_page=MIN_PER_PAGE),
+        call(
+            zone_id="zone-123",
+            per_page=1,
+            page=1,
+            name={"exact": "a.example.com"},
+            type="A",
+        ),
+    ]
+
+
+def test_async_discover_auto_full_lookup(
+    client: MagicMock, zone: CloudflareZone
+) -> None:
+    """Test a configuration covering much of the zone falls back to a full scan."""
+    discovery = asyncio.run(async_discover(client, zone, per_page=100))
+
+    assert discovery.dns_record_by_key is not None
+    assert len(discovery.dns_record_by_key) == len(ZONE_RECORDS)
+    assert client.dns.records.list.call_args_list == [
+        call(zone_id="zone-123", per_page=MIN_PER_PAGE),
+        call(zone_id="zone-123", per_page=100, page=1),
+    ]
+
+
+def test_async_discover_zone_not_found(client: MagicMock, zone: CloudflareZone) -> None:
+    """Test ZoneNotFoundError when the zone is not listed."""
+    client.zones.list.return_value = AsyncIter([])
+
+    with pytest.raises(ZoneNotFoundError, match=r"example\.com"):
+        asyncio.run(async_discover(client, zone))
+
+
+def test_async_discover_listing_failure(
+    client: MagicMock, zone: CloudflareZone
+) -> None:
+    """Test a failed listing leaves its index unset."""
+    client.dns.records.list = AsyncMock(side_effect=RuntimeError("boom"))
+
+    discovery = asyncio.run(async_discover(client, zone))
+
+    assert discovery.dns_record_by_key is None
+    assert discovery.ruleset_by_key is not None
+
+
+def test_async_list_dns_records_without_page_count() -> None:
+    """Test pages are walked one by one when the page count is unknown."""
+    client = MagicMock()
+    client.dns.records.list = AsyncMock(
+        side_effect=[
+            page([record("a.example.com")], None),
+            page([record("b.example.com")], None),
+            page([], None),
+        ]
+    )
+
+    records, calls = asyncio.run(
+        async_list_dns_records(
+            client, "zone-123", per_page=1, semaphore=asyncio.Semaphore(1)
+        )
+    )
+
+    assert [r.name for r in records] == ["a.example.com", "b.example.com"]
+    assert calls == client.dns.records.list.await_count
+
+
+def test_async_discover_export_lookup(client: MagicMock, zone: CloudflareZone) -> None:
+    """Test only configured records found in the export are listed for IDs."""
+    zone.dns_records.append(
+        zone.dns_records[0].model_copy(
+            update={"identifier": "d", "name": "d.example.com"}
+        )
+    )
+    response = client.dns.records.with_streaming_response.export.return_value
+    response.__aenter__.return_value.iter_lines = MagicMock(
+        return_value=AsyncIter(
+            f"{r.name}.\t1\tIN\tA\t{r.content}" for r in ZONE_RECORDS
+        )
+    )
+
+    discovery = asyncio.run(
+        async_discover(client, zone, per_page=1, dns_lookup=DNSLookup.EXPORT)
+    )
+
+    assert discovery.dns_record_by_key is not None
+    assert [r.id for r in discovery.dns_record_by_key] == ["id-a.example.com"]
+    client.dns.records.with_streaming_response.export.assert_called_once_with(
+        zone_id="zone-123"
+    )
+    assert client.dns.records.list.call_args_list == [
+        call(
+            zone_id="zone-123",
+            per_page=1,
+            page=1,
+            name={"exact": "a.example.com"},
+            type="A",
+        ),
+    ]
+
+
+def raw_page(names: list[str], total_pages: int | None) -> MagicMock:
+    response = MagicMock()
+    response.json.return_value = {
+        "result": [
+            {
+                "id": f"id-{name}",
+                "name": name,
+                "type": "A",
+                "content": "192.0.2.1",
+                "proxied": False,
+                "meta": {},
+            }
+            for name in names
+        ],
+        "result_info": {"total_pages": total_pages},
+    }
+    return response
+
+
+@pytest.mark.parametrize("total_pages", [2, None])
+def test_list_dns_records_lean(total_pages: int | None) -> None:
+    """Test raw pages are walked and reduced to the lean fields."""
+    client = MagicMock()
+    client.dns.records.with_raw_response.list.side_effect = [
+        raw_page(["a.example.com", "b.example.com"], total_pages),
+        raw_page(["c.example.com"], total_pages),
+    ]
+
+    records = list(list_dns_records_lean(client, "zone-123", per_page=2))
+
+    assert records == [
+        LeanDNSRecord(f"id-{name}", name, "A", "192.0.2.1", None, proxied=False)
+        for name in ("a.example.com", "b.example.com", "c.example.com")
+    ]
+    assert client.dns.records.with_raw_response.list.call_args_list == [
+        call(zone_id="zone-123", per_page=2, page=1),
+        call(zone_id="zone-123", per_page=2, page=2),
+    ]
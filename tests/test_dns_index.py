@@ -0,0 +1,92 @@
+"""Tests for dns_index module."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from er_cloudflare_zone.app_interface_input import CloudflareDNSRecord
+from er_cloudflare_zone.dns_index import DNSRecordIndex, canonical_content, data_hash
+
+
+def live(
+    record_id: str,
+    name: str,
+    type_: str,
+    content: str | None = None,
+    data: dict | None = None,
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=record_id, name=name, type=type_, content=content, data=data
+    )
+
+
+def configured(
+    name: str, type_: str, content: str | None = None, data: dict | None = None
+) -> CloudflareDNSRecord:
+    return CloudflareDNSRecord(
+        identifier="record", name=name, ttl=1, type=type_, content=content, data=data
+    )
+
+
+@pytest.mark.parametrize(
+    ("type_", "content", "expected"),
+    [
+        ("AAAA", "2001:0DB8:0000::0001", "2001:db8::1"),
+        ("A", "not-an-ip", "not-an-ip"),
+        ("CNAME", "Target.Example.COM.", "target.example.com"),
+        ("TXT", '"v=spf1 " "-all"', "v=spf1 -all"),
+        ("TXT", '"say \\"hi\\""', 'say "hi"'),
+        ("TXT", "v=spf1 -all", "v=spf1 -all"),
+    ],
+)
+def test_canonical_content(type_: str, content: str, expected: str) -> None:
+    """Test content formatting differences are normalized per type."""
+    assert canonical_content(type_, content) == expected
+
+
+def test_data_hash_is_canonical() -> None:
+    """Test key order, nulls and float integers do not change the hash."""
+    assert data_hash({"port": 443, "weight": 1.0, "target": "a", "x": None}) == (
+        data_hash({"target": "a", "weight": 1, "port": 443})
+    )
+
+
+def test_lookup_by_canonical_content() -> None:
+    """Test a record differing only in formatting is found."""
+    index = DNSRecordIndex([live("1", "www.example.com", "CNAME", "example.com")])
+
+    assert [
+        r.id
+        for r in index.lookup(configured("WWW.example.com.", "cname", "Example.com."))
+    ] == ["1"]
+
+
+def test_lookup_by_data() -> None:
+    """Test a data-based record is found by its data."""
+    data = {"flags": 0, "tag": "issue", "value": "letsencrypt.org"}
+    index = DNSRecordIndex([
+        live("1", "example.com", "CAA", '0 issue "letsencrypt.org"', data),
+        live(
+            "2",
+            "example.com",
+            "CAA",
+            '0 issue "pki.goog"',
+            data | {"value": "pki.goog"},
+        ),
+    ])
+
+    assert [
+        r.id for r in index.lookup(configured("example.com", "CAA", data=data))
+    ] == ["1"]
+
+
+def test_lookup_keeps_ambiguous_matches() -> None:
+    """Test records sharing a canonical key are all returned."""
+    index = DNSRecordIndex([
+        live("1", "example.com", "TXT", '"v=spf1 -all"'),
+        live("2", "example.com", "TXT", "v=spf1 -all"),
+    ])
+
+    assert len(index) == len(
+        index.lookup(configured("example.com", "TXT", "v=spf1 -all"))
+    )
@@ -0,0 +1,260 @@
+"""Tests for drift module."""
+
+import json
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+import pytest
+
+from er_cloudflare_zone.app_interface_input import (
+    AppInterfaceInput,
+    CloudflareDNSRecord,
+    CloudflareRuleset,
+)
+from er_cloudflare_zone.discovery import LeanDNSRecord
+from er_cloudflare_zone.drift import (
+    EXIT_DRIFT,
+    FieldChange,
+    ObjectChange,
+    ObjectChanges,
+    diff_dns_records,
+    diff_rulesets,
+    main,
+    matches,
+)
+
+
+def dns_record(
+    identifier: str, name: str, content: str, **kwargs: object
+) -> CloudflareDNSRecord:
+    return CloudflareDNSRecord.model_validate({
+        "identifier": identifier,
+        "name": name,
+        "type": "A",
+        "ttl": 1,
+        "content": content,
+        **kwargs,
+    })
+
+
+def live_record(id_: str, name: str, content: str, ttl: int = 1) -> LeanDNSRecord:
+    return LeanDNSRecord(id_, name, "A", content, None, ttl=ttl, proxied=False)
+
+
+def ruleset(identifier: str, name: str, expression: str) -> CloudflareRuleset:
+    return CloudflareRuleset.model_validate({
+        "identifier": identifier,
+        "kind": "zone",
+        "name": name,
+        "phase": "http_request_dynamic_redirect",
+        "rules": [{"action": "redirect", "expression": expression}],
+    })
+
+
+def live_ruleset(id_: str, name: str, kind: str = "zone") -> SimpleNamespace:
+    return SimpleNamespace(
+        id=id_, name=name, kind=kind, phase="http_request_dynamic_redirect"
+    )
+
+
+def live_rules(expression: str) -> SimpleNamespace:
+    rule = MagicMock()
+    rule.model_dump.return_value = {
+        "id": "rule-1",
+        "action": "redirect",
+        "expression": expression,
+        "enabled": True,
+    }
+    return SimpleNamespace(description="", rules=[rule])
+
+
+@pytest.mark.parametrize(
+    ("config", "live", "expected"),
+    [
+        (None, "anything", True),
+        ({"a": 1}, {"a": 1, "b": 2}, True),
+        ({"a": 1}, {"a": 2}, False),
+        ([{"a": 1}], [{"a": 1, "id": "x"}], True),
+        ([{"a": 1}], [{"a": 1}, {"a": 2}], False),
+        (True, 1, False),
+        (300, 300, True),
+    ],
+)
+def test_matches(config: object, live: object, *, expected: bool) -> None:
+    """Test the live value only needs what the configured value sets."""
+    assert matches(config, live) is expected
+
+
+def test_diff_dns_records() -> None:
+    """Test records are told added, changed, removed or unmanaged."""
+    records = [
+        dns_record("same", "same.example.com", "192.0.2.1"),
+        dns_record("ttl", "ttl.example.com", "192.0.2.1", ttl=300),
+        dns_record("moved", "moved.example.com", "192.0.2.2"),
+        dns_record("new", "new.example.com", "192.0.2.1"),
+    ]
+    live = [
+        live_record("id-same", "Same.example.com.", "192.0.2.1"),
+        live_record("id-ttl", "ttl.example.com", "192.0.2.1"),
+        live_record("id-moved", "moved.example.com", "192.0.2.1"),
+        live_record("id-stale", "stale.example.com", "192.0.2.1"),
+        live_record("id-manual", "manual.example.com", "192.0.2.1"),
+    ]
+    applied = [dns_record("stale", "stale.example.com", "192.0.2.1")]
+
+    assert diff_dns_records(records, live, applied) == ObjectChanges(
+        added=["new"],
+        changed=[
+            ObjectChange(
+                identifier="ttl",
+                live_id="id-ttl",
+                fields={"ttl": FieldChange(config=300, live=1)},
+            ),
+            ObjectChange(
+                identifier="moved",
+                live_id="id-moved",
+                fields={"content": FieldChange(config="192.0.2.2", live="192.0.2.1")},
+            ),
+        ],
+        removed=["id-stale"],
+        unmanaged=["id-manual"],
+    )
+
+
+def test_diff_dns_records_no_drift() -> None:
+    """Test a zone matching its configuration has not drifted."""
+    changes = diff_dns_records(
+        [dns_record("a", "a.example.com", "192.0.2.1")],
+        [live_record("id-a", "a.example.com", "192.0.2.1")],
+    )
+
+    assert not changes.drifted
+
+
+def test_diff_dns_records_unmanaged() -> None:
+    """Test live records never applied are no drift."""
+    changes = diff_dns_records(
+        [dns_record("a", "a.example.com", "192.0.2.1")],
+        [
+            live_record("id-a", "a.example.com", "192.0.2.1"),
+            live_record("id-manual", "manual.example.com", "192.0.2.9"),
+        ],
+        [dns_record("a", "a.example.com", "192.0.2.1")],
+    )
+
+    assert changes.unmanaged == ["id-manual"]
+    assert not changes.drifted
+
+
+def test_diff_dns_records_no_applied_input() -> None:
+    """Test live records left over are removed when no input was applied."""
+    changes = diff_dns_records(
+        [dns_record("a", "a.example.com", "192.0.2.1")],
+        [
+            live_record("id-a", "a.example.com", "192.0.2.1"),
+            live_record("id-deleted", "deleted.example.com", "192.0.2.9"),
+        ],
+    )
+
+    assert changes.removed == ["id-deleted"]
+    assert changes.drifted
+
+
+def test_diff_rulesets() -> None:
+    """Test rulesets are told added, changed or removed, managed ones kept."""
+    get_ruleset = MagicMock(side_effect=lambda _: live_rules("old"))
+
+    changes = diff_rulesets(
+        [ruleset("redirects", "redirects", "new"), ruleset("extra", "extra", "x")],
+        [
+            live_ruleset("id-redirects", "redirects"),
+            live_ruleset("id-stale", "stale"),
+            live_ruleset("id-managed", "managed", kind="managed"),
+        ],
+        get_ruleset,
+    )
+
+    assert changes.added == ["extra"]
+    assert [(c.identifier, list(c.fields)) for c in changes.changed] == [
+        ("redirects", ["rules"])
+    ]
+    assert changes.removed == ["id-stale"]
+    get_ruleset.assert_called_once_with("id-redirects")
+
+
+def test_diff_rulesets_unmanaged() -> None:
+    """Test live rulesets never applied are no drift."""
+    changes = diff_rulesets(
+        [ruleset("redirects", "redirects", "x")],
+        [
+            live_ruleset("id-redirects", "redirects"),
+            live_ruleset("id-stale", "stale"),
+            live_ruleset("id-dashboard", "dashboard"),
+        ],
+        MagicMock(side_effect=lambda _: live_rules("x")),
+        [ruleset("redirects", "redirects", "x"), ruleset("stale", "stale", "x")],
+    )
+
+    assert changes.removed == ["id-stale"]
+    assert changes.unmanaged == ["id-dashboard"]
+
+
+@pytest.fixture
+def mock_cloudflare(ai_input: AppInterfaceInput) -> Iterator[MagicMock]:
+    with (
+        patch("er_cloudflare_zone.drift.get_ai_input", return_value=ai_input),
+        patch("er_cloudflare_zone.drift.cloudflare_client") as mock,
+        patch("er_cloudflare_zone.drift.resolve_zone_id", return_value="zone-123"),
+    ):
+        mock.return_value.rulesets.list.return_value = []
+        yield mock
+
+
+@pytest.mark.parametrize(
+    ("content", "drifted"), [("192.0.2.0", False), ("192.0.2.9", True)]
+)
+def test_main_writes_changeset(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    ai_input: AppInterfaceInput,
+    mock_cloudflare: MagicMock,
+    content: str,
+    *,
+    drifted: bool,
+) -> None:
+    """Test the changeset is written and drift makes the exit code 2."""
+    monkeypatch.setenv("DRIFT_CHANGESET_FILE", str(tmp_path / "changeset.json"))
+    monkeypatch.setenv("APPLIED_INPUTS_DIR", str(tmp_path / "applied-inputs"))
+    monkeypatch.setenv("ZONE_INDEX_TTL", "0")
+    ai_input.data.rulesets = []
+    ai_input.data.dns_records = [dns_record("a", "example.com", "192.0.2.0")]
+    response = mock_cloudflare.return_value.dns.records.with_raw_response.list
+    response.return_value.json.return_value = {
+        "result": [
+            {
+                "id": "id-a",
+                "name": "example.com",
+                "type": "A",
+                "content": content,
+                "ttl": 1,
+            }
+        ],
+        "result_info": {"total_pages": 1},
+    }
+
+    if drifted:
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == EXIT_DRIFT
+    else:
+        main()
+
+    changeset = json.loads((tmp_path / "changeset.json").read_text(encoding="utf-8"))
+    assert changeset["zone_id"] == "zone-123"
+    assert changeset["drifted"] is drifted
+    assert len(changeset["dns_records"]["changed"]) == int(drifted)
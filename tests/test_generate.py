@@ -0,0 +1,194 @@
+"""Tests for generate module."""
+
+import json
+import os
+import tracemalloc
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+import pytest
+
+from er_cloudflare_zone.__main__ import main
+from er_cloudflare_zone.app_interface_input import (
+    AppInterfaceInput,
+    CloudflareDNSRecordShard,
+)
+from er_cloudflare_zone.generate import generate_tf_config, module_digest
+from er_cloudflare_zone.inputs import model_digest
+from er_cloudflare_zone.tf_files import canonical_tf_vars, iter_tf_vars, write_tf_vars
+
+
+@pytest.fixture
+def zone_input(raw_input_data: dict) -> AppInterfaceInput:
+    data = raw_input_data["data"]
+    return AppInterfaceInput.model_validate(
+        raw_input_data | {"data": data | {"dns_records": data["records"]}}
+    )
+
+
+@pytest.fixture
+def module_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    module_dir = tmp_path / "module"
+    (module_dir / "shard").mkdir(parents=True)
+    (module_dir / "main.tf").write_text("# module\n", encoding="utf-8")
+    (module_dir / "shard" / "main.tf").write_text("# shard\n", encoding="utf-8")
+    monkeypatch.setenv("BACKEND_TF_FILE", str(module_dir / "backend.tf"))
+    monkeypatch.setenv("TF_VARS_FILE", str(module_dir / "terraform.tfvars.json"))
+    monkeypatch.setenv("SHARDS_DIR", str(tmp_path / "shards"))
+    monkeypatch.setenv("SHARD_MODULE_DIR", str(module_dir / "shard"))
+    monkeypatch.setenv("TF_CONFIG_DIGEST_FILE", str(tmp_path / "digest.json"))
+    monkeypatch.setenv("APPLIED_INPUTS_DIR", str(tmp_path / "applied-inputs"))
+    monkeypatch.setenv("PLAN_TARGETS_FILE", str(tmp_path / "plan-targets.json"))
+    monkeypatch.setenv("RUN_REPORT_FILE", str(tmp_path / "run-report.json"))
+    monkeypatch.setenv("METRICS_FILE", str(tmp_path / "metrics.prom"))
+    return module_dir
+
+
+def test_canonical_tf_vars(zone_input: AppInterfaceInput) -> None:
+    """Test the tfvars do not depend on the order of the DNS records."""
+    reordered = zone_input.data.model_copy(
+        update={"dns_records": zone_input.data.dns_records[::-1]}
+    )
+
+    assert canonical_tf_vars(reordered) == canonical_tf_vars(zone_input.data)
+    assert [
+        r["identifier"] for r in json.loads(canonical_tf_vars(reordered))["dns_records"]
+    ] == ["a-example-com", "a-www-example-com"]
+
+
+def test_canonical_tf_vars_sorted_keys(zone_input: AppInterfaceInput) -> None:
+    """Test keys are sorted at every depth, whatever order the input has."""
+    zone = zone_input.data.model_copy(deep=True)
+    zone.dns_records[0].data = {"b": 1, "a": {"d": 2, "c": 3}}
+    reordered = zone.model_copy(deep=True)
+    reordered.dns_records[0].data = {"a": {"c": 3, "d": 2}, "b": 1}
+
+    tf_vars = canonical_tf_vars(zone)
+    assert tf_vars == canonical_tf_vars(reordered)
+    assert list(json.loads(tf_vars)) == sorted(json.loads(tf_vars))
+    assert '"data": {\n        "a": {\n          "c": 3,' in tf_vars
+    assert model_digest(zone) == model_digest(reordered)
+
+
+def test_iter_tf_vars(zone_input: AppInterfaceInput) -> None:
+    """Test the streamed tfvars are the canonical ones, byte for byte."""
+    zone = zone_input.data.model_copy(
+        update={"dns_records": zone_input.data.dns_records[::-1]}
+    )
+    zone.dns_records[0].content = 'ünïcode "quoted"\n'
+    zone.dns_records[0].data = {"nested": {"values": [1, None, "ü"]}}
+    empty = zone.model_copy(update={"dns_records": [], "rulesets": []})
+    shard = CloudflareDNSRecordShard(
+        account_id=zone.account_id, name=zone.name, dns_records=zone.dns_records
+    )
+
+    for model in (zone, empty, shard):
+        assert "".join(iter_tf_vars(model)) == canonical_tf_vars(model)
+
+
+def test_write_tf_vars_memory(tmp_path: Path, zone_input: AppInterfaceInput) -> None:
+    """Test streaming the tfvars never holds more than a sliver of the document."""
+    record = zone_input.data.dns_records[0]
+    zone = zone_input.data.model_copy(
+        update={
+            "dns_records": [
+                record.model_copy(update={"identifier": f"host-{i}"})
+                for i in range(10_000)
+            ]
+        }
+    )
+    tf_vars_file = tmp_path / "terraform.tfvars.json"
+
+    tracemalloc.start()
+    write_tf_vars(zone, tf_vars_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < tf_vars_file.stat().st_size / 10
+
+
+def test_module_digest(module_dir: Path) -> None:
+    """Test generated files are no part of the module version."""
+    digest = module_digest(module_dir)
+    (module_dir / "backend.tf").write_text("# generated\n", encoding="utf-8")
+
+    assert module_digest(module_dir) == digest
+
+    (module_dir / "shard" / "main.tf").write_text("# changed\n", encoding="utf-8")
+
+    assert module_digest(module_dir) != digest
+
+
+def test_generate_tf_config_unchanged(
+    module_dir: Path, zone_input: AppInterfaceInput
+) -> None:
+    """Test an unchanged input leaves the generated files alone."""
+    tf_vars_file = module_dir / "terraform.tfvars.json"
+
+    assert generate_tf_config(zone_input).changed
+    os.utime(tf_vars_file, (0, 0))
+
+    assert not generate_tf_config(zone_input).changed
+    assert tf_vars_file.stat().st_mtime == 0
+
+    zone_input.data.plan = "free"
+
+    assert generate_tf_config(zone_input).changed
+    assert json.loads(tf_vars_file.read_text(encoding="utf-8"))["plan"] == "free"
+
+
+def test_generate_tf_config_missing_file(
+    module_dir: Path, zone_input: AppInterfaceInput
+) -> None:
+    """Test a generated file gone missing is written again."""
+    generate_tf_config(zone_input)
+    (module_dir / "backend.tf").unlink()
+
+    assert generate_tf_config(zone_input).changed
+    assert (module_dir / "backend.tf").exists()
+
+
+def test_generate_tf_config_sharded(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    module_dir: Path,
+    zone_input: AppInterfaceInput,
+) -> None:
+    """Test the root tfvars leave the DNS records to the shards."""
+    monkeypatch.setenv("DNS_RECORD_SHARDS", "2")
+
+    digest = generate_tf_config(zone_input)
+
+    tf_vars = json.loads(
+        (module_dir / "terraform.tfvars.json").read_text(encoding="utf-8")
+    )
+    assert tf_vars["dns_records"] == []
+    assert tf_vars["rulesets"]
+    assert str(tmp_path / "shards" / "manifest.json") in digest.files
+    assert (tmp_path / "shards" / "dns-1" / "main.tf").exists()
+
+
+@pytest.mark.parametrize(("exit_code", "expected"), [("0", None), ("3", 3)])
+def test_main_unchanged_exit_code(
+    monkeypatch: pytest.MonkeyPatch,
+    module_dir: Path,  # ruff: ignore[unused-function-argument]
+    raw_input_data: dict,
+    exit_code: str,
+    expected: int | None,
+) -> None:
+    """Test an unchanged config exits with UNCHANGED_EXIT_CODE, if set."""
+    monkeypatch.setenv("UNCHANGED_EXIT_CODE", exit_code)
+    with patch(
+        "er_cloudflare_zone.inputs.read_input_bytes",
+        return_value=json.dumps(raw_input_data).encode(),
+    ):
+        main()
+        if expected is None:
+            main()
+        else:
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+            assert exc_info.value.code == expected
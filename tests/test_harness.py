@@ -0,0 +1,103 @@
+"""Tests for the benchmark harness and its fake backends."""
+
+import json
+import subprocess
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+import httpx
+from benchmarks import fake_terraform
+from benchmarks.fake_cloudflare import FakeAPISettings, FakeCloudflare
+from benchmarks.harness import benchmark_zone, parse_args
+from benchmarks.zones import ZONE_ID, SyntheticZone
+from cloudflare import Cloudflare
+
+from er_cloudflare_zone.discovery import discover, list_dns_records_lean
+from er_cloudflare_zone.inputs import parse_ai_input
+
+
+def test_fake_cloudflare_discovery() -> None:
+    """Test the SDK discovers the whole synthetic zone from the fake API."""
+    zone = SyntheticZone(25)
+    with FakeCloudflare(zone, FakeAPISettings(max_per_page=10)) as api:
+        client = Cloudflare(api_token="benchmark", base_url=api.url)  # ruff: ignore[hardcoded-password-func-arg]
+
+        discovery = discover(client, parse_ai_input(zone.input_json()).data)
+        lean_records = list(list_dns_records_lean(client, ZONE_ID, per_page=100))
+
+    assert discovery.zone_id == ZONE_ID
+    assert len(lean_records) == zone.count
+    assert len(discovery.ruleset_by_key or {}) == zone.rulesets
+    # capped at 10 per page: the SDK reads on until an empty 4th page, the
+    # lean listing stops at the last of the total pages
+    assert api.calls == {"zones": 1, "dns_records": 7, "rulesets": 1}
+
+
+def test_fake_cloudflare_rate_limit() -> None:
+    """Test every n-th request is answered with a 429 and still counted."""
+    with FakeCloudflare(SyntheticZone(1), FakeAPISettings(rate_limit_every=2)) as api:
+        statuses = [
+            httpx.get(f"{api.url}/zones/{ZONE_ID}/rulesets").status_code
+            for _ in range(4)
+        ]
+
+    assert statuses == [200, 429, 200, 429]
+    assert (api.api_calls, api.rate_limited) == (4, 2)
+
+
+def test_fake_terraform(tmp_path: Path) -> None:
+    """Test the fake terraform keeps a state and logs its calls."""
+    terraform = fake_terraform.install(tmp_path / "bin")
+    log_file = tmp_path / "terraform.jsonl"
+    state_file = tmp_path / "push.tfstate"
+    state_file.write_text(
+        json.dumps({
+            "resources": [
+                {
+                    "type": "cloudflare_dns_record",
+                    "name": "this",
+                    "instances": [{"index_key": "www"}],
+                }
+            ]
+        }),
+        encoding="utf-8",
+    )
+
+    def run(*args: str) -> str:
+        return subprocess.run(  # ruff: ignore[subprocess-without-shell-equals-true]
+            [str(terraform), f"-chdir={tmp_path}", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={"FAKE_TERRAFORM_LOG": str(log_file)},
+        ).stdout
+
+    run("import", "cloudflare_zone.this", ZONE_ID)
+    run("state", "push", str(state_file))
+
+    assert run("state", "list").splitlines() == [
+        "cloudflare_zone.this",
+        'cloudflare_dns_record.this["www"]',
+    ]
+    assert [
+        (call["command"], call["resources"])
+        for call in fake_terraform.read_log(log_file)
+    ] == [("import", 1), ("state push", 1), ("state list", 2)]
+
+
+def test_benchmark_zone(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the entry points run against the fakes and get measured."""
+    monkeypatch.setattr("sys.argv", ["harness", "10"])
+
+    results = {r.run: r for r in benchmark_zone(SyntheticZone(10), parse_args())}
+
+    assert [r.exit_code for r in results.values()] == [0, 0, 0]
+    assert results["generate-unchanged"].subprocesses == 0
+    assert results["import-tfstate"].api_calls > 0
+    # state list, providers schema, state pull and push, plan, show
+    assert results["import-tfstate"].subprocesses == 6  # ruff: ignore[magic-value-comparison]
+    assert results["import-tfstate"].peak_rss_mib > 0
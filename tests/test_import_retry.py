@@ -0,0 +1,102 @@
+"""Tests for import_retry module."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from er_cloudflare_zone.import_result import ErrorClass, ImportResult, ImportTarget
+from er_cloudflare_zone.import_retry import (
+    RetrySettings,
+    classify_error,
+    retry_delay,
+    retry_transient,
+)
+
+ADDRESS = 'cloudflare_dns_record.this["www"]'
+
+
+@pytest.mark.parametrize(
+    ("message", "expected"),
+    [
+        ("Error: 429 Too Many Requests", ErrorClass.TRANSIENT),
+        ("rate limited, try again", ErrorClass.TRANSIENT),
+        ("GET zones/abc: status code: 502", ErrorClass.TRANSIENT),
+        ("Error: Gateway Timeout", ErrorClass.TRANSIENT),
+        ("dial tcp: i/o timeout", ErrorClass.TRANSIENT),
+        ("read: connection reset by peer", ErrorClass.TRANSIENT),
+        ("Error acquiring the state lock", ErrorClass.TRANSIENT),
+        (
+            f"Error: Resource already managed by Terraform\n\n{ADDRESS}",
+            ErrorClass.ALREADY_MANAGED,
+        ),
+        (
+            "Error: Resource already managed by Terraform\n\ncloudflare_zone.this",
+            ErrorClass.PERMANENT,
+        ),
+        ("Error: Cannot import non-existent remote object", ErrorClass.PERMANENT),
+        ("record with ttl 500 is invalid", ErrorClass.PERMANENT),
+    ],
+)
+def test_classify_error(message: str, expected: ErrorClass) -> None:
+    """Test terraform stderr is classified by what a retry can do about it."""
+    assert classify_error(message, ADDRESS) == expected
+
+
+def test_retry_delay() -> None:
+    """Test the backoff doubles per round up to its maximum, half of it jitter."""
+    settings = RetrySettings(backoff=10, max_backoff=30)
+    assert 5 <= retry_delay(0, settings) <= 10  # ruff: ignore[magic-value-comparison]
+    assert 10 <= retry_delay(1, settings) <= 20  # ruff: ignore[magic-value-comparison]
+    assert 15 <= retry_delay(5, settings) <= 30  # ruff: ignore[magic-value-comparison]
+
+
+def result(address: str, error: str | None = None) -> ImportResult:
+    return ImportResult(
+        resource_address=address,
+        import_id="zone-123/" + address,
+        success=error is None,
+        error_message=error,
+    )
+
+
+def test_retry_transient() -> None:
+    """Test only transient failures are retried, in rounds, until they pass."""
+    targets = [
+        ImportTarget(resource_address=address, import_id="zone-123/" + address)
+        for address in ("a", "b", "c", "d")
+    ]
+    import_targets = MagicMock(
+        side_effect=[
+            [result("b", "503 Service Unavailable"), result("c", "timed out")],
+            [result("b"), result("c", "timed out")],
+            [result("c", "timed out")],
+        ]
+    )
+
+    with patch("er_cloudflare_zone.import_retry.time.sleep") as sleep:
+        results = retry_transient(
+            targets,
+            [
+                result("a"),
+                result("b", "rate limit"),
+                result("c", "too many requests"),
+                result("d", "not found"),
+            ],
+            import_targets,
+            RetrySettings(retries=3),
+        )
+
+    assert [
+        (r.resource_address, r.success, r.error_class, r.retries) for r in results
+    ] == [
+        ("a", True, None, 0),
+        ("b", True, None, 2),
+        ("c", False, ErrorClass.TRANSIENT, 3),
+        ("d", False, ErrorClass.PERMANENT, 0),
+    ]
+    assert [c.args[0] for c in import_targets.call_args_list] == [
+        targets[1:3],
+        targets[1:3],
+        targets[2:3],
+    ]
+    assert sleep.call_count == 3  # ruff: ignore[magic-value-comparison]
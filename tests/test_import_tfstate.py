@@ -1,18 +1,27 @@
 """Tests for import_tfstate module."""
 
+import json
+import os
 import subprocess
 from typing import TYPE_CHECKING
 from unittest.mock import MagicMock, call, create_autospec, patch
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
+    from pathlib import Path
 
 import pytest
-from cloudflare.types.dns.record_response import ARecord
+from cloudflare.types.dns.record_response import ARecord, TXTRecord
 from cloudflare.types.rulesets import RulesetListResponse
 from cloudflare.types.zones import Zone
 
+from er_cloudflare_zone.discovery import DNSLookup, resolve_zone_id
+from er_cloudflare_zone.import_result import ErrorClass, ImportResult, ImportTarget
 from er_cloudflare_zone.import_tfstate import ZoneNotFoundError, main
+from er_cloudflare_zone.journal import ImportJournal
+
+STATE_LIST_CALL = call(["state", "list"], dry_run=False)
+ZONE_IMPORT_CALL = call(["import", "cloudflare_zone.this", "zone-123"], dry_run=False)
 
 
 def setup_cloudflare_client(
@@ -25,7 +34,16 @@ def setup_cloudflare_client(
     """Configure the Cloudflare client mock with zone, DNS records, and rulesets."""
     mock_client = mock_cloudflare.return_value
     mock_client.zones.list.return_value = [mock_zone]
-    mock_client.dns.records.list.return_value = dns_records or []
+    page = mock_client.dns.records.list.return_value
+    page.__iter__.side_effect = lambda: iter(dns_records or [])
+    page.result_info.total_count = len(dns_records or [])
+    mock_client.dns.records.with_raw_response.list.return_value.json.return_value = {
+        "result": [
+            {"id": r.id, "name": r.name, "type": r.type, "content": r.content}
+            for r in dns_records or []
+        ],
+        "result_info": {"total_pages": 1},
+    }
     mock_client.rulesets.list.return_value = rulesets or []
     return mock_client
 
@@ -73,15 +91,19 @@ def mock_zone() -> Zone:
 
 @pytest.fixture
 def mock_read_input() -> Iterator[MagicMock]:
-    """Mock read_input_from_file."""
-    with patch("er_cloudflare_zone.import_tfstate.read_input_from_file") as mock:
+    """Mock the input file, its data being the mock's return_value."""
+    mock = MagicMock()
+    with patch(
+        "er_cloudflare_zone.inputs.read_input_bytes",
+        side_effect=lambda *_: json.dumps(mock.return_value).encode(),
+    ):
         yield mock
 
 
 @pytest.fixture
 def mock_cloudflare() -> Iterator[MagicMock]:
     """Mock Cloudflare client."""
-    with patch("er_cloudflare_zone.import_tfstate.Cloudflare") as mock:
+    with patch("er_cloudflare_zone.import_tfstate.cloudflare_client") as mock:
         yield mock
 
 
@@ -89,6 +111,7 @@ def mock_cloudflare() -> Iterator[MagicMock]:
 def mock_terraform_run() -> Iterator[MagicMock]:
     """Mock terraform_run."""
     with patch("er_cloudflare_zone.import_tfstate.terraform_run") as mock:
+        mock.return_value = ""
         yield mock
 
 
@@ -99,6 +122,47 @@ def mock_logger() -> Iterator[MagicMock]:
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def mock_journal_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep the import journal in a temp dir."""
+    journal_file = tmp_path / "import-journal.jsonl"
+    monkeypatch.setenv("IMPORT_JOURNAL_FILE", str(journal_file))
+    return journal_file
+
+
+@pytest.fixture(autouse=True)
+def mock_metrics_files(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep the run report and metrics in a temp dir."""
+    monkeypatch.setenv("RUN_REPORT_FILE", str(tmp_path / "run-report.json"))
+    monkeypatch.setenv("METRICS_FILE", str(tmp_path / "metrics.prom"))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def mock_retry_sleep() -> Iterator[MagicMock]:
+    """Do not wait out the backoff between the retries of transient failures."""
+    with patch("er_cloudflare_zone.import_retry.time.sleep") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_zone_index_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep the zone index cache in a temp dir."""
+    zone_index_dir = tmp_path / "zone-index"
+    monkeypatch.setenv("ZONE_INDEX_DIR", str(zone_index_dir))
+    return zone_index_dir
+
+
+@pytest.fixture(autouse=True)
+def mock_discovery_snapshot_dir(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Path:
+    """Keep the discovery snapshots in a temp dir."""
+    snapshot_dir = tmp_path / "discovery"
+    monkeypatch.setenv("DISCOVERY_SNAPSHOT_DIR", str(snapshot_dir))
+    return snapshot_dir
+
+
 @pytest.fixture
 def mock_dry_run(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("DRY_RUN", "True")
@@ -122,11 +186,27 @@ def test_import_zone_only(
 
     main()
 
-    assert mock_terraform_run.call_count == 1
-    mock_terraform_run.assert_called_with(
-        ["import", "cloudflare_zone.this", "zone-123"],
-        dry_run=False,
+    assert mock_terraform_run.call_args_list == [STATE_LIST_CALL, ZONE_IMPORT_CALL]
+
+
+def test_import_zone_id_from_zone_index(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+) -> None:
+    """Test the account's zones are listed once and cached for the next run."""
+    mock_read_input.return_value = build_input_data()
+    mock_client = setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    main()
+    main()
+
+    mock_client.zones.list.assert_called_once_with(
+        account={"id": "acct-123"}, per_page=50
     )
+    assert mock_terraform_run.call_args_list == [STATE_LIST_CALL, ZONE_IMPORT_CALL] * 2
 
 
 def test_import_zone_with_plan(
@@ -151,6 +231,33 @@ def test_import_zone_with_plan(
     ])
 
 
+def test_run_report(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_metrics_files: Path,
+) -> None:
+    """Test the run report times the phases and every import."""
+    mock_read_input.return_value = build_input_data(plan="enterprise")
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    main()
+
+    report = json.loads(
+        (mock_metrics_files / "run-report.json").read_text(encoding="utf-8")
+    )
+    assert report["command"] == "import-tfstate"
+    assert report["succeeded"] == 2  # ruff: ignore[magic-value-comparison]
+    assert report["phases"]["import_resource"]["calls"] == 2  # ruff: ignore[magic-value-comparison]
+    assert {"get_ai_input", "resolve_zone_id", "load_state_addresses"} <= set(
+        report["phases"]
+    )
+    assert all(r["duration_seconds"] is not None for r in report["slowest"])
+    assert (mock_metrics_files / "metrics.prom").exists()
+
+
 def test_import_zone_with_dns_records(
     mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
     mock_terraform_run: MagicMock,
@@ -195,6 +302,61 @@ def test_import_zone_with_dns_records(
     ])
 
 
+def test_import_sharded_dns_records(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+) -> None:
+    """Test DNS records are imported into their shard's state."""
+    monkeypatch.setenv("DNS_RECORD_SHARDS", "1")
+    monkeypatch.setenv("SHARDS_DIR", str(tmp_path / "shards"))
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "www-a-record",
+                "name": "www.example.com",
+                "type": "A",
+                "ttl": 300,
+                "content": "192.0.2.1",
+            }
+        ]
+    )
+    mock_record = create_autospec(ARecord, instance=True)
+    mock_record.configure_mock(
+        id="record-456", name="www.example.com", type="A", content="192.0.2.1"
+    )
+    setup_cloudflare_client(mock_cloudflare, mock_zone, dns_records=[mock_record])
+    commands: list[tuple[str, list[str]]] = []
+
+    def terraform_run(args: list[str], **_: bool) -> str:
+        commands.append((os.environ.get("TERRAFORM_CMD", ""), args))
+        return ""
+
+    mock_terraform_run.side_effect = terraform_run
+
+    main()
+
+    shard_cmd = f"terraform -chdir={tmp_path / 'shards' / 'dns-0'}"
+    assert commands == [
+        ("", ["state", "list"]),
+        ("", ["import", "cloudflare_zone.this", "zone-123"]),
+        (shard_cmd, ["init", "-input=false"]),
+        (shard_cmd, ["state", "list"]),
+        (
+            shard_cmd,
+            [
+                "import",
+                'cloudflare_dns_record.this["www-a-record"]',
+                "zone-123/record-456",
+            ],
+        ),
+    ]
+
+
 def test_import_zone_with_rulesets(
     mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
     mock_terraform_run: MagicMock,
@@ -249,6 +411,28 @@ def test_zone_not_found(
         main()
 
 
+def test_sync_discovery_warns_about_dns_lookup(
+    mock_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_logger: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a lookup only the async discovery knows is not silently ignored."""
+    monkeypatch.setenv("DNS_LOOKUP", "filtered")
+    mock_read_input.return_value = build_input_data()
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    main()
+
+    mock_logger.warning.assert_any_call(
+        "DNS_LOOKUP=%s needs DISCOVERY_MODE=async, listing all DNS records",
+        DNSLookup.FILTERED,
+    )
+
+
 def test_dns_record_not_found_fails(
     mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
     mock_terraform_run: MagicMock,
@@ -274,7 +458,52 @@ def test_dns_record_not_found_fails(
         main()
 
     assert exc_info.value.code == 1
-    assert mock_terraform_run.call_count == 1
+    assert mock_terraform_run.call_args_list == [STATE_LIST_CALL, ZONE_IMPORT_CALL]
+
+
+def test_ambiguous_dns_record_fails(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_logger: MagicMock,
+) -> None:
+    """Test a DNS record matching several live records is not imported."""
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "txt-record",
+                "name": "example.com",
+                "type": "TXT",
+                "ttl": 300,
+                "content": "v=spf1 -all",
+            }
+        ]
+    )
+    mock_records = [
+        create_autospec(TXTRecord, instance=True) for _ in ("quoted", "unquoted")
+    ]
+    for record_id, content, mock_record in zip(
+        ("record-1", "record-2"),
+        ('"v=spf1 -all"', "v=spf1 -all"),
+        mock_records,
+        strict=True,
+    ):
+        mock_record.configure_mock(
+            id=record_id, name="example.com", type="TXT", content=content
+        )
+    setup_cloudflare_client(mock_cloudflare, mock_zone, dns_records=mock_records)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 1
+    assert mock_terraform_run.call_args_list == [STATE_LIST_CALL, ZONE_IMPORT_CALL]
+    mock_logger.error.assert_any_call(
+        "DNS record 'example.com' (TXT) is ambiguous, "
+        "matching live records record-1, record-2"
+    )
 
 
 def test_ruleset_not_found_fails(
@@ -301,7 +530,7 @@ def test_ruleset_not_found_fails(
         main()
 
     assert exc_info.value.code == 1
-    assert mock_terraform_run.call_count == 1
+    assert mock_terraform_run.call_args_list == [STATE_LIST_CALL, ZONE_IMPORT_CALL]
 
 
 def test_import_failure_exits_with_error(
@@ -341,3 +570,585 @@ def test_dry_run_flag(
         ["import", "cloudflare_zone.this", "zone-123"],
         dry_run=True,
     )
+
+
+@pytest.mark.parametrize(
+    ("refresh", "listings", "counts"), [("False", 1, 1), ("True", 2, 0)]
+)
+def test_real_run_reuses_dry_run_discovery(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    refresh: str,
+    listings: int,
+    counts: int,
+) -> None:
+    """Test the real run imports what the dry run discovered, unless refreshed.
+
+    Only checking the snapshot counts the zone's records, a listing counts them.
+    """
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "a",
+                "name": "a.example.com",
+                "type": "A",
+                "ttl": 1,
+                "content": "192.0.2.1",
+            }
+        ]
+    )
+    mock_record = create_autospec(ARecord, instance=True)
+    mock_record.configure_mock(
+        id="record-a", name="a.example.com", type="A", content="192.0.2.1"
+    )
+    mock_client = setup_cloudflare_client(
+        mock_cloudflare, mock_zone, dns_records=[mock_record]
+    )
+
+    # the zone ID resolved to look for the snapshot is reused
+    with patch(
+        "er_cloudflare_zone.discovery.resolve_zone_id", wraps=resolve_zone_id
+    ) as mock_resolve:
+        monkeypatch.setenv("DRY_RUN", "True")
+        main()
+        monkeypatch.setenv("DRY_RUN", "False")
+        monkeypatch.setenv("DISCOVERY_REFRESH", refresh)
+        main()
+
+    assert mock_client.dns.records.with_raw_response.list.call_count == listings
+    assert mock_client.dns.records.list.call_count == counts
+    assert mock_resolve.call_count == int(refresh == "True")
+    mock_terraform_run.assert_called_with(
+        ["import", 'cloudflare_dns_record.this["a"]', "zone-123/record-a"],
+        dry_run=False,
+    )
+
+
+@pytest.fixture
+def mock_batch_mode(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Enable batch import mode and place the module files in a temp dir."""
+    monkeypatch.setenv("IMPORT_MODE", "batch")
+    monkeypatch.setenv("BACKEND_TF_FILE", str(tmp_path / "backend.tf"))
+    return tmp_path / "imports.tf"
+
+
+def test_batch_import_single_apply(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_batch_mode: Path,
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+) -> None:
+    """Test batch mode imports everything with one terraform apply."""
+    mock_read_input.return_value = build_input_data(
+        plan="enterprise",
+        dns_records=[
+            {
+                "identifier": "www-a-record",
+                "name": "www.example.com",
+                "type": "A",
+                "ttl": 300,
+                "content": "192.0.2.1",
+            }
+        ],
+    )
+    mock_record = create_autospec(ARecord, instance=True)
+    mock_record.configure_mock(
+        id="record-456",
+        name="www.example.com",
+        type="A",
+        content="192.0.2.1",
+    )
+    setup_cloudflare_client(mock_cloudflare, mock_zone, dns_records=[mock_record])
+    import_blocks: list[str] = []
+
+    def terraform_run(args: list[str], **_: bool) -> str:
+        if args[0] == "plan":
+            import_blocks.append(mock_batch_mode.read_text(encoding="utf-8"))
+        if args[0] == "show":
+            return json.dumps({
+                "resource_changes": [
+                    {
+                        "address": "cloudflare_zone.this",
+                        "change": {"actions": ["no-op"]},
+                    }
+                ]
+            })
+        return ""
+
+    mock_terraform_run.side_effect = terraform_run
+
+    main()
+
+    state_list, plan, show, apply = mock_terraform_run.call_args_list
+    assert state_list == STATE_LIST_CALL
+    plan_file = plan.args[0][2].removeprefix("-out=")
+    assert plan == call(
+        [
+            "plan",
+            "-input=false",
+            f"-out={plan_file}",
+            "-target=cloudflare_zone.this",
+            "-target=cloudflare_zone_subscription.this[0]",
+            '-target=cloudflare_dns_record.this["www-a-record"]',
+        ],
+        dry_run=False,
+    )
+    assert show == call(["show", "-json", plan_file], dry_run=False)
+    assert apply == call(["apply", "-input=false", plan_file], dry_run=False)
+    assert import_blocks == [
+        (
+            'import {\n  to = cloudflare_zone.this\n  id = "zone-123"\n}\n\n'
+            'import {\n  to = cloudflare_zone_subscription.this[0]\n  id = "zone-123"\n}\n\n'
+            'import {\n  to = cloudflare_dns_record.this["www-a-record"]\n'
+            '  id = "zone-123/record-456"\n}\n\n'
+        )
+    ]
+    assert not mock_batch_mode.exists()
+
+
+def test_batch_import_rejects_drift(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_batch_mode: Path,
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_journal_file: Path,
+) -> None:
+    """Test a batch whose plan would change more than it imports is not applied."""
+    mock_read_input.return_value = build_input_data(plan="enterprise")
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+    plan = {
+        "resource_changes": [
+            {"address": "cloudflare_zone.this", "change": {"actions": ["no-op"]}},
+            {
+                "address": "cloudflare_zone_subscription.this[0]",
+                "change": {"actions": ["update"]},
+            },
+        ]
+    }
+    mock_terraform_run.side_effect = lambda args, **_: (
+        json.dumps(plan) if args[0] == "show" else ""
+    )
+
+    with pytest.raises(SystemExit):
+        main()
+
+    assert [c.args[0][0] for c in mock_terraform_run.call_args_list] == [
+        "state",
+        "plan",
+        "show",
+    ]
+    assert {
+        r.error_message for r in ImportJournal(mock_journal_file).replay().results
+    } == {
+        (
+            "Import plan changes more than it imports: "
+            "cloudflare_zone_subscription.this[0] (update)"
+        )
+    }
+    assert not mock_batch_mode.exists()
+
+
+def test_batch_import_failure_exits_with_error(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_batch_mode: Path,
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_retry_sleep: MagicMock,
+) -> None:
+    """Test a failed batch apply fails all imports and cleans up."""
+    mock_read_input.return_value = build_input_data()
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+    # the transient lock timeout fails the retries as well
+    mock_terraform_run.side_effect = [
+        "",
+        *[
+            subprocess.CalledProcessError(
+                returncode=1, cmd=["terraform", "apply"], stderr="lock timeout"
+            )
+        ]
+        * 4,
+    ]
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 1
+    assert mock_terraform_run.call_args_list[0] == STATE_LIST_CALL
+    assert mock_retry_sleep.call_count == 3  # ruff: ignore[magic-value-comparison]
+    assert not mock_batch_mode.exists()
+
+
+def test_batch_import_chunks(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_batch_mode: Path,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a batch gets one targeted plan and apply per chunk of addresses."""
+    monkeypatch.setattr("er_cloudflare_zone.import_tfstate.MAX_COMMAND_ADDRESSES", 1)
+    mock_read_input.return_value = build_input_data(plan="enterprise")
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+    mock_terraform_run.side_effect = lambda args, **_: (
+        json.dumps({"resource_changes": []}) if args[0] == "show" else ""
+    )
+
+    main()
+
+    assert [c.args[0][0] for c in mock_terraform_run.call_args_list] == [
+        "state",
+        *["plan", "show", "apply"] * 2,
+    ]
+    assert [
+        c.args[0][3:]
+        for c in mock_terraform_run.call_args_list
+        if c.args[0][0] == "plan"
+    ] == [
+        ["-target=cloudflare_zone.this"],
+        ["-target=cloudflare_zone_subscription.this[0]"],
+    ]
+
+
+def test_batch_import_falls_back_when_terraform_cannot_start(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_batch_mode: Path,
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+) -> None:
+    """Test a batch whose command line is too long is imported one by one."""
+    mock_read_input.return_value = build_input_data()
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    def terraform_run(args: list[str], **_: bool) -> str:
+        if args[0] == "plan":
+            raise OSError(7, "Argument list too long")
+        return ""
+
+    mock_terraform_run.side_effect = terraform_run
+
+    main()
+
+    assert [c.args[0][0] for c in mock_terraform_run.call_args_list] == [
+        "state",
+        "plan",
+        "import",
+    ]
+    mock_terraform_run.assert_called_with(
+        ["import", "cloudflare_zone.this", "zone-123"], dry_run=False
+    )
+    assert not mock_batch_mode.exists()
+
+
+def test_retry_transient_failures(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_retry_sleep: MagicMock,
+    mock_journal_file: Path,
+) -> None:
+    """Test transient failures are retried after the main pass, managed ones kept as present."""
+    mock_read_input.return_value = build_input_data(plan="enterprise")
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+    mock_terraform_run.side_effect = [
+        "",
+        subprocess.CalledProcessError(
+            returncode=1,
+            cmd=["terraform", "import"],
+            stderr="Error: reading zone: 503 Service Unavailable",
+        ),
+        subprocess.CalledProcessError(
+            returncode=1,
+            cmd=["terraform", "import"],
+            stderr="Error: Resource already managed by Terraform\n\nTerraform is "
+            "already managing a remote object for cloudflare_zone_subscription.this[0].",
+        ),
+        "",
+    ]
+
+    main()
+
+    assert mock_terraform_run.call_args_list[-1] == ZONE_IMPORT_CALL
+    mock_retry_sleep.assert_called_once()
+    assert {
+        r.resource_address: (r.success, r.already_present, r.error_class, r.retries)
+        for r in ImportJournal(mock_journal_file).replay().results
+    } == {
+        "cloudflare_zone.this": (True, False, None, 1),
+        "cloudflare_zone_subscription.this[0]": (
+            True,
+            True,
+            ErrorClass.ALREADY_MANAGED,
+            0,
+        ),
+    }
+
+
+def test_skip_resources_already_in_state(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_logger: MagicMock,
+) -> None:
+    """Test addresses listed in the terraform state are not imported again."""
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "www-a-record",
+                "name": "www.example.com",
+                "type": "A",
+                "ttl": 300,
+                "content": "192.0.2.1",
+            }
+        ]
+    )
+    mock_record = create_autospec(ARecord, instance=True)
+    mock_record.configure_mock(
+        id="record-456",
+        name="www.example.com",
+        type="A",
+        content="192.0.2.1",
+    )
+    setup_cloudflare_client(mock_cloudflare, mock_zone, dns_records=[mock_record])
+    mock_terraform_run.return_value = "cloudflare_zone.this\n"
+
+    main()
+
+    assert mock_terraform_run.call_args_list == [
+        STATE_LIST_CALL,
+        call(
+            [
+                "import",
+                'cloudflare_dns_record.this["www-a-record"]',
+                "zone-123/record-456",
+            ],
+            dry_run=False,
+        ),
+    ]
+    mock_logger.info.assert_called_with(
+        "Import complete: %d succeeded, %d already present, %d failed", 1, 1, 0
+    )
+
+
+def test_state_list_failure_imports_everything(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+) -> None:
+    """Test an unreadable state does not block the import."""
+    mock_read_input.return_value = build_input_data()
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+    mock_terraform_run.side_effect = [
+        subprocess.CalledProcessError(returncode=1, cmd=["terraform", "state"]),
+        "",
+    ]
+
+    main()
+
+    mock_terraform_run.assert_called_with(
+        ["import", "cloudflare_zone.this", "zone-123"],
+        dry_run=False,
+    )
+
+
+def test_journal_records_run(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_journal_file: Path,
+) -> None:
+    """Test the journal checkpoints resolved targets and every result."""
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "missing-record",
+                "name": "missing.example.com",
+                "type": "A",
+                "ttl": 300,
+                "content": "192.0.2.1",
+            }
+        ]
+    )
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    with pytest.raises(SystemExit):
+        main()
+
+    entries = [
+        json.loads(line)
+        for line in mock_journal_file.read_text(encoding="utf-8").splitlines()
+    ]
+    assert [
+        (e["kind"], e["resource_address"], e["import_id"], e["success"])
+        for e in entries
+    ] == [
+        ("target", "cloudflare_zone.this", "zone-123", None),
+        ("result", 'cloudflare_dns_record.this["missing-record"]', "", False),
+        ("result", "cloudflare_zone.this", "zone-123", True),
+    ]
+
+
+def test_resume_imports_only_outstanding(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_journal_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test resume retries failed and missing targets without listing Cloudflare."""
+    monkeypatch.setenv("IMPORT_RESUME", "True")
+    mock_read_input.return_value = build_input_data()
+    journal = ImportJournal(mock_journal_file)
+    journal.reset()
+    journal.record_targets([
+        ImportTarget(resource_address="cloudflare_zone.this", import_id="zone-123"),
+        ImportTarget(
+            resource_address='cloudflare_dns_record.this["a"]',
+            import_id="zone-123/record-a",
+        ),
+        ImportTarget(
+            resource_address='cloudflare_dns_record.this["b"]',
+            import_id="zone-123/record-b",
+        ),
+    ])
+    journal.record_results([
+        ImportResult(
+            resource_address="cloudflare_zone.this", import_id="zone-123", success=True
+        ),
+        ImportResult(
+            resource_address='cloudflare_dns_record.this["a"]',
+            import_id="zone-123/record-a",
+            success=False,
+            error_message="rate limited",
+        ),
+    ])
+    # simulate a process killed while writing
+    with mock_journal_file.open("a", encoding="utf-8") as f:
+        f.write('{"kind": "res')
+
+    main()
+
+    mock_cloudflare.return_value.zones.list.assert_not_called()
+    assert mock_terraform_run.call_args_list == [
+        STATE_LIST_CALL,
+        call(
+            ["import", 'cloudflare_dns_record.this["a"]', "zone-123/record-a"],
+            dry_run=False,
+        ),
+        call(
+            ["import", 'cloudflare_dns_record.this["b"]', "zone-123/record-b"],
+            dry_run=False,
+        ),
+    ]
+
+
+def test_dry_run_does_not_write_journal(
+    mock_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_journal_file: Path,
+) -> None:
+    """Test a dry run leaves no checkpoints behind."""
+    mock_read_input.return_value = build_input_data()
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    main()
+
+    assert not mock_journal_file.exists()
+
+
+def test_state_mode_synthesizes_state(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test state mode hands the resolved targets with their API objects over."""
+    monkeypatch.setenv("IMPORT_MODE", "state")
+    mock_read_input.return_value = build_input_data(
+        dns_records=[
+            {
+                "identifier": "www-a-record",
+                "name": "www.example.com",
+                "type": "A",
+                "ttl": 300,
+                "content": "192.0.2.1",
+            }
+        ]
+    )
+    mock_record = create_autospec(ARecord, instance=True)
+    mock_record.configure_mock(
+        id="record-456",
+        name="www.example.com",
+        type="A",
+        content="192.0.2.1",
+    )
+    setup_cloudflare_client(mock_cloudflare, mock_zone, dns_records=[mock_record])
+
+    with patch(
+        "er_cloudflare_zone.import_tfstate.synthesize_state", return_value=[]
+    ) as mock_synthesize_state:
+        main()
+
+    targets = mock_synthesize_state.call_args.args[0]
+    assert [(t.resource_address, t.import_id) for t in targets] == [
+        ("cloudflare_zone.this", "zone-123"),
+        ('cloudflare_dns_record.this["www-a-record"]', "zone-123/record-456"),
+    ]
+    assert targets[1].api_object is mock_record
+
+
+def test_state_mode_resume_resolves_again(
+    mock_non_dry_run: None,  # ruff: ignore[unused-function-argument]
+    mock_terraform_run: MagicMock,  # ruff: ignore[unused-function-argument]
+    mock_cloudflare: MagicMock,
+    mock_read_input: MagicMock,
+    mock_zone: Zone,
+    mock_journal_file: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a state mode resume looks the API objects up instead of the journal."""
+    monkeypatch.setenv("IMPORT_MODE", "state")
+    monkeypatch.setenv("IMPORT_RESUME", "True")
+    mock_read_input.return_value = build_input_data()
+    journal = ImportJournal(mock_journal_file)
+    journal.reset()
+    journal.record_targets([
+        ImportTarget(resource_address="cloudflare_zone.this", import_id="zone-123")
+    ])
+    setup_cloudflare_client(mock_cloudflare, mock_zone)
+
+    with patch(
+        "er_cloudflare_zone.import_tfstate.synthesize_state", return_value=[]
+    ) as mock_synthesize_state:
+        main()
+
+    mock_cloudflare.return_value.zones.list.assert_called()
+    targets = mock_synthesize_state.call_args.args[0]
+    assert [t.resource_address for t in targets] == ["cloudflare_zone.this"]
+    assert targets[0].api_object is not None
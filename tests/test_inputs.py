@@ -0,0 +1,45 @@
+"""Tests for inputs module."""
+
+import json
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from er_cloudflare_zone.app_interface_input import AppInterfaceInput
+
+import pytest
+from pydantic import ValidationError
+
+from er_cloudflare_zone.inputs import get_ai_input, model_digest, parse_ai_input
+
+
+def test_parse_ai_input(ai_input: AppInterfaceInput, raw_input_data: dict) -> None:
+    """Test parsing the JSON gives the models validating dicts does."""
+    assert parse_ai_input(json.dumps(raw_input_data).encode()) == ai_input
+
+
+def test_parse_ai_input_invalid(raw_input_data: dict) -> None:
+    """Test invalid input fails validation as before."""
+    del raw_input_data["data"]["name"]
+
+    with pytest.raises(ValidationError):
+        parse_ai_input(json.dumps(raw_input_data))
+
+
+def test_get_ai_input(
+    tmp_path: Path, ai_input: AppInterfaceInput, raw_input_data: dict
+) -> None:
+    """Test the input is read from the given file."""
+    input_file = tmp_path / "input.json"
+    input_file.write_text(json.dumps(raw_input_data), encoding="utf-8")
+
+    assert get_ai_input(input_file) == ai_input
+
+
+def test_model_digest(ai_input: AppInterfaceInput) -> None:
+    """Test the digest changes with the model only."""
+    digest = model_digest(ai_input.data)
+
+    assert model_digest(ai_input.data.model_copy()) == digest
+    assert model_digest(ai_input.data.model_copy(update={"plan": "free"})) != digest
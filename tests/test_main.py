@@ -1,8 +1,8 @@
+import json
 from typing import TYPE_CHECKING
-from unittest.mock import MagicMock, patch
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from pathlib import Path
 
 import pytest
 
@@ -11,20 +11,21 @@ from er_cloudflare_zone.app_interface_input import AppInterfaceInput
 
 
 @pytest.fixture
-def mock_read_input_from_file() -> Iterator[MagicMock]:
-    """Patch read_input_from_file"""
-    with patch("er_cloudflare_zone.__main__.read_input_from_file") as m:
-        yield m
+def input_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, raw_input_data: dict
+) -> Path:
+    """Write the input data to INPUT_FILE"""
+    input_file = tmp_path / "input.json"
+    input_file.write_text(json.dumps(raw_input_data), encoding="utf-8")
+    monkeypatch.setenv("INPUT_FILE", str(input_file))
+    return input_file
 
 
 def test_main_get_ai_input(
     ai_input: AppInterfaceInput,
-    raw_input_data: dict,
-    mock_read_input_from_file: MagicMock,
+    input_file: Path,  # ruff: ignore[unused-function-argument]
 ) -> None:
     """Test get_ai_input"""
-    mock_read_input_from_file.return_value = raw_input_data
-
     main_ai_input = get_ai_input()
 
     assert isinstance(main_ai_input, AppInterfaceInput)
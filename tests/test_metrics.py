@@ -0,0 +1,117 @@
+"""Tests for metrics module."""
+
+import json
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+import httpx
+
+from er_cloudflare_zone.client import ClientSettings, TokenBucket
+from er_cloudflare_zone.import_result import ImportResult
+from er_cloudflare_zone.metrics import (
+    current,
+    prometheus_text,
+    run_metrics,
+    timed,
+    write_run_report,
+)
+from er_cloudflare_zone.transport import RateLimitedTransport
+
+
+@timed("decorated")
+def decorated() -> None:
+    pass
+
+
+def test_timed() -> None:
+    """Test phases are timed into the run in progress only."""
+    outer = current()
+    with run_metrics("test") as metrics:
+        decorated()
+        decorated()
+        with timed("block") as timing:
+            pass
+
+    assert current() is outer
+    assert metrics.phases.keys() == {"decorated", "block"}
+    assert metrics.phases["decorated"].calls == 2  # ruff: ignore[magic-value-comparison]
+    assert metrics.phases["block"].seconds == timing.seconds
+
+
+def test_api_requests_counted() -> None:
+    """Test the transport counts every response, 429 retries included."""
+    codes = iter([429, 200])
+    transport = RateLimitedTransport(
+        httpx.MockTransport(lambda _: httpx.Response(next(codes))),
+        TokenBucket(1000, 10),
+        ClientSettings(backoff=0),
+    )
+
+    with (
+        run_metrics("test") as metrics,
+        patch("er_cloudflare_zone.client.time.sleep"),
+        httpx.Client(transport=transport) as client,
+    ):
+        client.get("https://api.cloudflare.com/client/v4/zones")
+
+    assert metrics.api_requests == {429: 1, 200: 1}
+    assert metrics.phases["api_request"].calls == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_write_run_report(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test the JSON report and the Prometheus textfile of a run."""
+    monkeypatch.setenv("RUN_REPORT_FILE", str(tmp_path / "run-report.json"))
+    monkeypatch.setenv("METRICS_FILE", str(tmp_path / "metrics.prom"))
+    results = [
+        ImportResult(
+            resource_address=f"cloudflare_zone.{name}",
+            import_id="zone-123",
+            success=success,
+            duration_seconds=seconds,
+        )
+        for name, success, seconds in [("a", True, 1.0), ("b", False, 3.0)]
+    ]
+    with run_metrics("import-tfstate") as metrics, timed("import_resource"):
+        pass
+
+    report = write_run_report(metrics, 'zone "1"', results)
+
+    assert json.loads((tmp_path / "run-report.json").read_text(encoding="utf-8")) == (
+        json.loads(report.model_dump_json())
+    )
+    assert (report.succeeded, report.failed) == (1, 1)
+    assert [r.resource_address for r in report.slowest] == [
+        "cloudflare_zone.b",
+        "cloudflare_zone.a",
+    ]
+    text = (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+    assert text == prometheus_text(report)
+    assert "# TYPE er_cloudflare_zone_phase_seconds gauge\n" in text
+    assert (
+        'er_cloudflare_zone_phase_calls{command="import-tfstate",zone="zone \\"1\\"",'
+        'phase="import_resource"} 1\n'
+    ) in text
+    assert (
+        'er_cloudflare_zone_imports{command="import-tfstate",zone="zone \\"1\\"",'
+        'outcome="failed"} 1\n'
+    ) in text
+
+
+def test_write_run_report_disabled(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test empty file settings write nothing."""
+    monkeypatch.setenv("RUN_REPORT_FILE", "")
+    monkeypatch.setenv("METRICS_FILE", "")
+    monkeypatch.chdir(tmp_path)
+
+    with run_metrics("generate-tf-config") as metrics:
+        pass
+    write_run_report(metrics, "zone")
+
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,137 @@
+"""Tests for plan_targets module."""
+
+import json
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+import pytest
+
+from er_cloudflare_zone.app_interface_input import CloudflareZone
+from er_cloudflare_zone.plan_targets import (
+    AppliedInputs,
+    create_plan_targets_file,
+    plan_target_addresses,
+    plan_targets,
+)
+from er_cloudflare_zone.shards import ShardLayout, shard_index
+
+
+@pytest.fixture
+def zone(raw_input_data: dict) -> CloudflareZone:
+    data = raw_input_data["data"]
+    return CloudflareZone.model_validate(data | {"dns_records": data["records"]})
+
+
+@pytest.fixture
+def applied_inputs(tmp_path: Path) -> AppliedInputs:
+    return AppliedInputs(tmp_path / "applied-inputs")
+
+
+def test_plan_target_addresses(zone: CloudflareZone) -> None:
+    """Test added, changed and removed objects are targeted by identifier."""
+    previous = zone
+    current = previous.model_copy(deep=True)
+    current.dns_records[0].ttl = 300
+    del current.dns_records[1]
+    current.dns_records.append(
+        current.dns_records[0].model_copy(update={"identifier": "new"})
+    )
+    current.rulesets[0].rules[0].enabled = False
+
+    assert plan_target_addresses(previous, current) == [
+        'cloudflare_dns_record.this["a-example-com"]',
+        'cloudflare_dns_record.this["new"]',
+        'cloudflare_dns_record.this["a-www-example-com"]',
+        'cloudflare_ruleset.this["redirects"]',
+    ]
+
+
+def test_plan_target_addresses_zone_change(zone: CloudflareZone) -> None:
+    """Test a zone-level change falls back to a full plan."""
+    current = zone.model_copy(update={"plan": "free"})
+
+    assert plan_target_addresses(zone, current) is None
+
+
+def test_plan_targets(applied_inputs: AppliedInputs, zone: CloudflareZone) -> None:
+    """Test a full plan until an input is applied, then only the changes."""
+    assert plan_targets(applied_inputs, zone).full_plan
+
+    applied_digest = applied_inputs.mark_applied(zone)
+    unchanged = plan_targets(applied_inputs, zone)
+    changed_zone = zone.model_copy(deep=True)
+    changed_zone.dns_records[0].ttl = 300
+    changed = plan_targets(applied_inputs, changed_zone)
+
+    assert (unchanged.full_plan, unchanged.targets) == (False, [])
+    assert unchanged.input_digest == applied_digest
+    assert changed.targets == ['cloudflare_dns_record.this["a-example-com"]']
+    assert changed.applied_digest == applied_digest
+    # an input is only diffed against once marked applied
+    assert plan_targets(applied_inputs, changed_zone).applied_digest == applied_digest
+
+
+def test_applied_inputs_pruned(
+    applied_inputs: AppliedInputs, zone: CloudflareZone
+) -> None:
+    """Test only the applied and the pending input are kept."""
+    first = applied_inputs.mark_applied(zone)
+    second_zone = zone.model_copy(update={"plan": "free"})
+    second = applied_inputs.store(second_zone)
+    third = applied_inputs.store(zone.model_copy(update={"plan": "pro"}))
+
+    assert {p.stem for p in applied_inputs.path.glob("*.json")} == {first, third}
+
+    assert applied_inputs.mark_applied(second_zone) == second
+    assert {p.stem for p in applied_inputs.path.glob("*.json")} == {second}
+    assert applied_inputs.last_applied() == (second, second_zone)
+
+
+def test_create_plan_targets_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, zone: CloudflareZone
+) -> None:
+    """Test the plan targets are written for the pipeline."""
+    monkeypatch.setenv("APPLIED_INPUTS_DIR", str(tmp_path / "applied-inputs"))
+    monkeypatch.setenv("PLAN_TARGETS_FILE", str(tmp_path / "plan-targets.json"))
+
+    targets = create_plan_targets_file(zone)
+
+    assert json.loads((tmp_path / "plan-targets.json").read_text(encoding="utf-8")) == {
+        "input_digest": targets.input_digest,
+        "applied_digest": None,
+        "full_plan": True,
+        "targets": [],
+    }
+
+
+def test_create_plan_targets_file_sharded(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, zone: CloudflareZone
+) -> None:
+    """Test each shard gets the targets of its own DNS records."""
+    monkeypatch.setenv("APPLIED_INPUTS_DIR", str(tmp_path / "applied-inputs"))
+    monkeypatch.setenv("PLAN_TARGETS_FILE", str(tmp_path / "plan-targets.json"))
+    layout = ShardLayout(tmp_path / "shards", 2)
+    AppliedInputs(tmp_path / "applied-inputs").mark_applied(zone)
+    changed = zone.model_copy(deep=True)
+    changed.dns_records[0].ttl = 300
+    changed.rulesets[0].rules[0].enabled = False
+
+    targets = create_plan_targets_file(changed, layout)
+
+    def read_targets(path: Path) -> list[str]:
+        return json.loads(path.read_text(encoding="utf-8"))["targets"]
+
+    shard = shard_index(changed.dns_records[0].identifier, layout.count)
+    assert targets.targets == [
+        'cloudflare_dns_record.this["a-example-com"]',
+        'cloudflare_ruleset.this["redirects"]',
+    ]
+    assert read_targets(tmp_path / "plan-targets.json") == [
+        'cloudflare_ruleset.this["redirects"]'
+    ]
+    assert read_targets(layout.shard_dir(shard) / "plan-targets.json") == [
+        'cloudflare_dns_record.this["a-example-com"]'
+    ]
+    assert read_targets(layout.shard_dir(1 - shard) / "plan-targets.json") == []
@@ -0,0 +1,71 @@
+"""Tests for profiling module."""
+
+import pstats
+import sys
+import tracemalloc
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+from er_cloudflare_zone.profiling import ProfileConfig, ProfileMode, profiled
+
+
+def work() -> list[str]:
+    return [str(i) for i in range(10_000)]
+
+
+@pytest.fixture
+def profile_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profile"))
+    return tmp_path / "profile"
+
+
+def test_profile_modes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test PROFILE is a comma separated list of profilers."""
+    monkeypatch.setenv("PROFILE", " CPU, memory,")
+    assert ProfileConfig().modes() == {ProfileMode.CPU, ProfileMode.MEMORY}
+    monkeypatch.setenv("PROFILE", "")
+    assert ProfileConfig().modes() == set()
+
+
+def test_profiled_disabled(monkeypatch: pytest.MonkeyPatch, profile_dir: Path) -> None:
+    """Test nothing is profiled, imported or written without PROFILE."""
+    monkeypatch.delenv("PROFILE", raising=False)
+    monkeypatch.delitem(sys.modules, "cProfile", raising=False)
+
+    with profiled("test"):
+        work()
+
+    assert "cProfile" not in sys.modules
+    assert not profile_dir.exists()
+
+
+def test_profiled_cpu(monkeypatch: pytest.MonkeyPatch, profile_dir: Path) -> None:
+    """Test the pstats and the report of the top functions are written."""
+    monkeypatch.setenv("PROFILE", "cpu")
+
+    with profiled("test"):
+        work()
+
+    assert {p.name for p in profile_dir.iterdir()} == {"test.pstats", "test.cpu.txt"}
+    stats = pstats.Stats(str(profile_dir / "test.pstats")).get_stats_profile()
+    assert "work" in stats.func_profiles
+    assert "work" in (profile_dir / "test.cpu.txt").read_text(encoding="utf-8")
+
+
+def test_profiled_memory(monkeypatch: pytest.MonkeyPatch, profile_dir: Path) -> None:
+    """Test the peak and top allocations are reported, the snapshot dumped."""
+    monkeypatch.setenv("PROFILE", "memory")
+
+    with profiled("test"):
+        kept = work()
+
+    assert kept
+    assert not tracemalloc.is_tracing()
+    report = (profile_dir / "test.memory.txt").read_text(encoding="utf-8")
+    assert report.startswith("Peak traced memory: ")
+    assert "test_profiling.py" in report
+    assert tracemalloc.Snapshot.load(str(profile_dir / "test.tracemalloc")).traces
@@ -0,0 +1,317 @@
+"""Tests for reconcile module."""
+
+import json
+import subprocess
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, call, patch
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from er_cloudflare_zone.app_interface_input import CloudflareDNSRecord
+from er_cloudflare_zone.discovery import LeanDNSRecord
+from er_cloudflare_zone.reconcile import (
+    DNSAction,
+    DNSChange,
+    ReconcileConfig,
+    apply_changes,
+    batches,
+    main,
+    plan_dns_changes,
+)
+
+
+def dns_record(identifier: str, name: str, content: str) -> CloudflareDNSRecord:
+    return CloudflareDNSRecord(
+        identifier=identifier, name=name, type="A", ttl=1, content=content
+    )
+
+
+def live_record(id_: str, name: str, content: str) -> LeanDNSRecord:
+    return LeanDNSRecord(id_, name, "A", content, None, ttl=1, proxied=False)
+
+
+def test_plan_dns_changes() -> None:
+    """Test only managed records are deleted, matched ones patched or adopted."""
+    plan = plan_dns_changes(
+        [
+            dns_record("www", "www.example.com", "192.0.2.2"),
+            dns_record("api", "api.example.com", "192.0.2.3"),
+            dns_record("new", "new.example.com", "192.0.2.4"),
+        ],
+        [
+            live_record("r-www", "www.example.com", "192.0.2.1"),
+            live_record("r-api", "api.example.com", "192.0.2.3"),
+            live_record("r-old", "old.example.com", "192.0.2.5"),
+            live_record("r-manual", "manual.example.com", "192.0.2.6"),
+        ],
+        {"www": "r-www", "old": "r-old", "gone": "r-gone"},
+    )
+
+    assert [(c.action, c.identifier, c.record_id, c.body) for c in plan.changes] == [
+        (DNSAction.DELETE, "old", "r-old", {}),
+        (DNSAction.PATCH, "www", "r-www", {"type": "A", "content": "192.0.2.2"}),
+        (
+            DNSAction.POST,
+            "new",
+            None,
+            {"name": "new.example.com", "type": "A", "ttl": 1, "content": "192.0.2.4"},
+        ),
+    ]
+    assert [(r.identifier, live.id) for r, live in plan.pairs] == [
+        ("www", "r-www"),
+        ("api", "r-api"),
+    ]
+    assert plan.stale == ["old", "gone"]
+    assert plan.replaced == []
+
+
+def test_plan_dns_changes_replaced() -> None:
+    """Test a managed record gone from the zone is replaced in the state."""
+    plan = plan_dns_changes(
+        [dns_record("www", "www.example.com", "192.0.2.1")],
+        [live_record("r-api", "api.example.com", "192.0.2.3")],
+        {"www": "r-dead"},
+    )
+
+    assert [(c.action, c.identifier) for c in plan.changes] == [(DNSAction.POST, "www")]
+    assert plan.stale == []
+    assert plan.replaced == ["www"]
+
+
+def test_plan_dns_changes_rename() -> None:
+    """Test renaming a managed record patches its name."""
+    plan = plan_dns_changes(
+        [dns_record("www", "new.example.com", "192.0.2.1")],
+        [live_record("r-www", "old.example.com", "192.0.2.1")],
+        {"www": "r-www"},
+    )
+
+    assert [(c.action, c.record_id, c.body) for c in plan.changes] == [
+        (DNSAction.PATCH, "r-www", {"name": "new.example.com", "type": "A"}),
+    ]
+
+
+def test_plan_dns_changes_unmanaged() -> None:
+    """Test an unmanaged record with the same name and type is left alone."""
+    plan = plan_dns_changes(
+        [dns_record("www", "www.example.com", "192.0.2.9")],
+        [live_record("u1", "www.example.com", "198.51.100.7")],
+        {},
+    )
+
+    assert [(c.action, c.record_id) for c in plan.changes] == [(DNSAction.POST, None)]
+    assert plan.pairs == []
+
+
+def test_batches() -> None:
+    """Test deletes go first and posts last, across the chunks too."""
+    changes = [
+        DNSChange(action=action, identifier=f"{action}-{i}")
+        for action in (DNSAction.POST, DNSAction.PATCH, DNSAction.DELETE)
+        for i in range(2)
+    ]
+
+    assert [[c.identifier for c in chunk] for chunk in batches(changes, 4)] == [
+        ["delete-0", "delete-1", "patch-0", "patch-1"],
+        ["post-0", "post-1"],
+    ]
+
+
+def test_batch_size_positive(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a batch size that would apply nothing is rejected."""
+    monkeypatch.setenv("DNS_BATCH_SIZE", "0")
+
+    with pytest.raises(ValidationError):
+        ReconcileConfig()
+
+
+def test_apply_changes_stops_at_failed_batch() -> None:
+    """Test a failed batch fails its changes and leaves the later ones undone."""
+    client = MagicMock()
+    client.dns.records.batch.side_effect = RuntimeError("conflict")
+    changes = [
+        DNSChange(action=DNSAction.POST, identifier=f"r{i}", body={}) for i in range(3)
+    ]
+
+    apply_changes(client, "zone-123", changes, 2)
+
+    client.dns.records.batch.assert_called_once()
+    assert [(c.success, c.error_message) for c in changes] == [
+        (False, "conflict"),
+        (False, "conflict"),
+        (False, "Not applied, an earlier batch failed"),
+    ]
+
+
+@pytest.fixture
+def mock_reconcile(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, raw_input_data: dict
+) -> Iterator[SimpleNamespace]:
+    """A zone with a changed, a new and a removed record, terraform mocked."""
+    raw_input_data["data"]["dns_records"] = [
+        {
+            "identifier": "www",
+            "name": "www.example.com",
+            "type": "A",
+            "ttl": 1,
+            "content": "192.0.2.2",
+        },
+        {
+            "identifier": "new",
+            "name": "new.example.com",
+            "type": "A",
+            "ttl": 1,
+            "content": "192.0.2.4",
+        },
+    ]
+    monkeypatch.setenv("DRY_RUN", "False")
+    monkeypatch.setenv("DNS_RECONCILE_FILE", str(tmp_path / "dns-reconcile.json"))
+    monkeypatch.setenv("RUN_REPORT_FILE", "")
+    monkeypatch.setenv("METRICS_FILE", "")
+    monkeypatch.setenv("ZONE_INDEX_TTL", "0")
+    state = {
+        "resources": [
+            {
+                "mode": "managed",
+                "type": "cloudflare_dns_record",
+                "name": "this",
+                "instances": [
+                    {"index_key": "www", "attributes": {"id": "r-www"}},
+                    {"index_key": "old", "attributes": {"id": "r-old"}},
+                ],
+            }
+        ]
+    }
+    with (
+        patch(
+            "er_cloudflare_zone.inputs.read_input_bytes",
+            return_value=json.dumps(raw_input_data).encode(),
+        ),
+        patch("er_cloudflare_zone.reconcile.cloudflare_client") as client,
+        patch("er_cloudflare_zone.reconcile.resolve_zone_id", return_value="zone-123"),
+        patch(
+            "er_cloudflare_zone.reconcile.list_dns_records_lean",
+            return_value=[
+                live_record("r-www", "www.example.com", "192.0.2.1"),
+                live_record("r-old", "old.example.com", "192.0.2.5"),
+            ],
+        ) as live_records,
+        patch(
+            "er_cloudflare_zone.tfstate.terraform_run", return_value=json.dumps(state)
+        ),
+        patch("er_cloudflare_zone.reconcile.terraform_run") as reconcile_terraform,
+        patch(
+            "er_cloudflare_zone.import_tfstate.terraform_run",
+            return_value='cloudflare_dns_record.this["www"]\n',
+        ) as import_terraform,
+    ):
+        yield SimpleNamespace(
+            batch=client.return_value.dns.records.batch,
+            live_records=live_records,
+            reconcile_terraform=reconcile_terraform,
+            import_terraform=import_terraform,
+            report_file=tmp_path / "dns-reconcile.json",
+        )
+
+
+def test_main(mock_reconcile: SimpleNamespace) -> None:
+    """Test the changes go in one batch and the state follows them."""
+    mock_reconcile.batch.return_value = SimpleNamespace(
+        posts=[SimpleNamespace(id="r-new")]
+    )
+
+    main()
+
+    mock_reconcile.batch.assert_called_once_with(
+        zone_id="zone-123",
+        deletes=[{"id": "r-old"}],
+        patches=[{"id": "r-www", "type": "A", "content": "192.0.2.2"}],
+        posts=[
+            {"name": "new.example.com", "type": "A", "ttl": 1, "content": "192.0.2.4"}
+        ],
+    )
+    mock_reconcile.reconcile_terraform.assert_called_once_with(
+        ["state", "rm", 'cloudflare_dns_record.this["old"]'], dry_run=False
+    )
+    assert mock_reconcile.import_terraform.call_args_list[-1] == call(
+        ["import", 'cloudflare_dns_record.this["new"]', "zone-123/r-new"],
+        dry_run=False,
+    )
+    report = json.loads(mock_reconcile.report_file.read_text(encoding="utf-8"))
+    assert not report["failed"]
+    assert [c["success"] for c in report["changes"]] == [True, True, True]
+
+
+def test_main_dry_run(
+    mock_reconcile: SimpleNamespace, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a dry run plans the changes but writes nothing."""
+    monkeypatch.setenv("DRY_RUN", "True")
+
+    main()
+
+    mock_reconcile.batch.assert_not_called()
+    mock_reconcile.reconcile_terraform.assert_not_called()
+    report = json.loads(mock_reconcile.report_file.read_text(encoding="utf-8"))
+    assert [(c["action"], c["success"]) for c in report["changes"]] == [
+        ("delete", None),
+        ("patch", None),
+        ("post", None),
+    ]
+
+
+def test_main_stale_id(mock_reconcile: SimpleNamespace) -> None:
+    """Test a record recreated under a new ID replaces the dead one in the state."""
+    mock_reconcile.live_records.return_value = [
+        live_record("r-old", "old.example.com", "192.0.2.5")
+    ]
+    mock_reconcile.batch.return_value = SimpleNamespace(
+        posts=[SimpleNamespace(id="r-www2"), SimpleNamespace(id="r-new")]
+    )
+    mock_reconcile.import_terraform.return_value = ""
+
+    main()
+
+    assert mock_reconcile.batch.call_args.kwargs["posts"][0]["name"] == (
+        "www.example.com"
+    )
+    mock_reconcile.reconcile_terraform.assert_called_once_with(
+        [
+            "state",
+            "rm",
+            'cloudflare_dns_record.this["old"]',
+            'cloudflare_dns_record.this["www"]',
+        ],
+        dry_run=False,
+    )
+    assert (
+        call(
+            ["import", 'cloudflare_dns_record.this["www"]', "zone-123/r-www2"],
+            dry_run=False,
+        )
+        in mock_reconcile.import_terraform.call_args_list
+    )
+
+
+@pytest.mark.parametrize("dry_run", ["True", "False"])
+def test_main_state_pull_fails(
+    mock_reconcile: SimpleNamespace, monkeypatch: pytest.MonkeyPatch, dry_run: str
+) -> None:
+    """Test a state that cannot be pulled is never taken for an empty one."""
+    monkeypatch.setenv("DRY_RUN", dry_run)
+    error = subprocess.CalledProcessError(1, ["terraform", "state", "pull"])
+
+    with (
+        patch("er_cloudflare_zone.tfstate.terraform_run", side_effect=error),
+        pytest.raises(subprocess.CalledProcessError),
+    ):
+        main()
+
+    mock_reconcile.batch.assert_not_called()
+    assert not mock_reconcile.report_file.exists()
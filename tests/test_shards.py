@@ -0,0 +1,128 @@
+"""Tests for shards module."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from er_cloudflare_zone.app_interface_input import AppInterfaceInput
+from er_cloudflare_zone.import_result import ImportTarget
+from er_cloudflare_zone.shards import (
+    ShardConfig,
+    ShardLayout,
+    create_shards,
+    shard_environ,
+    shard_index,
+    shard_provision,
+)
+
+
+@pytest.fixture
+def sharded_input(raw_input_data: dict) -> AppInterfaceInput:
+    data = raw_input_data["data"]
+    return AppInterfaceInput.model_validate(
+        raw_input_data | {"data": data | {"dns_records": data["records"]}}
+    )
+
+
+@pytest.fixture
+def module_dir(tmp_path: Path) -> Path:
+    module_dir = tmp_path / "module"
+    module_dir.mkdir()
+    for name in ("main.tf", "variables.tf", ".terraform.lock.hcl", "README.md"):
+        (module_dir / name).write_text(name, encoding="utf-8")
+    return module_dir
+
+
+def test_shard_index_is_stable() -> None:
+    """Test a record's shard only depends on its identifier and the count."""
+    assert shard_index("a-example-com", 4) == shard_index("a-example-com", 4)
+    assert {shard_index(f"record-{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_shard_config_layout(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test sharding is off unless DNS_RECORD_SHARDS is set."""
+    assert ShardConfig().layout() is None
+
+    monkeypatch.setenv("DNS_RECORD_SHARDS", "3")
+    monkeypatch.setenv("SHARDS_DIR", "out")
+
+    assert ShardConfig().layout() == ShardLayout(Path("out"), 3)
+
+
+def test_shard_provision(sharded_input: AppInterfaceInput) -> None:
+    """Test each shard gets a state key of its own."""
+    provision = shard_provision(sharded_input.provision, "dns-1")
+
+    assert (
+        provision.module_provision_data.tf_state_key
+        == "cloudflare/dev/zone/cloudflare-zone-example/terraform-dns-1.tfstate"
+    )
+    assert provision.module_provision_data.tf_state_bucket == (
+        sharded_input.provision.module_provision_data.tf_state_bucket
+    )
+
+
+def test_partition(tmp_path: Path) -> None:
+    """Test DNS records are grouped by shard and the rest kept in the root."""
+    layout = ShardLayout(tmp_path, 2)
+    zone = ImportTarget(resource_address="cloudflare_zone.this", import_id="z")
+    record = ImportTarget(
+        resource_address='cloudflare_dns_record.this["a-example-com"]',
+        import_id="z/r",
+    )
+
+    assert layout.partition([zone, record]) == {
+        None: [zone],
+        shard_index("a-example-com", 2): [record],
+    }
+
+
+def test_create_shards(
+    tmp_path: Path, sharded_input: AppInterfaceInput, module_dir: Path
+) -> None:
+    """Test every shard dir gets the module, its backend and its records."""
+    layout = ShardLayout(tmp_path / "shards", 2)
+
+    manifest = create_shards(sharded_input, layout, module_dir)
+
+    identifiers: list[str] = []
+    for index in range(2):
+        shard_dir = layout.shard_dir(index)
+        assert sorted(p.name for p in shard_dir.iterdir()) == [
+            ".terraform.lock.hcl",
+            "backend.tf",
+            "main.tf",
+            "terraform.tfvars.json",
+            "variables.tf",
+        ]
+        assert f"terraform-dns-{index}.tfstate" in (shard_dir / "backend.tf").read_text(
+            encoding="utf-8"
+        )
+        tf_vars = json.loads(
+            (shard_dir / "terraform.tfvars.json").read_text(encoding="utf-8")
+        )
+        assert tf_vars["account_id"] == "some-id"
+        assert tf_vars["name"] == "example.com"
+        shard_identifiers = [r["identifier"] for r in tf_vars["dns_records"]]
+        assert all(shard_index(i, 2) == index for i in shard_identifiers)
+        assert manifest.dns_records[f"dns-{index}"] == shard_identifiers
+        identifiers += shard_identifiers
+
+    assert sorted(identifiers) == ["a-example-com", "a-www-example-com"]
+    assert json.loads(
+        (tmp_path / "shards" / "manifest.json").read_text(encoding="utf-8")
+    ) == manifest.model_dump(mode="json")
+
+
+def test_shard_environ(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test terraform runs in the shard dir, the environment restored after."""
+    monkeypatch.setenv("TERRAFORM_CMD", "terraform -chdir=module")
+
+    with shard_environ(tmp_path / "dns-0"):
+        assert os.environ["TERRAFORM_CMD"] == f"terraform -chdir={tmp_path / 'dns-0'}"
+        assert os.environ["BACKEND_TF_FILE"] == str(tmp_path / "dns-0" / "backend.tf")
+
+    assert os.environ["TERRAFORM_CMD"] == "terraform -chdir=module"
+    assert "BACKEND_TF_FILE" not in os.environ
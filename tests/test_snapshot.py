@@ -0,0 +1,194 @@
+"""Tests for snapshot module."""
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+import pytest
+from cloudflare.types.dns import RecordResponse
+from cloudflare.types.rulesets import RulesetListResponse
+from pydantic import TypeAdapter
+
+from er_cloudflare_zone.app_interface_input import CloudflareZone
+from er_cloudflare_zone.discovery import (
+    Discovery,
+    LeanDNSRecord,
+    dns_record_index,
+    ruleset_index,
+)
+from er_cloudflare_zone.snapshot import DiscoverySnapshots
+
+LEAN_RECORD = LeanDNSRecord("record-a", "a.example.com", "A", "192.0.2.1", None)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def snapshots(tmp_path: Path, clock: Clock) -> DiscoverySnapshots:
+    return DiscoverySnapshots(tmp_path / "discovery", max_age=60, clock=clock)
+
+
+@pytest.fixture
+def zone() -> CloudflareZone:
+    return CloudflareZone.model_validate({
+        "account_id": "acct-123",
+        "name": "example.com",
+        "dns_records": [
+            {
+                "identifier": "a",
+                "name": "a.example.com",
+                "type": "A",
+                "ttl": 1,
+                "content": "192.0.2.1",
+            }
+        ],
+    })
+
+
+def full_discovery() -> Discovery:
+    record = TypeAdapter(RecordResponse).validate_python({
+        "id": "record-a",
+        "name": "a.example.com",
+        "type": "A",
+        "content": "192.0.2.1",
+        "ttl": 1,
+        "proxied": False,
+        "proxiable": True,
+        "meta": {},
+        "settings": {},
+        "created_on": "2024-01-01T00:00:00Z",
+        "modified_on": "2024-01-01T00:00:00Z",
+    })
+    ruleset = RulesetListResponse.model_validate({
+        "id": "ruleset-789",
+        "kind": "zone",
+        "last_updated": "2024-01-01T00:00:00Z",
+        "name": "redirects",
+        "phase": "http_request_dynamic_redirect",
+        "version": "1",
+    })
+    return Discovery(
+        zone_id="zone-123",
+        dns_record_by_key=dns_record_index([record]),
+        ruleset_by_key=ruleset_index([ruleset]),
+    )
+
+
+def lean_discovery() -> Discovery:
+    return Discovery(
+        zone_id="zone-123",
+        dns_record_by_key=dns_record_index([LEAN_RECORD]),
+        ruleset_by_key={},
+    )
+
+
+def load(
+    snapshots: DiscoverySnapshots,
+    zone: CloudflareZone,
+    *,
+    lean: bool = True,
+    count: int | None = 1,
+) -> Discovery | None:
+    return snapshots.load("zone-123", zone, lean=lean, dns_record_count=lambda: count)
+
+
+def test_roundtrip_full(snapshots: DiscoverySnapshots, zone: CloudflareZone) -> None:
+    """Test SDK models come back as SDK models, serving full and lean runs."""
+    discovery = full_discovery()
+    snapshots.save(discovery, zone, dns_record_count=1)
+
+    loaded = load(snapshots, zone, lean=False)
+
+    assert loaded is not None
+    assert loaded.dns_record_by_key is not None
+    assert discovery.dns_record_by_key is not None
+    assert list(loaded.dns_record_by_key) == list(discovery.dns_record_by_key)
+    assert loaded.ruleset_by_key == discovery.ruleset_by_key
+    assert load(snapshots, zone, lean=True) is not None
+
+
+def test_roundtrip_lean(snapshots: DiscoverySnapshots, zone: CloudflareZone) -> None:
+    """Test lean records come back lean and never serve a full run."""
+    snapshots.save(lean_discovery(), zone, dns_record_count=1)
+
+    loaded = load(snapshots, zone)
+
+    assert loaded is not None
+    assert loaded.dns_record_by_key is not None
+    assert [r.id for r in loaded.dns_record_by_key.lookup(zone.dns_records[0])] == [
+        "record-a"
+    ]
+    assert load(snapshots, zone, lean=False) is None
+
+
+def test_load_stale(
+    snapshots: DiscoverySnapshots, zone: CloudflareZone, clock: Clock
+) -> None:
+    """Test a snapshot older than the max age is not reused."""
+    snapshots.save(lean_discovery(), zone, dns_record_count=1)
+    clock.now += 61
+
+    assert load(snapshots, zone) is None
+
+
+def test_load_record_count_changed(
+    snapshots: DiscoverySnapshots, zone: CloudflareZone
+) -> None:
+    """Test a snapshot is not reused once the zone's record count changed."""
+    snapshots.save(lean_discovery(), zone, dns_record_count=1)
+
+    assert load(snapshots, zone, count=2) is None
+
+
+def test_load_config_changed(
+    snapshots: DiscoverySnapshots, zone: CloudflareZone
+) -> None:
+    """Test a snapshot of another zone configuration is not reused."""
+    snapshots.save(lean_discovery(), zone, dns_record_count=1)
+    zone.dns_records[0].content = "192.0.2.2"
+
+    assert load(snapshots, zone) is None
+
+
+def test_save_skips_failed_listing(
+    snapshots: DiscoverySnapshots, zone: CloudflareZone
+) -> None:
+    """Test a discovery with a failed listing is never saved."""
+    snapshots.save(
+        Discovery(zone_id="zone-123", dns_record_by_key=None, ruleset_by_key={}),
+        zone,
+        dns_record_count=None,
+    )
+
+    assert not snapshots.snapshot_file("zone-123").exists()
+
+
+def test_save_failure_is_logged(
+    snapshots: DiscoverySnapshots, zone: CloudflareZone
+) -> None:
+    """Test an unserializable discovery leaves no snapshot behind."""
+    discovery = Discovery(
+        zone_id="zone-123",
+        dns_record_by_key=dns_record_index([]),
+        ruleset_by_key={
+            ("redirects", "phase"): SimpleNamespace(model_dump=MagicMock())
+        },
+    )
+
+    snapshots.save(discovery, zone, dns_record_count=None)
+
+    assert not snapshots.snapshot_file("zone-123").exists()
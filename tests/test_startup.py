@@ -0,0 +1,19 @@
+"""Tests for the startup time of the entry points."""
+
+import pytest
+from benchmarks.startup import (
+    BUDGET_SECONDS,
+    ENTRY_POINTS,
+    deferred_imports,
+    import_times,
+    startup_seconds,
+)
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS.values())
+def test_startup_within_budget(module: str) -> None:
+    """Test entry points defer the SDK and start up within the budget."""
+    times = import_times(module)
+
+    assert deferred_imports(times) == set()
+    assert startup_seconds(times, module) < BUDGET_SECONDS
@@ -0,0 +1,273 @@
+"""Tests for tfstate module."""
+
+import json
+import subprocess
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+import pytest
+
+from er_cloudflare_zone.import_result import ImportTarget
+from er_cloudflare_zone.tfstate import (
+    PROVIDER,
+    PROVIDER_SOURCE,
+    STATE_VERSION,
+    build_state,
+    conform_attributes,
+    parse_address,
+    synthesize_state,
+)
+
+DNS_RECORD_BLOCK = {
+    "attributes": {
+        "id": {"type": "string", "computed": True},
+        "zone_id": {"type": "string", "required": True},
+        "name": {"type": "string", "required": True},
+        "ttl": {"type": "number", "required": True},
+        "proxied": {"type": "bool", "optional": True},
+        "meta": {"type": "string", "computed": True},
+        "data": {
+            "nested_type": {
+                "attributes": {
+                    "flags": {"type": "number", "optional": True},
+                    "tag": {"type": "string", "optional": True},
+                },
+                "nesting_mode": "single",
+            },
+            "optional": True,
+        },
+    }
+}
+SCHEMAS = {
+    "cloudflare_zone": {
+        "version": 0,
+        "block": {"attributes": {"id": {"type": "string"}}},
+    },
+    "cloudflare_dns_record": {"version": 500, "block": DNS_RECORD_BLOCK},
+}
+RECORD_TARGET = ImportTarget(
+    resource_address='cloudflare_dns_record.this["caa"]',
+    import_id="zone-123/record-456",
+    api_object={
+        "name": "example.com",
+        "ttl": 300,
+        "meta": {"auto_added": False},
+        "data": {"flags": 0, "tag": "issue", "value": "letsencrypt.org"},
+        "comment": "not in schema",
+    },
+)
+ZONE_TARGET = ImportTarget(
+    resource_address="cloudflare_zone.this", import_id="zone-123"
+)
+
+
+@pytest.fixture
+def mock_terraform_run() -> Iterator[MagicMock]:
+    """Mock terraform_run."""
+    with patch("er_cloudflare_zone.tfstate.terraform_run") as mock:
+        yield mock
+
+
+@pytest.mark.parametrize(
+    ("address", "expected"),
+    [
+        ("cloudflare_zone.this", ("cloudflare_zone", "this", None)),
+        (
+            "cloudflare_zone_subscription.this[0]",
+            ("cloudflare_zone_subscription", "this", 0),
+        ),
+        ('cloudflare_dns_record.this["a.b"]', ("cloudflare_dns_record", "this", "a.b")),
+    ],
+)
+def test_parse_address(address: str, expected: tuple) -> None:
+    """Test resource addresses are split into type, name and index key."""
+    assert parse_address(address) == expected
+
+
+def test_conform_attributes() -> None:
+    """Test attributes are shaped to the schema, mismatches are nulled."""
+    assert conform_attributes(
+        {
+            "id": "record-456",
+            "ttl": 300,
+            "proxied": "yes",
+            "meta": {"auto_added": False},
+            "data": {"flags": 0, "tag": "issue", "value": "letsencrypt.org"},
+            "comment": "not in schema",
+        },
+        DNS_RECORD_BLOCK,
+    ) == {
+        "id": "record-456",
+        "zone_id": None,
+        "name": None,
+        "ttl": 300,
+        "proxied": None,
+        "meta": None,
+        "data": {"flags": 0, "tag": "issue"},
+    }
+
+
+def test_build_state_new() -> None:
+    """Test a fresh state document is created with the schema versions."""
+    state = build_state(None, [ZONE_TARGET, RECORD_TARGET], SCHEMAS)
+
+    assert state["version"] == STATE_VERSION
+    assert state["serial"] == 1
+    assert state["resources"] == [
+        {
+            "mode": "managed",
+            "type": "cloudflare_zone",
+            "name": "this",
+            "provider": PROVIDER,
+            "instances": [
+                {
+                    "schema_version": 0,
+                    "attributes": {"id": "zone-123"},
+                    "sensitive_attributes": [],
+                }
+            ],
+        },
+        {
+            "mode": "managed",
+            "type": "cloudflare_dns_record",
+            "name": "this",
+            "provider": PROVIDER,
+            "instances": [
+                {
+                    "schema_version": 500,
+                    "attributes": {
+                        "id": "record-456",
+                        "zone_id": "zone-123",
+                        "name": "example.com",
+                        "ttl": 300,
+                        "proxied": None,
+                        "meta": None,
+                        "data": {"flags": 0, "tag": "issue"},
+                    },
+                    "sensitive_attributes": [],
+                    "index_key": "caa",
+                }
+            ],
+        },
+    ]
+
+
+def test_build_state_keeps_existing_instances() -> None:
+    """Test existing instances are kept and the serial is bumped."""
+    existing_instance = {"schema_version": 0, "attributes": {"id": "zone-123"}}
+    serial = 7
+    existing = {
+        "version": 4,
+        "lineage": "lineage-1",
+        "serial": serial,
+        "outputs": {},
+        "resources": [
+            {
+                "mode": "managed",
+                "type": "cloudflare_zone",
+                "name": "this",
+                "provider": PROVIDER,
+                "instances": [existing_instance],
+            }
+        ],
+    }
+
+    state = build_state(existing, [ZONE_TARGET, RECORD_TARGET], SCHEMAS)
+
+    assert state["lineage"] == "lineage-1"
+    assert state["serial"] == serial + 1
+    assert state["resources"][0]["instances"] == [existing_instance]
+    assert [r["type"] for r in state["resources"]] == [
+        "cloudflare_zone",
+        "cloudflare_dns_record",
+    ]
+
+
+def test_synthesize_state_push_and_verify(mock_terraform_run: MagicMock) -> None:
+    """Test the state is pushed once and verified with one refresh-only plan."""
+    pushed: list[dict] = []
+
+    def terraform_run(args: list[str], **_: bool) -> str:
+        match args[:2]:
+            case ["state", "pull"]:
+                return ""
+            case ["providers", "schema"]:
+                return json.dumps({
+                    "provider_schemas": {PROVIDER_SOURCE: {"resource_schemas": SCHEMAS}}
+                })
+            case ["state", "push"]:
+                pushed.append(json.loads(Path(args[2]).read_text(encoding="utf-8")))
+            case ["show", "-json"]:
+                return json.dumps({
+                    "resource_drift": [
+                        {
+                            "address": 'cloudflare_dns_record.this["caa"]',
+                            "change": {"actions": ["delete"]},
+                        },
+                        {
+                            "address": "cloudflare_zone.this",
+                            "change": {"actions": ["update"]},
+                        },
+                    ]
+                })
+        return ""
+
+    mock_terraform_run.side_effect = terraform_run
+
+    results = synthesize_state([ZONE_TARGET, RECORD_TARGET])
+
+    assert [c.args[0][:2] for c in mock_terraform_run.call_args_list] == [
+        ["state", "pull"],
+        ["providers", "schema"],
+        ["state", "push"],
+        ["plan", "-refresh-only"],
+        ["show", "-json"],
+        ["state", "rm"],
+    ]
+    # the record not found is not left in the state for a later run to skip
+    assert mock_terraform_run.call_args_list[-1].args[0] == [
+        "state",
+        "rm",
+        'cloudflare_dns_record.this["caa"]',
+    ]
+    assert len(pushed) == 1
+    assert [(r.resource_address, r.success) for r in results] == [
+        ("cloudflare_zone.this", True),
+        ('cloudflare_dns_record.this["caa"]', False),
+    ]
+
+
+def test_synthesize_state_dry_run(mock_terraform_run: MagicMock) -> None:
+    """Test a dry run builds the state without pushing or verifying it."""
+    mock_terraform_run.side_effect = lambda args, **_: (
+        json.dumps({
+            "provider_schemas": {PROVIDER_SOURCE: {"resource_schemas": SCHEMAS}}
+        })
+        if args[0] == "providers"
+        else ""
+    )
+
+    results = synthesize_state([ZONE_TARGET], dry_run=True)
+
+    assert [r.success for r in results] == [True]
+    mock_terraform_run.assert_called_with(
+        ["state", "push", mock_terraform_run.call_args[0][0][2]], dry_run=True
+    )
+
+
+def test_synthesize_state_push_failure(mock_terraform_run: MagicMock) -> None:
+    """Test a failed push fails every target."""
+    mock_terraform_run.side_effect = subprocess.CalledProcessError(
+        returncode=1, cmd=["terraform", "state"], stderr="state locked"
+    )
+
+    results = synthesize_state([ZONE_TARGET, RECORD_TARGET])
+
+    assert [(r.success, r.error_message) for r in results] == [
+        (False, "state locked"),
+        (False, "state locked"),
+    ]
@@ -0,0 +1,112 @@
+"""Tests for zone_index module."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, call
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from pathlib import Path
+
+import pytest
+
+from er_cloudflare_zone.zone_index import ZoneIndex
+
+ACCOUNT_ZONES = [
+    SimpleNamespace(id="zone-123", name="example.com"),
+    SimpleNamespace(id="zone-456", name="example.org"),
+]
+LIST_CALL = call(account={"id": "acct-123"}, per_page=50)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def zone_index(tmp_path: Path, clock: Clock) -> ZoneIndex:
+    return ZoneIndex(tmp_path / "zone-index", ttl=60, clock=clock)
+
+
+@pytest.fixture
+def client() -> MagicMock:
+    client = MagicMock()
+    client.zones.list.return_value = ACCOUNT_ZONES
+    return client
+
+
+async def list_zones() -> AsyncIterator[SimpleNamespace]:  # ruff: ignore[unused-async]
+    for zone in ACCOUNT_ZONES:
+        yield zone
+
+
+def test_lookup_lists_account_once(
+    zone_index: ZoneIndex, client: MagicMock, clock: Clock
+) -> None:
+    """Test all zones of the account are resolved from a single listing."""
+    assert zone_index.lookup(client, "acct-123", "example.com") == "zone-123"
+    assert zone_index.lookup(client, "acct-123", "example.org") == "zone-456"
+
+    assert client.zones.list.call_args_list == [LIST_CALL]
+    # a new index, e.g. of the next run, reads the cache from disk
+    fresh = ZoneIndex(zone_index.cache_dir, ttl=60, clock=clock)
+    assert fresh.cached("acct-123") == {
+        "example.com": "zone-123",
+        "example.org": "zone-456",
+    }
+
+
+def test_lookup_expired(zone_index: ZoneIndex, client: MagicMock, clock: Clock) -> None:
+    """Test the account is listed again once the cache expired."""
+    zone_index.lookup(client, "acct-123", "example.com")
+    clock.now += 61
+
+    assert zone_index.lookup(client, "acct-123", "example.com") == "zone-123"
+    assert client.zones.list.call_args_list == [LIST_CALL, LIST_CALL]
+
+
+def test_lookup_miss_invalidates(zone_index: ZoneIndex, client: MagicMock) -> None:
+    """Test a zone missing from the cache relists the account before failing."""
+    zone_index.lookup(client, "acct-123", "example.com")
+    client.zones.list.return_value = [
+        *ACCOUNT_ZONES,
+        SimpleNamespace(id="zone-789", name="example.net"),
+    ]
+
+    assert zone_index.lookup(client, "acct-123", "example.net") == "zone-789"
+    assert zone_index.lookup(client, "acct-123", "missing.example") is None
+    assert client.zones.list.call_args_list == [LIST_CALL] * 3
+
+
+def test_cached_ignores_corrupt_file(zone_index: ZoneIndex) -> None:
+    """Test a corrupt cache file is treated like a missing one."""
+    zone_index.cache_dir.mkdir()
+    zone_index.cache_file("acct-123").write_text("{", encoding="utf-8")
+
+    assert zone_index.cached("acct-123") is None
+
+
+def test_async_lookup(zone_index: ZoneIndex) -> None:
+    """Test the async lookup lists and caches the account's zones."""
+    client = MagicMock()
+    client.zones.list.return_value = list_zones()
+
+    assert (
+        asyncio.run(zone_index.async_lookup(client, "acct-123", "example.org"))
+        == "zone-456"
+    )
+    assert client.zones.list.call_args_list == [LIST_CALL]
+    assert zone_index.cached("acct-123") == {
+        "example.com": "zone-123",
+        "example.org": "zone-456",
+    }